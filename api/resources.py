@@ -0,0 +1,158 @@
+"""
+What the API exposes of each model.
+
+A Resource names the rows that are public, the fields a client may ask for
+with ?fields= and how each is read. Every Field lists the model columns it
+needs, so a request for name,slug loads only those columns (plus the key),
+and joins the category only when a category field is asked for.
+"""
+from collections import namedtuple
+
+from django.urls import reverse
+
+from blog.models import BlogCategory, BlogPost
+from products.models import Product, ProductCategory
+
+# columns: model fields to load for it; get: obj -> JSON value
+Field = namedtuple('Field', 'columns get')
+
+
+def image_url(name):
+    return Field((name,), lambda obj: getattr(obj, name).url if getattr(obj, name) else None)
+
+
+def column(name):
+    return Field((name,), lambda obj: getattr(obj, name))
+
+
+class Resource:
+    def __init__(self, name, queryset, fields, default_fields, updated_field=None, filters=None):
+        self.name = name
+        self.queryset = queryset
+        self.fields = fields
+        self.default_fields = default_fields
+        self.updated_field = updated_field
+        self.filters = filters or {}  # query parameter -> lookup
+
+    def get_queryset(self, params):
+        """Public rows, narrowed by any of self.filters present in `params`"""
+        queryset = self.queryset()
+        for param, lookup in self.filters.items():
+            if params.get(param):
+                queryset = queryset.filter(**{lookup: params[param]})
+        return queryset
+
+    def etag_columns(self, fields):
+        """
+        The columns that tell whether a row as `fields` shows it changed: the
+        row's updated_field, or else the shown columns themselves, plus any
+        shown from a joined row (renaming a category doesn't touch its products)
+        """
+        columns = {column for name in fields for column in self.fields[name].columns}
+        if self.updated_field:
+            columns = {self.updated_field} | {column for column in columns if '__' in column}
+        return ('pk', *sorted(columns))
+
+    def projection(self, queryset, fields, extra=()):
+        """`queryset` loading only what `fields` need, plus the `extra` columns"""
+        columns = {'pk', *extra} | {column for name in fields for column in self.fields[name].columns}
+        related = {column.split('__')[0] for column in columns if '__' in column}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*related, *columns)
+
+    def serialize(self, obj, fields):
+        return {name: self.fields[name].get(obj) for name in fields}
+
+
+def category_fields():
+    return {
+        'category': Field(('category__slug',), lambda obj: obj.category.slug if obj.category else None),
+        'category_name': Field(('category__name',), lambda obj: obj.category.name if obj.category else None),
+    }
+
+
+PRODUCT_FIELDS = {
+    'id': Field((), lambda obj: obj.pk),
+    'name': column('name'),
+    'slug': column('slug'),
+    **category_fields(),
+    'short_description': column('short_description'),
+    'description': column('description'),
+    'main_image': image_url('main_image'),
+    'images': Field(
+        ('main_image', 'image_2', 'image_3'),
+        lambda obj: [image.url for image in (obj.main_image, obj.image_2, obj.image_3) if image],
+    ),
+    'grain_length': column('grain_length'),
+    'purity': column('purity'),
+    'moisture': column('moisture'),
+    'broken_grains': column('broken_grains'),
+    'packaging_options': column('packaging_options'),
+    'additional_specs': Field(('additional_specs',), lambda obj: [
+        line.strip() for line in obj.additional_specs.splitlines() if line.strip()
+    ]),
+    'spec_sheet': image_url('spec_sheet'),
+    'is_featured': column('is_featured'),
+    'updated_at': column('updated_at'),
+    'url': Field(('slug',), lambda obj: reverse('products:product_detail', args=[obj.slug])),
+}
+
+PRODUCT_CATEGORY_FIELDS = {
+    'id': Field((), lambda obj: obj.pk),
+    'name': column('name'),
+    'slug': column('slug'),
+    'description': column('description'),
+    'image': image_url('image'),
+    'order': column('order'),
+    'updated_at': column('updated_at'),
+}
+
+POST_FIELDS = {
+    'id': Field((), lambda obj: obj.pk),
+    'title': column('title'),
+    'slug': column('slug'),
+    **category_fields(),
+    'excerpt': column('excerpt'),
+    'content': column('content_html'),
+    'toc': column('toc'),
+    'word_count': column('word_count'),
+    'reading_time': column('reading_time'),
+    'featured_image': image_url('featured_image'),
+    'publish_date': column('publish_date'),
+    'updated_at': column('updated_at'),
+    'url': Field(('slug',), lambda obj: reverse('blog:blog_detail', args=[obj.slug])),
+}
+
+POST_CATEGORY_FIELDS = {
+    'id': Field((), lambda obj: obj.pk),
+    'name': column('name'),
+    'slug': column('slug'),
+    'description': column('description'),
+}
+
+RESOURCES = {
+    resource.name: resource
+    for resource in (
+        Resource(
+            'products', lambda: Product.objects.filter(is_active=True), PRODUCT_FIELDS,
+            ('id', 'name', 'slug', 'category', 'short_description', 'main_image', 'url'),
+            updated_field='updated_at', filters={'category': 'category__slug'},
+        ),
+        Resource(
+            'categories', lambda: ProductCategory.objects.filter(is_active=True), PRODUCT_CATEGORY_FIELDS,
+            ('id', 'name', 'slug', 'description', 'image', 'order'),
+            updated_field='updated_at',
+        ),
+        Resource(
+            'posts', lambda: BlogPost.objects.filter(is_live=True), POST_FIELDS,
+            ('id', 'title', 'slug', 'category', 'excerpt', 'featured_image', 'publish_date', 'url'),
+            updated_field='updated_at', filters={'category': 'category__slug'},
+        ),
+        # No updated_at column: the ETag covers the columns shown
+        Resource(
+            'post-categories', lambda: BlogCategory.objects.all(), POST_CATEGORY_FIELDS,
+            ('id', 'name', 'slug', 'description'),
+        ),
+    )
+}
@@ -0,0 +1,79 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from products.models import Product
+from products.tests import create_catalog
+
+
+class ProductApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog()
+
+    def get(self, url, params=None, **headers):
+        return self.client.get(url, params or {}, secure=True, headers=headers)
+
+    def page(self, response):
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_sparse_fieldset_loads_only_those_columns(self):
+        with self.assertNumQueries(2) as queries:  # the page's keys, then its columns
+            data = self.page(self.get(reverse('api:products-list'), {'fields': 'name,purity', 'limit': 3}))
+        self.assertEqual(set(data['data'][0]), {'name', 'purity'})
+        self.assertNotIn('description', queries.captured_queries[-1]['sql'])
+
+    def test_cursor_pagination_walks_every_row(self):
+        names, url, params = [], reverse('api:products-list'), {'fields': 'name', 'limit': 4}
+        while url:
+            data = self.page(self.get(url, params))
+            names += [row['name'] for row in data['data']]
+            url, params = data['next'], None
+        self.assertEqual(sorted(names), sorted(Product.objects.values_list('name', flat=True)))
+        self.assertEqual(len(names), 10)
+
+    def test_etag_revalidation(self):
+        url = reverse('api:products-list')
+        etag = self.get(url)['ETag']
+        self.assertEqual(self.get(url, If_None_Match=etag).status_code, 304)
+
+        product = Product.objects.order_by('pk').first()
+        product.purity = '98%'
+        product.save()
+        self.assertEqual(self.get(url, If_None_Match=etag).status_code, 200)
+
+    def test_etag_follows_content_not_cache_versions(self):
+        from django.core.cache import cache
+
+        from products.models import ProductCategory
+
+        url = reverse('api:products-list')
+        params = {'fields': 'name,category_name'}
+        etag = self.get(url, params)['ETag']
+        cache.clear()  # another worker, or a restarted cache, has other version numbers
+        self.assertEqual(self.get(url, params)['ETag'], etag)
+        self.assertEqual(self.get(url, params, If_None_Match=etag).status_code, 304)
+
+        # The products' rows are untouched, but the page shows the category's name
+        ProductCategory.objects.filter(slug='basmati-rice').update(name='Basmati')
+        self.assertEqual(self.get(url, params, If_None_Match=etag).status_code, 200)
+
+        product = Product.objects.first()
+        detail = reverse('api:products-detail', args=[product.slug])
+        etag = self.get(detail)['ETag']
+        cache.clear()
+        self.assertEqual(self.get(detail, If_None_Match=etag).status_code, 304)
+        Product.objects.filter(pk=product.pk).update(name='Renamed')
+        self.assertEqual(self.get(detail, If_None_Match=etag).status_code, 200)
+
+    def test_detail_and_errors(self):
+        product = Product.objects.first()
+        response = self.get(reverse('api:products-detail', args=[product.slug]), {'fields': 'name,category_name'})
+        self.assertEqual(response.json(), {'name': product.name, 'category_name': product.category.name})
+        self.assertTrue(response['ETag'].startswith('"'))
+
+        self.assertEqual(self.get(reverse('api:products-detail', args=['missing'])).status_code, 404)
+        self.assertEqual(self.get(reverse('api:products-list'), {'fields': 'password'}).status_code, 400)
+        self.assertEqual(self.get(reverse('api:products-list'), {'cursor': '!!'}).status_code, 400)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.urls import path
+
+from . import views
+from .resources import RESOURCES
+
+app_name = 'api'
+
+# The ASGI entry point serves the async variants (see prime_impex/asgi.py)
+if settings.ASYNC_VIEWS:
+    resource_list, resource_detail = views.resource_list_async, views.resource_detail_async
+else:
+    resource_list, resource_detail = views.resource_list, views.resource_detail
+
+urlpatterns = []
+for name in RESOURCES:
+    urlpatterns += [
+        path(f'v1/{name}/', resource_list, {'resource': name}, name=f'{name}-list'),
+        path(f'v1/{name}/<slug:slug>/', resource_detail, {'resource': name}, name=f'{name}-detail'),
+    ]
@@ -0,0 +1,217 @@
+"""
+Read-only JSON API, version 1.
+
+    GET /api/v1/<resource>/?fields=name,slug&limit=100&cursor=...
+    GET /api/v1/<resource>/<slug>/?fields=...
+
+Lists are keyset-paginated by primary key: each page carries an opaque
+`next` cursor (null on the last page), so deep pages cost the same as the
+first and rows added meanwhile are neither skipped nor repeated.
+
+Every response has a strong ETag built from what it shows, so every worker
+gives the same one. For a list that is the requested fields and the keys of
+the rows on the page: (pk, updated_at, any joined columns requested), see
+Resource.etag_columns(). A list is answered in two steps: a narrow query for
+those keys, which is enough to answer If-None-Match with a 304, then the
+selected columns, streamed out row by row instead of building the page in
+memory. A detail response's ETag is a digest of its body.
+"""
+import base64
+import binascii
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+
+from .resources import RESOURCES
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+CHUNK_SIZE = 200
+CACHE_CONTROL = 'public, max-age=60'
+
+
+class ApiError(Exception):
+    pass
+
+
+def error_response(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def parse_fields(resource, request):
+    value = request.GET.get('fields')
+    if not value:
+        return resource.default_fields
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in resource.fields]
+    if unknown:
+        raise ApiError(f'Unknown field(s): {", ".join(unknown)}. Available: {", ".join(resource.fields)}')
+    return fields
+
+
+def parse_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def encode_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(request):
+    cursor = request.GET.get('cursor')
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError('Invalid cursor')
+
+
+def parse_list_request(resource, request):
+    return parse_fields(resource, request), parse_limit(request), decode_cursor(request)
+
+
+def keys_query(resource, request, fields, limit, after):
+    """ETag keys of the page's rows, pk first, plus one row to tell whether there's a next page"""
+    queryset = resource.get_queryset(request.GET).order_by('pk')
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    return queryset.values_list(*resource.etag_columns(fields))[:limit + 1]
+
+
+def make_etag(resource, fields, keys):
+    digest = hashlib.sha256(f'{resource.name}|{",".join(fields)}'.encode())
+    for key in keys:
+        digest.update(repr(key).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def next_url(request, keys, limit):
+    if len(keys) <= limit:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = encode_cursor(keys[limit - 1][0])
+    return f'{request.path}?{params.urlencode()}'
+
+
+def page_query(resource, fields, keys):
+    pks = [key[0] for key in keys]
+    return resource.projection(resource.queryset().filter(pk__in=pks), fields).order_by('pk')
+
+
+def encode(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def page_start():
+    return '{"data":['
+
+
+def page_end(next_page):
+    return f'],"next":{encode(next_page)}}}'
+
+
+def stream_page(resource, fields, objects, next_page):
+    yield page_start()
+    for i, obj in enumerate(objects):
+        yield (',' if i else '') + encode(resource.serialize(obj, fields))
+    yield page_end(next_page)
+
+
+async def astream_page(resource, fields, objects, next_page):
+    yield page_start()
+    first = True
+    async for obj in objects:
+        yield ('' if first else ',') + encode(resource.serialize(obj, fields))
+        first = False
+    yield page_end(next_page)
+
+
+def finish(response, etag):
+    response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def streaming_json(content, etag):
+    return finish(StreamingHttpResponse(content, content_type='application/json'), etag)
+
+
+def resource_list(request, resource):
+    """A page of a resource's rows"""
+    resource = RESOURCES[resource]
+    try:
+        fields, limit, after = parse_list_request(resource, request)
+    except ApiError as e:
+        return error_response(str(e))
+
+    keys = list(keys_query(resource, request, fields, limit, after))
+    etag = make_etag(resource, fields, keys[:limit])
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return finish(not_modified, etag)
+
+    objects = page_query(resource, fields, keys[:limit]).iterator(chunk_size=CHUNK_SIZE)
+    return streaming_json(stream_page(resource, fields, objects, next_url(request, keys, limit)), etag)
+
+
+async def resource_list_async(request, resource):
+    """Async resource_list"""
+    resource = RESOURCES[resource]
+    try:
+        fields, limit, after = parse_list_request(resource, request)
+    except ApiError as e:
+        return error_response(str(e))
+
+    keys = [key async for key in keys_query(resource, request, fields, limit, after)]
+    etag = make_etag(resource, fields, keys[:limit])
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return finish(not_modified, etag)
+
+    objects = page_query(resource, fields, keys[:limit]).aiterator(chunk_size=CHUNK_SIZE)
+    return streaming_json(astream_page(resource, fields, objects, next_url(request, keys, limit)), etag)
+
+
+def detail_response(request, resource, fields, obj):
+    if obj is None:
+        return error_response('Not found', status=404)
+    body = encode(resource.serialize(obj, fields))
+    etag = make_etag(resource, fields, [body])
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return finish(not_modified, etag)
+    return finish(HttpResponse(body, content_type='application/json'), etag)
+
+
+def detail_query(resource, fields, slug):
+    return resource.projection(resource.queryset().filter(slug=slug), fields)
+
+
+def resource_detail(request, resource, slug):
+    """One row of a resource, by slug"""
+    resource = RESOURCES[resource]
+    try:
+        fields = parse_fields(resource, request)
+    except ApiError as e:
+        return error_response(str(e))
+    obj = detail_query(resource, fields, slug).first()
+    return detail_response(request, resource, fields, obj)
+
+
+async def resource_detail_async(request, resource, slug):
+    """Async resource_detail"""
+    resource = RESOURCES[resource]
+    try:
+        fields = parse_fields(resource, request)
+    except ApiError as e:
+        return error_response(str(e))
+    obj = await detail_query(resource, fields, slug).afirst()
+    return detail_response(request, resource, fields, obj)
@@ -10,9 +10,9 @@ class BlogCategoryAdmin(admin.ModelAdmin):
 
 @admin.register(BlogPost)
 class BlogPostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'category', 'author', 'is_published', 'is_featured', 'publish_date', 'views_count']
+    list_display = ['title', 'category', 'author', 'is_published', 'is_live', 'is_featured', 'publish_date', 'views_count']
     list_editable = ['is_published', 'is_featured']
-    list_filter = ['category', 'is_published', 'is_featured', 'publish_date']
+    list_filter = ['category', 'is_published', 'is_live', 'is_featured', 'publish_date']
     search_fields = ['title', 'content', 'excerpt']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'publish_date'
@@ -29,12 +29,12 @@ class BlogPostAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Publishing', {
-            'fields': ('is_published', 'is_featured', 'publish_date')
+            'fields': ('is_published', 'is_featured', 'publish_date', 'is_live')
         }),
         ('Statistics', {
-            'fields': ('views_count',),
+            'fields': ('views_count', 'word_count', 'reading_time'),
             'classes': ('collapse',)
         }),
     )
     
-    readonly_fields = ['views_count']
+    readonly_fields = ['views_count', 'is_live', 'word_count', 'reading_time']
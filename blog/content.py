@@ -0,0 +1,226 @@
+"""
+Save-time processing of BlogPost.content.
+
+The admin stores raw HTML in BlogPost.content; BlogPost.save() runs it
+through render_content() and stores the result, which the detail page
+renders verbatim. Processing:
+
+- sanitizes against an allowlist of tags and attributes (scripts, styles,
+  event handlers and javascript: URLs are dropped, unclosed tags closed);
+- gives <h2>/<h3> headings ids and collects them as a table of contents;
+- adds loading/decoding to every <img>, and for images in MEDIA_ROOT their
+  width/height and a srcset of resized WebP variants, generated on first
+  use next to the original as <name>-<width>.webp;
+- counts words for the reading time.
+"""
+import math
+import posixpath
+import re
+from collections import namedtuple
+from html import escape
+from html.parser import HTMLParser
+from io import BytesIO
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+
+from prime_impex.storage import save_variants
+
+WORDS_PER_MINUTE = 200
+VARIANT_WIDTHS = (480, 800, 1200)
+IMAGE_SIZES = '(max-width: 800px) 100vw, 800px'
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'code', 'div', 'em', 'figcaption', 'figure',
+    'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 's', 'small', 'span',
+    'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Starting one of these ends an open <p>, as in the browser's parser
+BLOCK_TAGS = {
+    'blockquote', 'div', 'figure', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'ol', 'p', 'pre', 'table', 'ul',
+}
+# Dropped together with everything inside them
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'svg', 'math'}
+# Tags that end an open sibling of these kinds (<li>a<li>b)
+IMPLIED_ENDS = {'li': {'li'}, 'td': {'td', 'th'}, 'th': {'td', 'th'}, 'tr': {'tr', 'td', 'th'}}
+ALLOWED_ATTRS = {
+    '*': {'class', 'title'},
+    'a': {'href', 'target'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start'},
+}
+URL_ATTRS = {'href', 'src'}
+URL_SCHEMES = {'', 'http', 'https', 'mailto', 'tel'}
+TOC_LEVELS = {'h2', 'h3'}
+
+_CONTROL = re.compile(r'[\x00-\x20\x7f]+')
+_WORD = re.compile(r'\w+')
+
+RenderedContent = namedtuple('RenderedContent', 'html toc word_count reading_time')
+
+
+def safe_url(url):
+    # Browsers ignore whitespace and control characters inside a scheme ("java\tscript:")
+    try:
+        scheme = urlsplit(_CONTROL.sub('', url)).scheme.lower()
+    except ValueError:
+        return False
+    return scheme in URL_SCHEMES
+
+
+def media_name(src):
+    """Storage name of a /media/ URL, or None for anything else"""
+    path = urlsplit(src).path
+    if urlsplit(src).netloc or not path.startswith(settings.MEDIA_URL):
+        return None
+    name = posixpath.normpath(unquote(path[len(settings.MEDIA_URL):]))
+    if name.startswith(('..', '/')):
+        return None
+    return name
+
+
+def image_attrs(src):
+    """width, height, srcset and sizes for a media image; {} when it can't be read"""
+    name = media_name(src)
+    if name is None:
+        return {}
+    try:
+        from PIL import Image
+    except ImportError:
+        return {}
+    try:
+        with default_storage.open(name) as f:
+            image = Image.open(BytesIO(f.read()))
+            image.load()
+    except Exception:
+        return {}
+
+    width, height = image.size
+    attrs = {'width': str(width), 'height': str(height)}
+    srcset = [
+        f'{default_storage.url(variant)} {variant_width}w'
+        for variant, variant_width in save_variants(name, image, VARIANT_WIDTHS)
+    ]
+    if srcset:
+        srcset.append(f'{src} {width}w')
+        attrs['srcset'] = ', '.join(srcset)
+        attrs['sizes'] = IMAGE_SIZES
+    return attrs
+
+
+class ContentRenderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.dropping = 0  # depth inside DROPPED_TAGS
+        self.words = 0
+        self.toc = []
+        self.anchors = set()
+        self.heading = None  # (tag, index of its start tag in out, text parts)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            if tag not in VOID_TAGS:
+                self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+
+        if tag in BLOCK_TAGS and 'p' in self.open_tags:
+            self.handle_endtag('p')
+        while self.open_tags and self.open_tags[-1] in IMPLIED_ENDS.get(tag, ()):
+            self.close_tag(self.open_tags.pop())
+
+        allowed = ALLOWED_ATTRS['*'] | ALLOWED_ATTRS.get(tag, set())
+        kept = {}
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRS and not safe_url(value):
+                continue
+            kept[name] = value
+        if tag == 'a' and kept.get('target') == '_blank':
+            kept['rel'] = 'noopener noreferrer'
+        if tag == 'img':
+            if 'src' not in kept:
+                return
+            kept.update(image_attrs(kept['src']))
+            kept['loading'] = 'lazy'
+            kept['decoding'] = 'async'
+
+        self.out.append(self.format_tag(tag, kept))
+        if tag in VOID_TAGS:
+            return
+        if tag in TOC_LEVELS and self.heading is None:
+            self.heading = (tag, len(self.out) - 1, [])
+        self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+        # Close anything left open inside this element
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.close_tag(open_tag)
+            if open_tag == tag:
+                break
+
+    def close_tag(self, tag):
+        self.out.append(f'</{tag}>')
+        if self.heading is not None and self.heading[0] == tag:
+            tag, index, parts = self.heading
+            self.heading = None
+            text = ' '.join(''.join(parts).split())
+            anchor = self.unique_anchor(slugify(text) or 'section')
+            self.out[index] = self.out[index].replace(f'<{tag}', f'<{tag} id="{anchor}"', 1)
+            self.toc.append({'level': int(tag[1]), 'id': anchor, 'text': text})
+
+    def unique_anchor(self, anchor):
+        candidate, n = anchor, 1
+        while candidate in self.anchors:
+            n += 1
+            candidate = f'{anchor}-{n}'
+        self.anchors.add(candidate)
+        return candidate
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.words += len(_WORD.findall(data))
+        if self.heading is not None:
+            self.heading[2].append(data)
+        self.out.append(escape(data, quote=False))
+
+    @staticmethod
+    def format_tag(tag, attrs):
+        rendered = ''.join(f' {name}="{escape(value)}"' for name, value in attrs.items())
+        return f'<{tag}{rendered}>'
+
+    def render(self, html):
+        self.feed(html)
+        self.close()
+        while self.open_tags:
+            self.close_tag(self.open_tags.pop())
+        return ''.join(self.out)
+
+
+def render_content(html):
+    """Process raw post HTML; returns RenderedContent(html, toc, word_count, reading_time)"""
+    renderer = ContentRenderer()
+    rendered = renderer.render(html or '')
+    reading_time = max(1, math.ceil(renderer.words / WORDS_PER_MINUTE)) if renderer.words else 0
+    return RenderedContent(rendered, renderer.toc, renderer.words, reading_time)
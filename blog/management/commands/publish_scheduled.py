@@ -0,0 +1,84 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from blog.models import BlogPost
+from blog.related import refresh
+from prime_impex.versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+
+def publish_due(now=None):
+    """Make scheduled posts whose publish_date has passed live; returns how many"""
+    now = now or timezone.now()
+    due = list(
+        BlogPost.objects.filter(is_published=True, is_live=False, publish_date__lte=now).values_list('pk', flat=True)
+    )
+    count = BlogPost.objects.filter(pk__in=due).update(is_live=True)
+    if count:
+        bump_version('blog')
+        # update() sends no signals, and this is a background process already
+        refresh(due)
+    return count
+
+
+def next_due():
+    return (
+        BlogPost.objects.filter(is_published=True, is_live=False, publish_date__isnull=False)
+        .order_by('publish_date')
+        .values_list('publish_date', flat=True)
+        .first()
+    )
+
+
+def cache_is_shared():
+    """
+    Whether the web workers see this process's version bumps. A LocMemCache
+    lives in each process, so their cached pages only catch up on expiry.
+    """
+    return not settings.CACHES['default']['BACKEND'].endswith('.LocMemCache')
+
+
+def listing_delay():
+    """Longest TTL of a cached page that lists posts, in seconds"""
+    return max(
+        (route['ttl'] for route in settings.PAGE_CACHE_ROUTES.values() if 'blog' in route['versions']), default=0
+    )
+
+
+class Command(BaseCommand):
+    help = 'Make scheduled blog posts live once their publish_date passes (run once, from cron, or with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='keep running, waking up for each scheduled post')
+        parser.add_argument(
+            '--interval', type=int, default=60,
+            help='longest sleep in seconds with --loop, so posts scheduled meanwhile are picked up',
+        )
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            # Still worth running: posts go live at once, and listings catch up as their pages expire
+            logger.warning(
+                'No cache shared with the web workers (set REDIS_URL): published posts can take up to %d '
+                'seconds to appear on cached listings', listing_delay(),
+            )
+        while True:
+            count = publish_due()
+            if count:
+                logger.info('Published %d scheduled post(s)', count, extra={'published': count})
+            if not options['loop']:
+                self.stdout.write(f'Published {count} scheduled post(s)')
+                return
+
+            upcoming = next_due()
+            wait = options['interval']
+            if upcoming is not None:
+                wait = min(wait, max(1, (upcoming - timezone.now()).total_seconds()))
+            close_old_connections()
+            time.sleep(wait)
@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.related import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute related posts for every live post from scratch (edits are picked up incrementally)'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild()
+        self.stdout.write(f'Scored {count} posts in {time.perf_counter() - start:.1f}s')
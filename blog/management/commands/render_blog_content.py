@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import BlogPost
+from prime_impex.versions import bump_version
+
+FIELDS = ['content_html', 'toc', 'word_count', 'reading_time']
+
+
+class Command(BaseCommand):
+    help = 'Store the rendered content_html, toc and reading time of blog posts saved before they existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--after', type=int, default=0, help='Resume after this id (printed as the run goes)')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-render every post, e.g. after changing blog/content.py; by default only posts never rendered',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = BlogPost.objects.order_by('pk').only('pk', 'content')
+        if not options['all']:
+            posts = posts.filter(content_html='').exclude(content='')
+
+        last, rendered = options['after'], 0
+        # Keyset pagination: one batch of posts (and their images) in memory at a time
+        while chunk := list(posts.filter(pk__gt=last)[:batch_size]):
+            for post in chunk:
+                post.render_content()
+            with transaction.atomic():
+                BlogPost.objects.bulk_update(chunk, FIELDS)
+            last = chunk[-1].pk
+            rendered += len(chunk)
+            self.stdout.write(f'\r  {rendered} posts rendered (last id {last})', ending='')
+            self.stdout.flush()
+        if rendered:
+            bump_version('blog')  # bulk_update() sends no post_save
+        self.stdout.write('')
+        self.stdout.write(f'Rendered {rendered} posts')
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_is_live(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    # Published posts without a date were shown on the home page and detail
+    # pages; date them so they stay visible
+    BlogPost.objects.filter(is_published=True, publish_date__isnull=True).update(publish_date=F('created_at'))
+    BlogPost.objects.filter(is_published=True, publish_date__lte=timezone.now()).update(is_live=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='is_live',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_is_live, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='publish_date',
+            field=models.DateTimeField(blank=True, help_text='Leave empty to publish now; a future date schedules the post', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['is_live', '-publish_date', '-created_at'], name='blog_live_recent_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from asgiref.sync import sync_to_async
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 
@@ -22,6 +24,15 @@ class BlogCategory(models.Model):
         return self.name
 
 
+class BlogPostQuerySet(models.QuerySet):
+    # What a post card shows; content is left out
+    CARD_FIELDS = ('title', 'slug', 'category', 'excerpt', 'featured_image', 'publish_date', 'category__name')
+
+    def cards(self):
+        """Posts for list cards, with their category joined in"""
+        return self.select_related('category').only(*self.CARD_FIELDS)
+
+
 class BlogPost(models.Model):
     """Blog posts for SEO and company updates"""
     
@@ -35,6 +46,11 @@ class BlogPost(models.Model):
     excerpt = models.CharField(max_length=300, help_text="Short preview text")
     content = models.TextField(help_text="Full blog content (supports HTML)")
     featured_image = models.ImageField(upload_to='blog/', help_text="Main blog image")
+    # Derived from content by save(); see blog/content.py
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Minutes")
     
     # SEO
     meta_title = models.CharField(max_length=200, blank=True)
@@ -44,15 +60,23 @@ class BlogPost(models.Model):
     # Status
     is_published = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False, help_text="Show on homepage")
-    publish_date = models.DateTimeField(null=True, blank=True)
+    publish_date = models.DateTimeField(null=True, blank=True, help_text="Leave empty to publish now; a future date schedules the post")
+    # Published and past its publish_date. Kept by save() and the publish_scheduled
+    # command, so public queries filter on a flag instead of now()
+    is_live = models.BooleanField(default=False, editable=False)
     views_count = models.IntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BlogPostQuerySet.as_manager()
+
     class Meta:
         ordering = ['-publish_date', '-created_at']
+        indexes = [
+            models.Index(fields=['is_live', '-publish_date', '-created_at'], name='blog_live_recent_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -61,8 +85,43 @@ class BlogPost(models.Model):
             self.meta_title = f"{self.title} - Prime Impex Blog"
         if not self.meta_description:
             self.meta_description = self.excerpt
+        if self.is_published and not self.publish_date:
+            self.publish_date = timezone.now()
+        self.is_live = self.is_published and self.publish_date <= timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'content_html', 'toc', 'word_count', 'reading_time'}
         super().save(*args, **kwargs)
 
+    def render_content(self):
+        """Refresh the fields derived from content"""
+        from .content import render_content
+
+        self.content_html, self.toc, self.word_count, self.reading_time = render_content(self.content)
+
+    def ensure_rendered(self):
+        """
+        Render and store content_html for a post saved before it existed
+        (migration 0003 only adds the column), on its first view
+        """
+        if self.content_html:
+            return
+        self.refresh_from_db(fields=['content'])
+        if not self.content:
+            return
+        self.render_content()
+        # update(): no post_save and no new updated_at, as the content didn't change
+        BlogPost.objects.filter(pk=self.pk).update(
+            content_html=self.content_html, toc=self.toc, word_count=self.word_count, reading_time=self.reading_time,
+        )
+
+    async def aensure_rendered(self):
+        """Async version of ensure_rendered(); rendering reads images, so it runs in a thread"""
+        if not self.content_html:
+            await sync_to_async(self.ensure_rendered)()
+
     def __str__(self):
         return self.title
 
@@ -70,3 +129,25 @@ class BlogPost(models.Model):
         """Increment view count"""
         self.views_count += 1
         self.save(update_fields=['views_count'])
+
+    async def aincrement_views(self):
+        """Async version of increment_views()"""
+        self.views_count += 1
+        await self.asave(update_fields=['views_count'])
+
+
+class RelatedPost(models.Model):
+    """A post's nearest neighbours by content, maintained by blog/related.py"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='linked_from')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='blog_relatedpost_post_rank'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} -> {self.related_id} ({self.score:.3f})'
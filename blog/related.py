@@ -0,0 +1,252 @@
+"""
+Related posts by content similarity, precomputed into the RelatedPost table.
+
+Each live post becomes a TF-IDF vector over the words of its title, excerpt
+and rendered content (title and excerpt weighted up), kept sparse as a
+{term: weight} dict and L2-normalised, so a dot product is the cosine
+similarity. Neighbours come from an inverted index: a post is scored
+against every other post by walking the postings of its terms, never
+touching pairs without a shared term. Terms in most posts and postings
+beyond the strongest MAX_POSTINGS are dropped; they cost the most and
+decide the least.
+
+rebuild() recomputes the whole table (manage.py rebuild_related_posts).
+After a post is saved or deleted, blog/signals.py schedules refresh() for
+it in a background thread; posts saved while one runs are refreshed
+together by the next. A refresh loads a CorpusIndex (term counts, document
+frequencies, vectors, postings) and drops it once it has scored, so no
+process keeps the corpus in memory between refreshes. It rescores only the
+changed posts and the posts whose neighbour lists they enter or leave;
+other posts keep neighbours scored with an older corpus's IDF weights until
+the next rebuild, which is worth running nightly.
+"""
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import connections, transaction
+from django.utils.html import strip_tags
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 3
+MAX_TERMS = 32  # strongest terms kept per post
+MAX_POSTINGS = 500  # strongest posts kept per term
+MAX_DF = 0.5  # terms in more than this share of posts are ignored
+FIELD_WEIGHTS = (('title', 3), ('excerpt', 2), ('content_html', 1))
+
+WORD = re.compile(r'[^\W\d_]{3,}')
+STOPWORDS = frozenset("""
+    about above after again also among and any are because been before being below between both but can
+    could did does doing down during each few for from further had has have having her here hers him his
+    how into its just more most much must not now off once only other our ours out over own same she
+    should some such than that the their theirs them then there these they this those through too under
+    until very was were what when where which while who whom why will with would you your yours
+""".split())
+
+
+def terms(text):
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def term_counts(post):
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        text = post[field]
+        if field == 'content_html':
+            text = strip_tags(text)
+        for term in terms(text):
+            counts[term] += weight
+    return counts
+
+
+class CorpusIndex:
+    """
+    Term counts, document frequencies, vectors and postings of the live
+    posts, loaded by rebuild() and refresh() for one scoring run
+    """
+
+    def __init__(self):
+        self.counts = {}  # post_id -> Counter of terms
+        self.df = Counter()
+        self.vectors = {}  # post_id -> {term: weight}
+        self.postings = defaultdict(dict)  # term -> {post_id: weight}
+        self._strongest = {}  # term -> its MAX_POSTINGS strongest (weight, post_id)
+
+    @classmethod
+    def load(cls):
+        from .models import BlogPost
+
+        index = cls()
+        posts = BlogPost.objects.filter(is_live=True).values('id', 'title', 'excerpt', 'content_html')
+        for post in posts.iterator(chunk_size=2000):
+            index.counts[post['id']] = counts = term_counts(post)
+            index.df.update(counts.keys())
+        for post_id, counts in index.counts.items():
+            index._set_vector(post_id, counts)
+        return index
+
+    def idf(self, term):
+        total = len(self.counts)
+        n = self.df[term]
+        if n <= 1 or n > max(2, total * MAX_DF):
+            return None
+        return math.log(total / n)
+
+    def _set_vector(self, post_id, counts):
+        weights = []
+        for term, count in counts.items():
+            idf = self.idf(term)
+            if idf is not None:
+                weights.append((term, (1 + math.log(count)) * idf))
+        weights = heapq.nlargest(MAX_TERMS, weights, key=lambda item: item[1])
+        norm = math.sqrt(sum(weight * weight for _, weight in weights))
+        if norm:
+            self.vectors[post_id] = vector = {term: weight / norm for term, weight in weights}
+            for term, weight in vector.items():
+                self.postings[term][post_id] = weight
+                self._strongest.pop(term, None)
+
+    def remove(self, post_id):
+        counts = self.counts.pop(post_id, None)
+        if counts is not None:
+            self.df.subtract(counts.keys())
+        for term in self.vectors.pop(post_id, {}):
+            self.postings[term].pop(post_id, None)
+            self._strongest.pop(term, None)
+
+    def entries(self, term):
+        """(weight, post_id) postings of a term, the strongest MAX_POSTINGS of them"""
+        if term not in self._strongest:
+            entries = [(weight, post_id) for post_id, weight in self.postings.get(term, {}).items()]
+            self._strongest[term] = heapq.nlargest(MAX_POSTINGS, entries) if len(entries) > MAX_POSTINGS else entries
+        return self._strongest[term]
+
+
+def neighbours(post_ids, index, k=TOP_K):
+    """{post_id: [(score, neighbour_id), ...]} for the given posts, best first"""
+    result = {}
+    for post_id in post_ids:
+        vector = index.vectors.get(post_id)
+        if vector is None:
+            continue
+        scores = defaultdict(float)
+        for term, weight in vector.items():
+            for other_weight, other_id in index.entries(term):
+                scores[other_id] += weight * other_weight
+        scores.pop(post_id, None)
+        result[post_id] = heapq.nlargest(k, ((score, other_id) for other_id, score in scores.items()))
+    return result
+
+
+def save_neighbours(found):
+    from .models import RelatedPost
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=list(found)).delete()
+        RelatedPost.objects.bulk_create(
+            [
+                RelatedPost(post_id=post_id, related_id=other_id, score=score, rank=rank)
+                for post_id, ranked in found.items()
+                for rank, (score, other_id) in enumerate(ranked)
+            ],
+            batch_size=1000,
+        )
+
+
+def rebuild():
+    """Recompute related posts for every live post; returns how many posts were scored"""
+    from .models import RelatedPost
+
+    index = CorpusIndex.load()
+    found = neighbours(list(index.vectors), index)
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        save_neighbours(found)
+    return len(found)
+
+
+def refresh(changed_ids):
+    """
+    Update the table after the posts in `changed_ids` were edited, published,
+    unpublished or deleted. Those posts are rescored, and so are posts that
+    list one of them or that one of them now beats the weakest neighbour of.
+    """
+    return _refresh(CorpusIndex.load(), set(changed_ids))
+
+
+def chunks(ids, size=900):
+    """`ids` in lists short enough for an IN (...) under SQLite's bound-parameter limit"""
+    ids = list(ids)
+    return (ids[start:start + size] for start in range(0, len(ids), size))
+
+
+def _refresh(index, changed_ids):
+    from .models import BlogPost, RelatedPost
+
+    affected = set(changed_ids)
+    affected.update(RelatedPost.objects.filter(related_id__in=changed_ids).values_list('post_id', flat=True))
+    # Scoring a changed post against everything gives its row of the similarity matrix
+    candidates = defaultdict(float)
+    for ranked in neighbours(changed_ids, index, k=len(index.vectors)).values():
+        for score, other_id in ranked:
+            candidates[other_id] = max(score, candidates[other_id])
+    candidates = {post_id: score for post_id, score in candidates.items() if post_id not in affected}
+    weakest, counts = {}, Counter()
+    for ids in chunks(candidates):
+        for post_id, score in RelatedPost.objects.filter(post_id__in=ids).values_list('post_id', 'score'):
+            weakest[post_id] = min(score, weakest.get(post_id, score))
+            counts[post_id] += 1
+    affected.update(
+        post_id for post_id, score in candidates.items()
+        if counts[post_id] < TOP_K or score > weakest[post_id]
+    )
+
+    found = neighbours(affected, index)
+    # Drop neighbours deleted by another process since the index was loaded
+    linked = {other_id for ranked in found.values() for _, other_id in ranked}
+    live = BlogPost.objects.filter(is_live=True)
+    gone = linked.difference(*(live.filter(pk__in=ids).values_list('pk', flat=True) for ids in chunks(linked)))
+    if gone:
+        for post_id in gone:
+            index.remove(post_id)
+        found = neighbours(affected, index)
+    # Posts no longer live (or deleted) keep no rows
+    found.update({post_id: [] for post_id in affected if post_id not in found})
+    save_neighbours(found)
+    return len(affected)
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='related-posts')
+_pending = set()  # changed posts no background refresh has taken yet
+_pending_lock = threading.Lock()
+
+
+def _refresh_in_background():
+    with _pending_lock:
+        changed_ids = set(_pending)
+        _pending.clear()
+    if not changed_ids:
+        return  # taken by the refresh before
+    try:
+        refresh(changed_ids)
+    except Exception:
+        logger.exception('Refreshing related posts failed', extra={'posts': sorted(changed_ids)})
+    finally:
+        connections.close_all()
+
+
+def _submit(changed_ids):
+    with _pending_lock:
+        _pending.update(changed_ids)
+    _executor.submit(_refresh_in_background)
+
+
+def schedule_refresh(changed_ids):
+    """Refresh related posts in the background once the current transaction commits"""
+    transaction.on_commit(partial(_submit, set(changed_ids)))
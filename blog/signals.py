@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from prime_impex.versions import bump_version
+
+from .models import BlogCategory, BlogPost, RelatedPost
+from .related import schedule_refresh
+
+
+def is_view_count(update_fields):
+    return update_fields is not None and set(update_fields) <= {'views_count'}
+
+
+@receiver([post_save, post_delete], sender=BlogPost)
+@receiver([post_save, post_delete], sender=BlogCategory)
+def blog_changed(sender, update_fields=None, **kwargs):
+    """Orphan everything cached from the blog"""
+    if is_view_count(update_fields):
+        # A page view, not an edit
+        return
+    bump_version('blog')
+
+
+@receiver(post_save, sender=BlogPost)
+def post_saved(sender, instance, update_fields=None, **kwargs):
+    if not is_view_count(update_fields):
+        schedule_refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=BlogPost)
+def post_deleting(sender, instance, **kwargs):
+    # The rows pointing at this post are cascade-deleted before post_delete
+    instance._linked_from = list(RelatedPost.objects.filter(related=instance).values_list('post_id', flat=True))
+
+
+@receiver(post_delete, sender=BlogPost)
+def post_deleted(sender, instance, **kwargs):
+    schedule_refresh([instance.pk, *getattr(instance, '_linked_from', ())])
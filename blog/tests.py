@@ -1,3 +1,312 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from prime_impex.versions import get_version
+
+from . import related
+from .models import BlogCategory, BlogPost, RelatedPost
+
+
+def create_posts():
+    """Two categories of four live posts each"""
+    for name in ('Market Trends', 'Export Guides'):
+        category = BlogCategory.objects.create(name=name)
+        for i in range(4):
+            BlogPost.objects.create(
+                title=f'{name} {i}',
+                category=category,
+                excerpt='Rice export news.',
+                content='<p>Rice export news.</p>',
+                featured_image='blog/rice.jpg',
+                is_published=True,
+            )
+
+
+class BlogViewQueryTests(TestCase):
+    """
+    The test runner sets NPLUSONE_DETECTION = 'raise', so a page that loads
+    a relation per row fails these with NPlusOneError.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        create_posts()
+
+    def test_blog_list(self):
+        response = self.client.get(reverse('blog:blog_list'), secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    def test_blog_detail_with_related_posts(self):
+        post = BlogPost.objects.filter(category__slug='market-trends').first()
+        response = self.client.get(reverse('blog:blog_detail', args=[post.slug]), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['related_posts']), 3)
+
+    def test_home_latest_posts(self):
+        response = self.client.get(reverse('home'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['latest_posts']), 3)
+        self.assertIn('content', response.context['latest_posts'][0].get_deferred_fields())
+
+
+class AsyncViewTests(TestCase):
+    """The async views, as the ASGI entry point routes to them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_posts()
+
+    def setUp(self):
+        from prime_impex.test_runner import use_async_views
+
+        use_async_views(self)
+
+    async def get(self, url, **params):
+        response = await self.async_client.get(url, params, secure=True)
+        if response.status_code == 200:
+            self.assertTrue(response.resolver_match.func.__name__.endswith('_async'))
+        return response
+
+    async def test_blog_list(self):
+        response = await self.get(reverse('blog:blog_list'))
+        self.assertEqual(len(response.context['page_obj']), 8)
+        response = await self.get(reverse('blog:blog_list'), category='export-guides')
+        self.assertEqual([post.title for post in response.context['page_obj']][-1], 'Export Guides 0')
+        self.assertEqual((await self.get(reverse('blog:blog_list'), category='nope')).status_code, 404)
+
+    async def test_blog_detail(self):
+        post = await BlogPost.objects.filter(category__slug='market-trends').afirst()
+        response = await self.get(reverse('blog:blog_detail', args=[post.slug]))
+        self.assertContains(response, post.title)
+        self.assertEqual(len(response.context['related_posts']), 3)
+        await post.arefresh_from_db()
+        self.assertEqual(post.views_count, 1)
+        await BlogPost.objects.filter(pk=post.pk).aupdate(is_live=False)
+        self.assertEqual((await self.get(reverse('blog:blog_detail', args=[post.slug]))).status_code, 404)
+
+    async def test_home(self):
+        response = await self.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['latest_posts']), 3)
+
+
+class ScheduledPublishingTests(TestCase):
+    def setUp(self):
+        category = BlogCategory.objects.create(name='Market Trends')
+        self.post = BlogPost.objects.create(
+            title='Upcoming Harvest Report',
+            category=category,
+            excerpt='Harvest outlook.',
+            content='<p>Harvest outlook.</p>',
+            featured_image='blog/rice.jpg',
+            is_published=True,
+            publish_date=timezone.now() + timedelta(hours=1),
+        )
+
+    def test_scheduled_post_is_hidden(self):
+        self.assertFalse(self.post.is_live)
+        response = self.client.get(reverse('blog:blog_detail', args=[self.post.slug]), secure=True)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('home'), secure=True)
+        self.assertNotIn(self.post, response.context['latest_posts'])
+
+    def test_publish_scheduled_makes_due_posts_live(self):
+        with self.assertLogs('blog.management.commands.publish_scheduled', 'WARNING'):  # no shared cache
+            call_command('publish_scheduled', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.is_live)
+
+        BlogPost.objects.filter(pk=self.post.pk).update(publish_date=timezone.now() - timedelta(minutes=1))
+        version = get_version('blog')
+        with self.assertLogs('blog.management.commands.publish_scheduled', 'INFO'):
+            call_command('publish_scheduled', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.is_live)
+        self.assertNotEqual(get_version('blog'), version)
+        response = self.client.get(reverse('blog:blog_detail', args=[self.post.slug]), secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    def test_loop_runs_without_a_shared_cache(self):
+        from unittest import mock
+
+        class Stop(Exception):
+            pass
+
+        BlogPost.objects.filter(pk=self.post.pk).update(publish_date=timezone.now() - timedelta(minutes=1))
+        logger = 'blog.management.commands.publish_scheduled'
+        with self.assertLogs(logger, 'INFO') as logs, \
+                mock.patch(f'{logger}.time.sleep', side_effect=Stop), self.assertRaises(Stop):
+            call_command('publish_scheduled', loop=True, stdout=StringIO())
+        self.assertIn('up to 600 seconds', logs.output[0])
+        self.assertTrue(BlogPost.objects.get(pk=self.post.pk).is_live)
+
+
+class ContentRenderingTests(TestCase):
+    def test_save_stores_rendered_content(self):
+        post = BlogPost.objects.create(
+            title='Export Guide',
+            excerpt='How to export rice.',
+            content=(
+                '<h2>Paperwork</h2><p onclick="steal()">Certificates of origin<script>alert(1)</script>'
+                '<h3>Phytosanitary</h3><p><a href="javascript:alert(1)">link</a>'
+                '<img src="https://example.com/rice.jpg" alt="Rice"><h2>Paperwork</h2>'
+            ),
+            featured_image='blog/rice.jpg',
+        )
+        self.assertEqual(
+            post.content_html,
+            '<h2 id="paperwork">Paperwork</h2><p>Certificates of origin</p>'
+            '<h3 id="phytosanitary">Phytosanitary</h3><p><a>link</a>'
+            '<img src="https://example.com/rice.jpg" alt="Rice" loading="lazy" decoding="async"></p>'
+            '<h2 id="paperwork-2">Paperwork</h2>',
+        )
+        self.assertEqual([heading['id'] for heading in post.toc], ['paperwork', 'phytosanitary', 'paperwork-2'])
+        self.assertEqual(post.word_count, 7)
+        self.assertEqual(post.reading_time, 1)
+
+    def test_command_renders_posts_saved_before_rendering(self):
+        posts = [
+            BlogPost.objects.create(title=f'Guide {n}', excerpt='Guide.', content=f'<h2>Part {n}</h2>',
+                                    featured_image='blog/rice.jpg')
+            for n in range(3)
+        ]
+        BlogPost.objects.update(content_html='', toc=[], word_count=0, reading_time=0)
+        version = get_version('blog')
+        call_command('render_blog_content', batch_size=2, stdout=StringIO())
+        for n, post in enumerate(posts):
+            post.refresh_from_db()
+            self.assertEqual(post.content_html, f'<h2 id="part-{n}">Part {n}</h2>')
+            self.assertEqual((post.word_count, post.reading_time), (2, 1))
+        self.assertNotEqual(get_version('blog'), version)
+
+    def test_unrendered_post_is_rendered_on_first_view(self):
+        from prime_impex.test_runner import use_async_views
+
+        post = BlogPost.objects.create(title='Guide', excerpt='Guide.', content='<h2>Part one</h2>',
+                                       featured_image='blog/rice.jpg', is_published=True)
+        BlogPost.objects.filter(pk=post.pk).update(content_html='', toc=[], word_count=0, reading_time=0)
+        url = reverse('blog:blog_detail', args=[post.slug])
+        self.assertContains(self.client.get(url, secure=True), '<h2 id="part-one">Part one</h2>')
+        post.refresh_from_db()
+        self.assertEqual((post.content_html, post.word_count), ('<h2 id="part-one">Part one</h2>', 2))
+
+        BlogPost.objects.filter(pk=post.pk).update(content_html='')
+        use_async_views(self)
+        response = async_to_sync(self.async_client.get)(url, secure=True)
+        self.assertContains(response, '<h2 id="part-one">Part one</h2>')
+
+    def test_view_count_update_skips_rendering(self):
+        post = BlogPost.objects.create(title='Guide', excerpt='Guide.', content='<p>One two</p>', featured_image='blog/rice.jpg')
+        BlogPost.objects.filter(pk=post.pk).update(content_html='cached')
+        post.increment_views()
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, 'cached')
+
+    def test_media_images_get_dimensions_and_srcset(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            buffer = BytesIO()
+            Image.new('RGB', (1000, 500)).save(buffer, 'JPEG')
+            name = default_storage.save('blog/field.jpg', BytesIO(buffer.getvalue()))
+            stem = name.rsplit('.', 1)[0]
+            post = BlogPost.objects.create(
+                title='Fields', excerpt='Fields.', content=f'<img src="/media/{name}">', featured_image=name,
+            )
+            # Variants of a content-addressed original keep its hash in their names
+            self.assertTrue(default_storage.exists(f'{stem}-800.webp'))
+        self.assertIn('width="1000" height="500"', post.content_html)
+        self.assertIn(
+            f'srcset="/media/{stem}-480.webp 480w, /media/{stem}-800.webp 800w, /media/{name} 1000w"',
+            post.content_html,
+        )
+
+
+class RelatedPostTests(TestCase):
+    TOPICS = {
+        'Basmati Harvest Outlook': 'basmati harvest monsoon paddy yield punjab',
+        'Basmati Monsoon Update': 'basmati monsoon paddy harvest rainfall haryana',
+        'Paddy Yield Forecast': 'paddy yield harvest monsoon basmati sowing',
+        'Shipping Container Rates': 'container freight shipping port vessel',
+        'Freight Port Delays': 'freight port vessel container congestion',
+        'Letters of Credit': 'letters credit payment bank documents',
+    }
+
+    def setUp(self):
+        self.posts = {}
+        for title, words in self.TOPICS.items():
+            self.posts[title] = BlogPost.objects.create(
+                title=title,
+                excerpt='Market notes.',
+                content=f'<p>{words}</p>',
+                featured_image='blog/rice.jpg',
+                is_published=True,
+            )
+
+    def related_titles(self, title):
+        response = self.client.get(reverse('blog:blog_detail', args=[self.posts[title].slug]), secure=True)
+        return [post.title for post in response.context['related_posts']]
+
+    def test_rebuild_links_similar_posts(self):
+        call_command('rebuild_related_posts', stdout=StringIO())
+        with self.assertNumQueries(4):  # post, view count, related posts, footer categories
+            related = self.related_titles('Shipping Container Rates')
+        self.assertEqual(related[0], 'Freight Port Delays')
+        self.assertNotIn('Letters of Credit', related)
+        self.assertEqual(set(self.related_titles('Basmati Harvest Outlook')[:2]),
+                         {'Basmati Monsoon Update', 'Paddy Yield Forecast'})
+
+    def test_refresh_after_edit_and_unpublish(self):
+        call_command('rebuild_related_posts', stdout=StringIO())
+        letters = self.posts['Letters of Credit']
+        letters.content = '<p>container freight shipping port vessel credit</p>'
+        letters.save()
+        related.refresh([letters.pk])
+        self.assertIn('Letters of Credit', self.related_titles('Freight Port Delays'))
+
+        letters.is_published = False
+        letters.save()
+        related.refresh([letters.pk])
+        self.assertNotIn('Letters of Credit', self.related_titles('Freight Port Delays'))
+        self.assertFalse(RelatedPost.objects.filter(post=letters).exists())
+
+    def test_saves_made_before_a_refresh_starts_share_it(self):
+        from unittest import mock
+
+        call_command('rebuild_related_posts', stdout=StringIO())
+        letters = self.posts['Letters of Credit']
+        with mock.patch.object(related, '_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                letters.content = '<p>container freight shipping port vessel credit</p>'
+                letters.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                BlogPost.objects.create(
+                    title='Paddy Sowing Begins', excerpt='Market notes.', content='<p>paddy sowing monsoon punjab</p>',
+                    featured_image='blog/rice.jpg', is_published=True,
+                )
+        jobs = [call.args[0] for call in executor.submit.call_args_list]
+        self.assertEqual(len(jobs), 2)
+        with mock.patch.object(related.CorpusIndex, 'load', wraps=related.CorpusIndex.load) as load:
+            for job in jobs:  # the worker thread's queue, run here
+                job()
+        # One corpus load for both posts, and none kept by the module afterwards
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(related._pending, set())
+        self.assertFalse(any(isinstance(value, related.CorpusIndex) for value in vars(related).values()))
+        self.assertIn('Letters of Credit', self.related_titles('Freight Port Delays'))
+        self.assertIn('Paddy Sowing Begins', self.related_titles('Paddy Yield Forecast'))
+
+    def test_refresh_drops_deleted_posts(self):
+        call_command('rebuild_related_posts', stdout=StringIO())
+        freight = self.posts['Freight Port Delays']
+        BlogPost.objects.filter(pk=freight.pk).delete()
+        related.refresh([self.posts['Shipping Container Rates'].pk])
+        self.assertNotIn('Freight Port Delays', self.related_titles('Shipping Container Rates'))
@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'blog'
 
+# The ASGI entry point serves the async variants (see prime_impex/asgi.py)
+if settings.ASYNC_VIEWS:
+    blog_list, blog_detail = views.blog_list_async, views.blog_detail_async
+else:
+    blog_list, blog_detail = views.blog_list, views.blog_detail
+
 urlpatterns = [
-    path('', views.blog_list, name='blog_list'),
-    path('<slug:slug>/', views.blog_detail, name='blog_detail'),
+    path('', blog_list, name='blog_list'),
+    path('<slug:slug>/', blog_detail, name='blog_detail'),
 ]
@@ -1,53 +1,114 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from django.core.paginator import Paginator
-from django.utils import timezone
 from .models import BlogPost, BlogCategory
+from prime_impex.context_processors import aprepare_chrome
+from prime_impex.pagination import aget_page
+
+BLOG_LIST_CONTEXT = {
+    'page_title': 'Blog & Insights - Rice Export Industry News',
+    'meta_description': 'Read the latest insights on rice exports, market trends, and industry updates from Prime Impex.',
+}
+
 
 def blog_list(request):
     """Display all published blog posts"""
     category_slug = request.GET.get('category', None)
-    
-    posts = BlogPost.objects.filter(is_published=True, publish_date__lte=timezone.now())
+
+    posts = BlogPost.objects.filter(is_live=True).cards()
     categories = BlogCategory.objects.all()
     selected_category = None
-    
+
     if category_slug:
         selected_category = get_object_or_404(BlogCategory, slug=category_slug)
         posts = posts.filter(category=selected_category)
-    
+
     # Pagination
     paginator = Paginator(posts, 9)  # 9 posts per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    
+
     context = {
         'page_obj': page_obj,
         'categories': categories,
         'selected_category': selected_category,
-        'page_title': 'Blog & Insights - Rice Export Industry News',
-        'meta_description': 'Read the latest insights on rice exports, market trends, and industry updates from Prime Impex.',
+        **BLOG_LIST_CONTEXT,
     }
     return render(request, 'blog/blog_list.html', context)
 
 
-def blog_detail(request, slug):
-    """Display individual blog post"""
-    post = get_object_or_404(BlogPost, slug=slug, is_published=True)
-    
-    # Increment view count
-    post.increment_views()
-    
-    # Get related posts
-    related_posts = BlogPost.objects.filter(
-        is_published=True,
-        category=post.category
-    ).exclude(id=post.id)[:3]
-    
+async def blog_list_async(request):
+    """Async blog_list: every query is awaited before the template renders"""
+    category_slug = request.GET.get('category', None)
+
+    posts = BlogPost.objects.filter(is_live=True).cards()
+    categories = [category async for category in BlogCategory.objects.all()]
+    selected_category = None
+
+    if category_slug:
+        selected_category = await aget_object_or_404(BlogCategory, slug=category_slug)
+        posts = posts.filter(category=selected_category)
+
+    page_obj = await aget_page(posts, request.GET.get('page'), 9)
+
     context = {
+        'page_obj': page_obj,
+        'categories': categories,
+        'selected_category': selected_category,
+        **BLOG_LIST_CONTEXT,
+    }
+    await aprepare_chrome(request)
+    return render(request, 'blog/blog_list.html', context)
+
+
+def blog_detail_context(post, related_posts):
+    return {
         'post': post,
         'related_posts': related_posts,
         'page_title': post.meta_title,
         'meta_description': post.meta_description,
         'meta_keywords': post.meta_keywords,
     }
+
+
+def related_posts_query(post):
+    """Precomputed neighbours (blog/related.py), best first"""
+    return BlogPost.objects.filter(is_live=True, linked_from__post=post).order_by('linked_from__rank').cards()
+
+
+def category_posts_query(post):
+    """Fallback for posts without neighbours yet, e.g. before rebuild_related_posts has run"""
+    if post.category_id is None:
+        return BlogPost.objects.none()
+    return BlogPost.objects.filter(is_live=True, category=post.category).cards().exclude(id=post.id)[:3]
+
+
+def blog_detail(request, slug):
+    """Display individual blog post"""
+    post = get_object_or_404(BlogPost.objects.select_related('category').defer('content'), slug=slug, is_live=True)
+
+    post.ensure_rendered()
+    # Increment view count
+    post.increment_views()
+
+    related_posts = list(related_posts_query(post)) or category_posts_query(post)
+
+    context = blog_detail_context(post, related_posts)
+    return render(request, 'blog/blog_detail.html', context)
+
+
+async def blog_detail_async(request, slug):
+    """Async blog_detail"""
+    post = await aget_object_or_404(
+        BlogPost.objects.select_related('category').defer('content'), slug=slug, is_live=True
+    )
+
+    await post.aensure_rendered()
+    await post.aincrement_views()
+
+    related_posts = [related async for related in related_posts_query(post)]
+    if not related_posts:
+        related_posts = [related async for related in category_posts_query(post)]
+
+    context = blog_detail_context(post, related_posts)
+    await aprepare_chrome(request)
     return render(request, 'blog/blog_detail.html', context)
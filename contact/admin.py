@@ -1,11 +1,30 @@
 from django.contrib import admin
 from .models import ContactInquiry
+from .normalize import COUNTRY_NAMES
+
+
+class CountryFilter(admin.SimpleListFilter):
+    """Countries by name, from the normalized codes (the typed country has many spellings)"""
+    title = 'country'
+    parameter_name = 'country_code'
+
+    def lookups(self, request, model_admin):
+        codes = model_admin.get_queryset(request).exclude(country_code='').order_by()
+        codes = codes.values_list('country_code', flat=True).distinct()
+        return sorted(((code, COUNTRY_NAMES.get(code, code)) for code in codes), key=lambda lookup: lookup[1])
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(country_code=self.value())
+        return queryset
+
 
 @admin.register(ContactInquiry)
 class ContactInquiryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'phone', 'country', 'product_interest', 'is_read', 'is_contacted', 'created_at']
+    list_display = ['name', 'email', 'phone', 'country', 'country_code', 'product_interest', 'is_read', 'is_contacted', 'created_at']
     list_editable = ['is_read', 'is_contacted']
-    list_filter = ['is_read', 'is_contacted', 'country', 'created_at']
+    list_filter = ['is_read', 'is_contacted', CountryFilter, ('product', admin.RelatedOnlyFieldListFilter), 'created_at']
+    raw_id_fields = ['product']
     search_fields = ['name', 'email', 'phone', 'company', 'message']
     date_hierarchy = 'created_at'
     readonly_fields = ['created_at', 'updated_at']
@@ -17,6 +36,11 @@ class ContactInquiryAdmin(admin.ModelAdmin):
         ('Inquiry Details', {
             'fields': ('product_interest', 'quantity', 'message')
         }),
+        ('Normalized', {
+            'fields': ('country_code', 'product'),
+            'description': 'Filled in from country and product interest when the inquiry is saved, '
+                           'and by manage.py normalize_inquiries',
+        }),
         ('Status & Notes', {
             'fields': ('is_read', 'is_contacted', 'notes')
         }),
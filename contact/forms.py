@@ -1,8 +1,18 @@
 from django import forms
 from .models import ContactInquiry
+from .spam import issue_token
 
 class ContactForm(forms.ModelForm):
     """Contact form with all required fields"""
+
+    # Spam checks (see spam.py): a honeypot hidden from people, and when the form was served
+    website = forms.CharField(required=False, widget=forms.TextInput(attrs={'tabindex': '-1', 'autocomplete': 'off'}))
+    form_token = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.is_bound:
+            self.initial['form_token'] = issue_token()
     
     class Meta:
         model = ContactInquiry
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from contact.models import ContactInquiry
+from contact.normalize import country_code, holder
+
+
+class Command(BaseCommand):
+    help = 'Fill in country_code and product of contact inquiries from their free-text country and product_interest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--after', type=int, default=0, help='Resume after this id (printed as the run goes)')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Redo every row, e.g. after adding country aliases or products; by default only rows missing a value',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rows = ContactInquiry.objects.order_by('pk')
+        if not options['all']:
+            rows = rows.filter(Q(country_code='') | Q(product__isnull=True))
+        rows = rows.values_list('pk', 'country', 'product_interest', 'country_code', 'product_id')
+
+        last, seen, changed = options['after'], 0, 0
+        # Keyset pagination: each chunk is an index range scan, however far in
+        while chunk := list(rows.filter(pk__gt=last)[:batch_size]):
+            index = holder.get()
+            updates = []
+            for pk, country, product_interest, old_code, old_product in chunk:
+                code, product = country_code(country), index.match(product_interest)
+                if (code, product) != (old_code, old_product):
+                    updates.append(ContactInquiry(pk=pk, country_code=code, product_id=product))
+            with transaction.atomic():
+                ContactInquiry.objects.bulk_update(updates, ['country_code', 'product'], batch_size=batch_size)
+            last = chunk[-1][0]
+            seen += len(chunk)
+            changed += len(updates)
+            self.stdout.write(f'\r  {seen} rows checked, {changed} updated (last id {last})', ending='')
+            self.stdout.flush()
+        self.stdout.write('')
+        self.stdout.write(f'Normalized {changed} of {seen} inquiries')
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0001_initial'),
+        ('products', '0003_alter_product_spec_sheet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactinquiry',
+            name='country_code',
+            field=models.CharField(blank=True, db_index=True, help_text='ISO 3166-1 alpha-2', max_length=2),
+        ),
+        migrations.AddField(
+            model_name='contactinquiry',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inquiries', to='products.product'),
+        ),
+    ]
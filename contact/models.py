@@ -14,6 +14,12 @@ class ContactInquiry(models.Model):
     product_interest = models.CharField(max_length=200, blank=True, help_text="Product they're interested in")
     quantity = models.CharField(max_length=100, blank=True)
     message = models.TextField()
+
+    # Normalized from country and product_interest (see normalize.py)
+    country_code = models.CharField(max_length=2, blank=True, db_index=True, help_text="ISO 3166-1 alpha-2")
+    product = models.ForeignKey(
+        'products.Product', on_delete=models.SET_NULL, null=True, blank=True, related_name='inquiries',
+    )
     
     # Status
     is_read = models.BooleanField(default=False)
@@ -28,6 +34,13 @@ class ContactInquiry(models.Model):
         ordering = ['-created_at']
         verbose_name_plural = "Contact Inquiries"
     
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            from .normalize import normalize
+
+            normalize(self)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} - {self.email} ({self.created_at.strftime('%Y-%m-%d')})"
 
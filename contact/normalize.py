@@ -0,0 +1,243 @@
+"""
+Normalized columns for the free-text fields of a ContactInquiry.
+
+- country -> country_code: the text is reduced to a key (lower case, letters
+  and digits only, so "U.A.E", "u a e" and "UAE" are all "uae") and looked
+  up in ALIASES, a table precomputed at import from COUNTRIES below. Adding
+  a spelling seen in the admin is one more alias in COUNTRIES.
+- product_interest -> product: matched against product names through a
+  character-trigram index. Each word is padded and cut into trigrams, so
+  word order doesn't matter ("basmati 1121" finds "1121 Basmati Rice").
+  Similarity is the Dice coefficient, 2 * shared / (text's + product's
+  trigrams), so the text has to cover most of the name as well as the name
+  most of the text: a generic "rice" or "basmati" matches no SKU. The most
+  similar product of at least PRODUCT_MATCH_THRESHOLD wins. Only the
+  postings of the text's rarest trigrams are read: a product sharing enough
+  trigrams to reach the threshold must hold one of them.
+
+New inquiries are normalized on save (ContactInquiry.save); existing ones by
+`manage.py normalize_inquiries`. Lookups are memoized, since both fields
+repeat a handful of values across millions of rows.
+"""
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from prime_impex.versions import get_version
+
+PRODUCT_MATCH_THRESHOLD = 0.6
+MEMO_SIZE = 100_000  # distinct product_interest texts remembered per index
+
+_NON_ALNUM = re.compile(r'[\W_]+')
+_WORD = re.compile(r'\w+')
+
+# ISO 3166-1 alpha-2 code: name, then other spellings buyers use (cities and
+# ports included where they stand for the country)
+COUNTRIES = {
+    'AE': ('United Arab Emirates', 'UAE', 'Emirates', 'Dubai', 'Abu Dhabi', 'Sharjah', 'Ajman', 'Jebel Ali'),
+    'SA': ('Saudi Arabia', 'KSA', 'Saudi', 'Kingdom of Saudi Arabia', 'Riyadh', 'Jeddah', 'Dammam'),
+    'OM': ('Oman', 'Sultanate of Oman', 'Muscat', 'Sohar'),
+    'KW': ('Kuwait', 'State of Kuwait'),
+    'QA': ('Qatar', 'Doha'),
+    'BH': ('Bahrain', 'Manama'),
+    'YE': ('Yemen', 'Aden'),
+    'IQ': ('Iraq', 'Baghdad', 'Basra', 'Umm Qasr'),
+    'IR': ('Iran', 'Islamic Republic of Iran', 'Tehran', 'Bandar Abbas'),
+    'JO': ('Jordan', 'Amman', 'Aqaba'),
+    'LB': ('Lebanon', 'Beirut'),
+    'SY': ('Syria', 'Syrian Arab Republic'),
+    'IL': ('Israel',),
+    'TR': ('Turkey', 'Turkiye', 'Istanbul'),
+    'EG': ('Egypt', 'Cairo', 'Alexandria'),
+    'LY': ('Libya', 'Tripoli'),
+    'DZ': ('Algeria', 'Algiers'),
+    'MA': ('Morocco', 'Casablanca'),
+    'TN': ('Tunisia', 'Tunis'),
+    'SD': ('Sudan', 'Khartoum', 'Port Sudan'),
+    'ET': ('Ethiopia', 'Addis Ababa'),
+    'DJ': ('Djibouti',),
+    'SO': ('Somalia', 'Mogadishu'),
+    'KE': ('Kenya', 'Nairobi', 'Mombasa'),
+    'TZ': ('Tanzania', 'Dar es Salaam'),
+    'UG': ('Uganda', 'Kampala'),
+    'MZ': ('Mozambique', 'Maputo'),
+    'ZA': ('South Africa', 'RSA', 'Durban', 'Johannesburg', 'Cape Town'),
+    'NG': ('Nigeria', 'Lagos'),
+    'GH': ('Ghana', 'Accra', 'Tema'),
+    'CI': ("Cote d'Ivoire", 'Ivory Coast', 'Abidjan'),
+    'SN': ('Senegal', 'Dakar'),
+    'BJ': ('Benin', 'Cotonou'),
+    'TG': ('Togo', 'Lome'),
+    'CM': ('Cameroon', 'Douala'),
+    'MU': ('Mauritius', 'Port Louis'),
+    'MG': ('Madagascar',),
+    'IN': ('India', 'Bharat'),
+    'PK': ('Pakistan', 'Karachi', 'Lahore'),
+    'BD': ('Bangladesh', 'Dhaka', 'Chittagong'),
+    'LK': ('Sri Lanka', 'Colombo', 'Ceylon'),
+    'NP': ('Nepal', 'Kathmandu'),
+    'AF': ('Afghanistan', 'Kabul'),
+    'MV': ('Maldives', 'Male'),
+    'CN': ('China', "People's Republic of China", 'PRC', 'Shanghai'),
+    'HK': ('Hong Kong',),
+    'SG': ('Singapore',),
+    'MY': ('Malaysia', 'Kuala Lumpur', 'Port Klang'),
+    'ID': ('Indonesia', 'Jakarta'),
+    'PH': ('Philippines', 'Manila'),
+    'TH': ('Thailand', 'Bangkok'),
+    'VN': ('Vietnam', 'Viet Nam'),
+    'JP': ('Japan', 'Tokyo'),
+    'KR': ('South Korea', 'Korea', 'Republic of Korea', 'Seoul'),
+    'AU': ('Australia', 'Sydney', 'Melbourne'),
+    'NZ': ('New Zealand',),
+    'GB': ('United Kingdom', 'UK', 'U.K', 'Great Britain', 'Britain', 'England', 'Scotland', 'Wales', 'London'),
+    'IE': ('Ireland', 'Dublin'),
+    'NL': ('Netherlands', 'Holland', 'The Netherlands', 'Rotterdam', 'Amsterdam'),
+    'BE': ('Belgium', 'Antwerp', 'Brussels'),
+    'DE': ('Germany', 'Deutschland', 'Hamburg'),
+    'FR': ('France', 'Paris'),
+    'ES': ('Spain', 'Espana'),
+    'PT': ('Portugal',),
+    'IT': ('Italy', 'Italia'),
+    'GR': ('Greece',),
+    'CH': ('Switzerland',),
+    'AT': ('Austria',),
+    'SE': ('Sweden',),
+    'NO': ('Norway',),
+    'DK': ('Denmark',),
+    'FI': ('Finland',),
+    'PL': ('Poland',),
+    'CZ': ('Czech Republic', 'Czechia'),
+    'RO': ('Romania',),
+    'BG': ('Bulgaria',),
+    'RU': ('Russia', 'Russian Federation', 'Moscow'),
+    'UA': ('Ukraine',),
+    'KZ': ('Kazakhstan',),
+    'UZ': ('Uzbekistan',),
+    'AZ': ('Azerbaijan',),
+    'GE': ('Georgia',),
+    'US': ('United States', 'USA', 'U.S', 'United States of America', 'America', 'New York', 'Houston'),
+    'CA': ('Canada', 'Toronto', 'Vancouver'),
+    'MX': ('Mexico',),
+    'BR': ('Brazil', 'Brasil'),
+    'AR': ('Argentina',),
+    'CL': ('Chile',),
+    'PE': ('Peru',),
+    'CO': ('Colombia',),
+    'TT': ('Trinidad and Tobago', 'Trinidad'),
+    'GY': ('Guyana',),
+    'FJ': ('Fiji',),
+}
+
+
+def country_key(text):
+    return _NON_ALNUM.sub('', text.lower())
+
+
+def _aliases():
+    aliases = {}
+    for code, names in COUNTRIES.items():
+        for name in (code, *names):
+            aliases.setdefault(country_key(name), code)
+    return aliases
+
+
+ALIASES = _aliases()
+COUNTRY_NAMES = {code: names[0] for code, names in COUNTRIES.items()}
+
+
+@lru_cache(maxsize=4096)
+def country_code(text):
+    """ISO code for a country as typed, '' when it isn't recognised"""
+    key = country_key(text)
+    if key in ALIASES:
+        return ALIASES[key]
+    # "Dubai, UAE", "Jeddah - Saudi Arabia": the last part that is known
+    for part in reversed(re.split(r'[,/\-(]', text)):
+        code = ALIASES.get(country_key(part))
+        if code:
+            return code
+    return ''
+
+
+def trigrams(text):
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ProductIndex:
+    def __init__(self, products):
+        """products: (id, name) pairs"""
+        postings = defaultdict(list)
+        self.grams = {}
+        for pk, name in products:
+            self.grams[pk] = frozenset(trigrams(name))
+            for gram in self.grams[pk]:
+                postings[gram].append(pk)
+        self.postings = dict(postings)
+        self.memo = {}
+
+    def match(self, text):
+        """Id of the product `text` names, or None"""
+        key = ' '.join(sorted(_WORD.findall(text.lower())))
+        if key not in self.memo:
+            if len(self.memo) >= MEMO_SIZE:
+                self.memo.clear()
+            self.memo[key] = self._match(trigrams(key))
+        return self.memo[key]
+
+    def _match(self, grams):
+        if not grams:
+            return None
+        # 2s / (n + m) >= t with m >= s gives s >= t * n / (2 - t) shared trigrams,
+        # and a product sharing that many shares one of these
+        threshold = PRODUCT_MATCH_THRESHOLD
+        needed = math.ceil(threshold * len(grams) / (2 - threshold))
+        rarest = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))[:len(grams) - needed + 1]
+        candidates = {pk for gram in rarest for pk in self.postings.get(gram, ())}
+
+        best, best_rank = None, None
+        for pk in candidates:
+            similarity = 2 * len(grams & self.grams[pk]) / (len(grams) + len(self.grams[pk]))
+            if similarity < threshold:
+                continue
+            rank = (-similarity, pk)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = pk, rank
+        return best
+
+
+class IndexHolder:
+    """The process's product index, rebuilt after the 'catalog' version changes"""
+
+    def __init__(self):
+        self.index = None
+        self.version = None
+
+    def get(self):
+        # Checked on every use, unlike the suggest index: a stale index could
+        # hand out the id of a product deleted since
+        version = get_version('catalog')
+        if self.index is None or version != self.version:
+            from products.models import Product
+
+            self.index = ProductIndex(Product.objects.values_list('id', 'name').iterator(chunk_size=5000))
+            self.version = version
+        return self.index
+
+
+holder = IndexHolder()
+
+
+def match_product(text):
+    return holder.get().match(text) if text.strip() else None
+
+
+def normalize(inquiry):
+    """Fill in an inquiry's country_code and product from its free text"""
+    inquiry.country_code = country_code(inquiry.country)
+    inquiry.product_id = match_product(inquiry.product_interest)
@@ -0,0 +1,120 @@
+"""
+Cheap checks that drop spam and duplicate contact submissions before they
+cost a ContactInquiry row, an email and a WhatsApp message.
+
+Before the form is validated:
+- honeypot: ContactForm.website is hidden from people; bots fill it in;
+- form token: a signed timestamp issued with the form. A submission without
+  a valid one didn't come from our page, and one sent sooner than
+  CONTACT_MIN_SUBMIT_SECONDS after the form was served wasn't typed.
+
+After it is valid, it's checked against the sender's recent inquiries, kept
+in the cache for CONTACT_DUPLICATE_WINDOW seconds under their email and
+under their phone digits. Each message is summarised as a bottom-k sketch
+of its word shingles (the SKETCH_SIZE smallest shingle hashes), from which
+the Jaccard similarity of two messages can be estimated; a message at least
+CONTACT_DUPLICATE_SIMILARITY similar to a recent one from the same sender
+is a duplicate, whatever its whitespace, case or a reworded word.
+
+The view answers dropped submissions exactly like accepted ones, so bots
+learn nothing, and nothing is written to the database.
+"""
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+TOKEN_SALT = 'contact.form'
+SHINGLE_SIZE = 3  # words
+SKETCH_SIZE = 64
+RECENT_PER_SENDER = 5
+
+_WORD = re.compile(r'\w+')
+
+
+def issue_token(issued_at=None):
+    return signing.dumps(int(issued_at if issued_at is not None else time.time()), salt=TOKEN_SALT)
+
+
+def rejection_reason(data):
+    """
+    Why a POST is spam before it's even validated, or None. 'expired' means
+    a real form left open past CONTACT_FORM_MAX_AGE; the view asks again.
+    """
+    if data.get('website'):
+        return 'honeypot'
+    try:
+        issued_at = signing.loads(data.get('form_token', ''), salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return 'token'
+    age = time.time() - issued_at
+    if age > settings.CONTACT_FORM_MAX_AGE:
+        return 'expired'
+    if age < settings.CONTACT_MIN_SUBMIT_SECONDS:
+        return 'too_fast'
+    return None
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big')
+
+
+def sketch(message):
+    """Bottom-k sketch of the message's word shingles"""
+    words = _WORD.findall(message.lower())
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    return sorted({_hash(shingle) for shingle in shingles})[:SKETCH_SIZE]
+
+
+def similarity(a, b):
+    """Jaccard similarity estimated from two bottom-k sketches"""
+    a, b = set(a), set(b)
+    union = sorted(a | b)[:SKETCH_SIZE]
+    if not union:
+        return 1.0
+    return sum(1 for value in union if value in a and value in b) / len(union)
+
+
+def sender_keys(cleaned_data):
+    keys = []
+    email = cleaned_data.get('email', '').strip().lower()
+    if email:
+        keys.append('contact:recent:' + hashlib.blake2b(email.encode(), digest_size=12).hexdigest())
+    digits = ''.join(char for char in cleaned_data.get('phone', '') if char.isdigit())
+    if len(digits) >= 6:
+        keys.append(f'contact:recent:tel:{digits}')
+    return keys
+
+
+def _is_duplicate(message_sketch, recent):
+    threshold = settings.CONTACT_DUPLICATE_SIMILARITY
+    return any(similarity(message_sketch, earlier) >= threshold for sketches in recent for earlier in sketches)
+
+
+def is_duplicate(cleaned_data):
+    recent = cache.get_many(sender_keys(cleaned_data)).values()
+    return _is_duplicate(sketch(cleaned_data.get('message', '')), recent)
+
+
+async def ais_duplicate(cleaned_data):
+    recent = (await cache.aget_many(sender_keys(cleaned_data))).values()
+    return _is_duplicate(sketch(cleaned_data.get('message', '')), recent)
+
+
+def _remembered(cleaned_data, recent):
+    message_sketch = sketch(cleaned_data.get('message', ''))
+    return {key: [message_sketch, *recent.get(key, [])][:RECENT_PER_SENDER] for key in sender_keys(cleaned_data)}
+
+
+def remember(cleaned_data):
+    """Record an accepted inquiry for the duplicate check"""
+    recent = cache.get_many(sender_keys(cleaned_data))
+    cache.set_many(_remembered(cleaned_data, recent), settings.CONTACT_DUPLICATE_WINDOW)
+
+
+async def aremember(cleaned_data):
+    recent = await cache.aget_many(sender_keys(cleaned_data))
+    await cache.aset_many(_remembered(cleaned_data, recent), settings.CONTACT_DUPLICATE_WINDOW)
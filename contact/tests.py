@@ -1,3 +1,180 @@
-from django.test import TestCase
+import time
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import ContactInquiry
+from .spam import issue_token, similarity, sketch
+
+MESSAGE = 'We would like a quote for 50 tonnes of 1121 sella basmati delivered to Jebel Ali in March.'
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class SpamFilterTests(TestCase):
+    def setUp(self):
+        from .normalize import holder
+
+        cache.clear()
+        holder.index = None
+
+    def submit(self, **overrides):
+        data = {
+            'name': 'Amina Rahman',
+            'email': 'amina@example.com',
+            'phone': '+971 50 123 4567',
+            'country': 'UAE',
+            'product_interest': 'basmati',
+            'message': MESSAGE,
+            'form_token': issue_token(time.time() - 10),
+            **overrides,
+        }
+        return self.client.post(reverse('contact:contact'), data, secure=True)
+
+    def assertAbsorbed(self, response, rows=0):
+        self.assertRedirects(response, reverse('contact:thank_you'), fetch_redirect_response=False)
+        self.assertEqual(ContactInquiry.objects.count(), rows)
+
+    def test_form_carries_token_and_honeypot(self):
+        response = self.client.get(reverse('contact:contact'), secure=True)
+        self.assertContains(response, 'name="form_token"')
+        self.assertContains(response, 'name="website"')
+
+    def test_valid_submission_is_saved(self):
+        self.assertAbsorbed(self.submit(), rows=1)
+
+    def test_repeat_from_same_sender_is_dropped(self):
+        self.submit()
+        self.assertAbsorbed(self.submit(message='  ' + MESSAGE.upper()), rows=1)
+        # Same phone, another address, one word changed
+        reworded = MESSAGE.replace('March', 'April')
+        self.assertAbsorbed(self.submit(email='a.rahman@example.org', message=reworded), rows=1)
+
+    def test_different_message_from_same_sender_is_saved(self):
+        self.submit()
+        self.assertAbsorbed(self.submit(message='Please send your price list for parboiled rice.'), rows=2)
+
+    def test_bots_are_dropped_before_validation(self):
+        self.assertAbsorbed(self.submit(website='http://spam.example'))
+        self.assertAbsorbed(self.submit(form_token=issue_token()))
+        self.assertAbsorbed(self.submit(form_token='forged'))
+        self.assertAbsorbed(self.submit(form_token=''))
+
+    def test_expired_form_is_shown_again(self):
+        response = self.submit(form_token=issue_token(time.time() - 2 * 86400))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'send it again')
+        self.assertEqual(ContactInquiry.objects.count(), 0)
+
+    def test_similarity(self):
+        self.assertEqual(similarity(sketch(MESSAGE), sketch(MESSAGE.lower())), 1.0)
+        self.assertLess(similarity(sketch(MESSAGE), sketch('Do you ship brown rice to Canada?')), 0.2)
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class AsyncViewTests(TestCase):
+    """The async contact view, as the ASGI entry point routes to it"""
+
+    def setUp(self):
+        from prime_impex.test_runner import use_async_views
+
+        use_async_views(self)
+        cache.clear()
+
+    async def test_form_submission_and_thank_you(self):
+        response = await self.async_client.get(reverse('contact:contact'), secure=True)
+        self.assertEqual(response.resolver_match.func.__name__, 'contact_view_async')
+        self.assertContains(response, 'name="form_token"')
+
+        data = {
+            'name': 'Amina Rahman', 'email': 'amina@example.com', 'phone': '+971 50 123 4567', 'country': 'UAE',
+            'product_interest': 'basmati', 'message': MESSAGE, 'form_token': issue_token(time.time() - 10),
+        }
+        response = await self.async_client.post(reverse('contact:contact'), {**data, 'email': 'bad'}, secure=True)
+        self.assertContains(response, 'Please correct the errors below.')
+        response = await self.async_client.post(reverse('contact:contact'), data, secure=True)
+        self.assertRedirects(response, reverse('contact:thank_you'), fetch_redirect_response=False)
+        self.assertEqual(await ContactInquiry.objects.acount(), 1)
+
+        # A duplicate is absorbed like a success
+        response = await self.async_client.post(reverse('contact:contact'), data, secure=True)
+        self.assertRedirects(response, reverse('contact:thank_you'), fetch_redirect_response=False)
+        self.assertEqual(await ContactInquiry.objects.acount(), 1)
+
+        response = await self.async_client.get(reverse('contact:thank_you'), secure=True)
+        self.assertEqual(response.resolver_match.func.__name__, 'thank_you_view')
+        self.assertEqual(response.status_code, 200)
+
+
+class NormalizeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from products.models import Product, ProductCategory
+
+        category = ProductCategory.objects.create(name='Basmati Rice')
+        cls.sella = Product.objects.create(name='1121 Sella Basmati Rice', category=category, main_image='x.jpg')
+        cls.golden = Product.objects.create(name='1121 Golden Sella Basmati Rice', category=category, main_image='x.jpg')
+        cls.steam = Product.objects.create(name='Pusa Steam Rice', category=category, main_image='x.jpg')
+
+    def setUp(self):
+        from .normalize import holder
+
+        cache.clear()
+        holder.index = None
+
+    def inquiry(self, country, product_interest):
+        return ContactInquiry.objects.create(
+            name='Omar Haddad', email='omar@example.com', phone='+962 6 555 0100',
+            country=country, product_interest=product_interest, message='Quote please',
+        )
+
+    def test_country_aliases(self):
+        from .normalize import country_code
+
+        for typed in ('UAE', 'U.A.E', 'u a e', 'Dubai', 'Dubai, UAE', 'united arab emirates'):
+            self.assertEqual(country_code(typed), 'AE', typed)
+        self.assertEqual(country_code('KSA'), 'SA')
+        self.assertEqual(country_code('Atlantis'), '')
+
+    def test_product_matching(self):
+        from .normalize import match_product
+
+        self.assertEqual(match_product('basmati 1121 sella'), self.sella.pk)
+        self.assertEqual(match_product('1121 GOLDEN sella'), self.golden.pk)
+        self.assertEqual(match_product('pusa steam'), self.steam.pk)
+        self.assertIsNone(match_product('brown rice'))
+        self.assertIsNone(match_product(''))
+
+    def test_generic_interest_matches_no_product(self):
+        from .normalize import match_product
+
+        for typed in ('Rice', 'basmati', 'Basmati', 'sella', 'steam'):
+            self.assertIsNone(match_product(typed), typed)
+
+    def test_new_inquiry_is_normalized(self):
+        inquiry = self.inquiry('Dubai', 'sella 1121 basmati')
+        self.assertEqual((inquiry.country_code, inquiry.product_id), ('AE', self.sella.pk))
+
+    def test_command_normalizes_in_chunks(self):
+        from django.core.management import call_command
+
+        ContactInquiry.objects.bulk_create([
+            ContactInquiry(name='A', email='a@example.com', phone='1', country=country, product_interest=product,
+                           message='Hi')
+            for country, product in [('UAE', 'pusa steam'), ('KSA', ''), ('UK', '1121 sella'), ('Atlantis', 'x')]
+        ])
+        call_command('normalize_inquiries', batch_size=2, stdout=StringIO())
+        rows = ContactInquiry.objects.order_by('pk').values_list('country_code', 'product_id')
+        self.assertEqual(list(rows), [('AE', self.steam.pk), ('SA', None), ('GB', self.sella.pk), ('', None)])
+
+    def test_admin_filters_by_country_code(self):
+        from django.contrib.auth.models import User
+
+        self.inquiry('U.A.E', '')
+        self.inquiry('Oman', '')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        url = reverse('admin:contact_contactinquiry_changelist')
+        response = self.client.get(url, {'country_code': 'AE'}, secure=True)
+        self.assertContains(response, 'United Arab Emirates')
+        self.assertEqual(response.context['cl'].result_count, 1)
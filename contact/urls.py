@@ -1,10 +1,14 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'contact'
 
+# The ASGI entry point serves the async variants (see prime_impex/asgi.py);
+# the static thank-you page has none
+contact_view = views.contact_view_async if settings.ASYNC_VIEWS else views.contact_view
+
 urlpatterns = [
-    path('', views.contact_view, name='contact'),
+    path('', contact_view, name='contact'),
     path('thank-you/', views.thank_you_view, name='thank_you'),
 ]
-
@@ -22,7 +22,7 @@ from blog.models import BlogPost, BlogCategory
 def export_products():
     """Export all active products to JSON"""
     categories = ProductCategory.objects.filter(is_active=True)
-    products = Product.objects.filter(is_active=True)
+    products = Product.objects.filter(is_active=True).select_related('category')
     
     categories_data = []
     for cat in categories:
@@ -81,7 +81,7 @@ def export_products():
 def export_blogs():
     """Export all published blog posts to JSON"""
     categories = BlogCategory.objects.all()
-    posts = BlogPost.objects.filter(is_published=True)
+    posts = BlogPost.objects.filter(is_live=True).select_related('category', 'author')
     
     categories_data = []
     for cat in categories:
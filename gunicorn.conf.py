@@ -0,0 +1,32 @@
+"""
+gunicorn settings, picked up automatically from the working directory by both
+Procfile (sync workers) and Procfile.asgi (uvicorn workers).
+"""
+import gc
+import os
+import tempfile
+
+# Load Django once in the master; workers are forked with it already imported
+preload_app = True
+
+# Workers flush their metrics here and /metrics sums them (prime_impex/metrics.py).
+# A fresh directory per server start, so counters from a previous run don't linger.
+os.environ.setdefault('METRICS_DIR', tempfile.mkdtemp(prefix='prime_impex_metrics_'))
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before any worker forks"""
+    from prime_impex.startup import warm_up
+
+    warm_up()
+    # Move everything loaded so far out of the collector's view. Otherwise the
+    # first GC pass in each worker writes to these objects and un-shares the
+    # copy-on-write pages they live on.
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    """Runs in the worker as it exits: keep its last few seconds of metrics"""
+    from prime_impex.metrics import flush
+
+    flush()
@@ -0,0 +1,16 @@
+"""
+Admin URLconf, imported on the first request under /admin/ (see the lazy
+URLResolver in prime_impex/urls.py).
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+# Customize admin site
+admin.site.site_header = "Patel Universal Traders PVT.LTD. Administration"
+admin.site.site_title = "Patel Universal Traders PVT.LTD. Admin"
+admin.site.index_title = "Welcome to Patel Universal Traders PVT.LTD. Admin Panel"
+
+app_name = 'admin'
+
+urlpatterns = admin.site.get_urls()
@@ -0,0 +1,25 @@
+from django.contrib.admin import autodiscover
+from django.contrib.admin.apps import SimpleAdminConfig
+from django.contrib.admin.checks import check_admin_app, check_dependencies
+from django.core import checks
+
+
+def check_discovered_admin(app_configs, **kwargs):
+    """Run the admin checks against the registered ModelAdmins"""
+    autodiscover()
+    return check_admin_app(app_configs, **kwargs)
+
+
+class LazyAdminConfig(SimpleAdminConfig):
+    """
+    Admin app that skips autodiscover() at startup.
+
+    Discovery imports every app's admin.py, plus the auth forms and views
+    they pull in, before the first page can be served. prime_impex.admin_urls
+    runs it on the first request under /admin/ instead; system checks run it
+    too, so `manage.py check` still validates the ModelAdmins.
+    """
+
+    def ready(self):
+        checks.register(check_dependencies, checks.Tags.admin)
+        checks.register(check_discovered_admin, checks.Tags.admin)
@@ -0,0 +1,58 @@
+"""
+{% stylesheet %} and {% script %}: the tags for the bundles in
+settings.ASSET_BUNDLES. Registered as the "assets" template library.
+
+    {% load assets %}
+    {% stylesheet 'base' %}
+    {% script 'base' %}
+
+Once scripts/build_assets.py has run they link the minified, content-hashed
+bundle; before that (in development) they link the source files one by one.
+On pages with critical CSS (settings.CRITICAL_CSS) the stylesheet tag
+inlines it and loads the full bundle without blocking the first paint.
+"""
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from prime_impex.assets import bundle_manifest
+
+register = template.Library()
+
+
+def sources(name, tag):
+    return format_html_join('\n', tag, ((static(path),) for path in settings.ASSET_BUNDLES[name]))
+
+
+@register.simple_tag(takes_context=True)
+def stylesheet(context, bundle):
+    name = f'{bundle}.css'
+    manifest = bundle_manifest()
+    built = manifest['bundles'].get(name)
+    if built is None:
+        return sources(name, '<link rel="stylesheet" href="{}">')
+
+    href = static(built)
+    critical = manifest['critical'].get(context.get('critical_css_page', ''))
+    if critical is None or critical['bundle'] != name:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>\n'
+        '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        # The build's own output; only a closing tag could break out of the element
+        mark_safe(critical['css'].replace('</', '<\\/')),
+        href,
+        href,
+    )
+
+
+@register.simple_tag
+def script(bundle):
+    name = f'{bundle}.js'
+    built = bundle_manifest()['bundles'].get(name)
+    if built is None:
+        return sources(name, '<script src="{}"></script>')
+    return format_html('<script src="{}"></script>', static(built))
@@ -0,0 +1,48 @@
+"""
+The deployed version of the site's static assets and templates.
+
+asset_version() is a short hash of the static asset and image manifests
+(when collectstatic and the scripts/ build steps have written them) and of
+the project's template sources. It only changes with a deploy, so anything rendered from
+templates and static URLs alone, such as the cached page chrome in
+base.html, can be cached under it without ever being invalidated.
+"""
+import functools
+import hashlib
+import json
+from pathlib import Path
+
+from django.conf import settings
+
+
+def manifest_paths():
+    return [
+        Path(settings.STATIC_ROOT) / 'staticfiles.json',
+        Path(settings.ASSET_MANIFEST),
+        Path(settings.COMPILED_TEMPLATES_DIR) / 'images.json',
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def bundle_manifest():
+    """scripts/build_assets.py's manifest; empty when the bundles haven't been built"""
+    try:
+        return json.loads(Path(settings.ASSET_MANIFEST).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {'bundles': {}, 'critical': {}}
+
+
+def template_paths():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        yield from sorted(Path(directory).rglob('*.html'))
+
+
+@functools.lru_cache(maxsize=None)
+def asset_version():
+    digest = hashlib.sha256()
+    for path in [*manifest_paths(), *template_paths()]:
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            continue
+    return digest.hexdigest()[:12]
@@ -0,0 +1,167 @@
+"""
+Response compression: brotli (when the brotli package is installed) or gzip,
+whichever the client prefers in Accept-Encoding.
+
+Responses are compressed when they are text-like (COMPRESSIBLE_TYPES) and
+at least COMPRESSION_MIN_SIZE bytes; smaller bodies gain less than the
+header costs. Streaming responses (the API's JSON pages) are compressed
+chunk by chunk as they are sent, never collected in memory first.
+
+A response may carry already compressed bodies as `encoded_content`
+({encoding: bytes}); the page cache (prime_impex/pagecache.py) stores them
+with each page, so a cache hit never runs the compressor again.
+"""
+import gzip
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml', 'application/rss+xml',
+    'application/manifest+json', 'image/svg+xml',
+)
+# Per-request compression favours speed; bodies compressed once for the cache favour size
+LEVELS = {'br': 5, 'gzip': 6}
+STORED_LEVELS = {'br': 9, 'gzip': 9}
+
+
+def encodings():
+    """Supported encodings, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding):
+    """The supported encoding the client ranks highest, or None"""
+    qualities = {}
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings():
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, levels=LEVELS):
+    if encoding == 'br':
+        return brotli.compress(data, quality=levels['br'])
+    return gzip.compress(data, compresslevel=levels['gzip'], mtime=0)
+
+
+class Compressor:
+    """Incremental compressor for streamed bodies"""
+
+    def __init__(self, encoding):
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=LEVELS['br'])
+            self.compress = self.compressor.process
+        else:
+            self.compressor = zlib.compressobj(LEVELS['gzip'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress = self.compressor.compress
+        self.encoding = encoding
+
+    def finish(self):
+        return self.compressor.finish() if self.encoding == 'br' else self.compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    compressor = Compressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    compressor = Compressor(encoding)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def is_compressible(response):
+    if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+        return False
+    return response.streaming or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+
+def encode_all(response):
+    """{encoding: compressed body} for a response worth compressing, else {}"""
+    if response.streaming or not is_compressible(response):
+        return {}
+    return {encoding: compress(response.content, encoding, STORED_LEVELS) for encoding in encodings()}
+
+
+class CompressionMiddleware:
+    """Compresses responses; sits outside the page cache so hits are compressed too"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            body = getattr(response, 'encoded_content', {}).get(encoding)
+            if body is None:
+                body = compress(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        # The compressed body isn't byte-for-byte the one the ETag was made for
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,58 @@
+"""
+Context for the cached fragments of base.html: the header, head assets and
+footer are cached per asset_version(), the navigation also per section, the
+head also per page with critical CSS, and the footer's category links per
+'catalog' version (see products/signals.py).
+
+Async views render on the event loop, where the ORM can't run, so they
+await aprepare_chrome(request) before render() to load the footer's
+categories ahead (from the cache, per 'catalog' version, after the first).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from prime_impex.assets import asset_version
+from prime_impex.versions import aget_version, get_version
+
+NAV_SECTIONS = {'': 'home', 'about': 'about', 'products': 'products', 'quality': 'quality', 'blog': 'blog',
+                'contact': 'contact'}
+
+def _active_categories():
+    from products.models import ProductCategory
+
+    return ProductCategory.objects.filter(is_active=True).values('name', 'slug')
+
+
+def footer_categories(request):
+    """Active product categories; only called when the footer fragment isn't cached"""
+    prepared = getattr(request, 'footer_categories', None)
+    if prepared is not None:
+        return prepared
+    return list(_active_categories())
+
+
+async def aprepare_chrome(request):
+    """Load what the chrome's fragments query, for an async view to call before render()"""
+    key = f'footer-categories:{await aget_version("catalog")}'
+    categories = await cache.aget(key)
+    if categories is None:
+        categories = [category async for category in _active_categories()]
+        await cache.aset(key, categories, settings.FRAGMENT_CACHE_TIMEOUT)
+    request.footer_categories = categories
+
+
+def critical_css_page(request):
+    match = request.resolver_match
+    return match.view_name if match is not None and match.view_name in settings.CRITICAL_CSS else ''
+
+
+def chrome(request):
+    return {
+        'asset_version': asset_version(),
+        'critical_css_page': critical_css_page(request),
+        'nav_section': NAV_SECTIONS.get(request.path.strip('/').split('/', 1)[0], ''),
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        # Callables: templates only call them inside a fragment that has to be rendered
+        'catalog_version': lambda: get_version('catalog'),
+        'footer_categories': lambda: footer_categories(request),
+    }
@@ -0,0 +1,195 @@
+"""
+Structured, non-blocking logging (wired up by settings.LOGGING).
+
+Request threads only put records on an in-memory queue; a QueueListener
+thread formats them as JSON lines and writes them to stderr. Each record
+carries the request id and view name of the request that logged it, and
+RequestLogMiddleware writes one access record per request with its latency.
+
+High-volume INFO records (the access log) are sampled per request through
+SamplingFilter; WARNING and above are always kept.
+"""
+import atexit
+import copy
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+view_name_var = contextvars.ContextVar('view_name', default=None)
+
+access_logger = logging.getLogger('prime_impex.request')
+
+# Attributes every LogRecord has; anything else came from `extra=` and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                data[key] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id and view name"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        record.view = view_name_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of INFO/DEBUG records from the given loggers.
+
+    The decision is made from the request id, so a sampled request keeps all
+    of its records and an unsampled one drops them all.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        if rate is None or rate >= 1:
+            return True
+        request_id = request_id_var.get()
+        if request_id is None:
+            return True
+        return (zlib.crc32(request_id.encode()) & 0xFFFF) / 0x10000 < rate
+
+
+class QueueStreamHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that owns a QueueListener writing JSON lines to `stream`.
+
+    Fork-safe: gunicorn's preload_app configures logging in the master, and
+    the listener thread doesn't survive into forked workers. The first record
+    logged in a new process starts a fresh queue and listener there.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.target = logging.StreamHandler(stream)
+        self.target.setFormatter(JsonFormatter())
+        self.listener = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+
+    def start(self):
+        with self.start_lock:
+            if self.pid == os.getpid():
+                return
+            # Whatever the parent had queued is the parent's to write
+            self.queue = queue.SimpleQueue()
+            self.listener = logging.handlers.QueueListener(self.queue, self.target)
+            self.listener.start()
+            self.pid = os.getpid()
+            atexit.register(self.stop)
+
+    def stop(self):
+        if self.listener is not None and self.pid == os.getpid():
+            self.listener.stop()  # drains the queue
+            self.listener = None
+            self.pid = None
+
+    def prepare(self, record):
+        # Resolve the message here, since args may change once we return, but
+        # leave JSON formatting and tracebacks to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record):
+        if self.pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+class RequestLogMiddleware:
+    """
+    Assigns a request id (honouring a sane incoming X-Request-ID), exposes it
+    and the view name to every log record, and writes the access record.
+    First in MIDDLEWARE, so the latency covers the whole stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not _REQUEST_ID.match(request_id):
+            request_id = os.urandom(8).hex()
+        request.request_id = request_id
+        return request_id_var.set(request_id), view_name_var.set(None), time.perf_counter()
+
+    def finish(self, request, response, state):
+        request_id_token, view_token, start = state
+        latency_ms = round((time.perf_counter() - start) * 1000, 2)
+        response['X-Request-ID'] = request.request_id
+        access_logger.log(
+            logging.ERROR if response.status_code >= 500 else logging.INFO,
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'latency_ms': latency_ms,
+            },
+        )
+        request_id_var.reset(request_id_token)
+        view_name_var.reset(view_token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name_var.set(request.resolver_match.view_name)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.start(request)
+        response = self.get_response(request)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        response = await self.get_response(request)
+        return self.finish(request, response, state)
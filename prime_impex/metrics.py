@@ -0,0 +1,300 @@
+"""
+In-process metrics shared across gunicorn workers, exposed at /metrics.
+
+Each process keeps its counters and histograms in memory. When METRICS_DIR is
+set (gunicorn.conf.py creates one per server start) every worker flushes a
+snapshot to METRICS_DIR/<pid>.json at most once per METRICS_FLUSH_INTERVAL
+seconds, and /metrics sums the snapshots of all workers. The worker serving
+a scrape takes over the files of workers that have exited: it adds their
+numbers to its own, writes its file and deletes theirs, so the directory
+doesn't grow with every restart and counters never go backwards.
+
+Recording a request is a few dict lookups and additions under one lock,
+a handful of microseconds. The endpoint speaks the Prometheus text format.
+
+Usage elsewhere in the project:
+    from prime_impex import metrics
+    metrics.record_cache('catalog', hit=True)
+    metrics.NOTIFICATIONS.inc('email', 'sent')
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_lock = threading.Lock()
+REGISTRY = {}
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.values = {}
+        REGISTRY[name] = self
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            self._inc(labels, amount)
+
+    def _inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+
+class Histogram:
+    """
+    Per-label list of bucket counts (not cumulative; the last bucket is +Inf)
+    followed by the running sum.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values = {}
+        REGISTRY[name] = self
+
+    def observe(self, value, *labels):
+        with _lock:
+            self._observe(value, labels)
+
+    def _observe(self, value, labels):
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by resolved view', ('view',), LATENCY_BUCKETS
+)
+REQUESTS = Counter('http_requests_total', 'Responses by resolved view and status class', ('view', 'status'))
+DB_TIME = Histogram('db_time_seconds', 'Database time per request by resolved view', ('view',), LATENCY_BUCKETS)
+DB_QUERIES = Histogram(
+    'db_queries_per_request', 'SQL queries per request by resolved view', ('view',), QUERY_COUNT_BUCKETS
+)
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result'))
+RATELIMITED = Counter('ratelimit_rejections_total', 'Requests rejected with 429 by scope and limit', ('scope', 'limit'))
+NOTIFICATIONS = Counter(
+    'notifications_total', 'Inquiry notification sends by channel and outcome', ('channel', 'outcome')
+)
+SPAM_REJECTED = Counter(
+    'contact_rejections_total', 'Contact submissions dropped before saving, by reason', ('reason',)
+)
+
+
+STATUS_CLASSES = {1: '1xx', 2: '2xx', 3: '3xx', 4: '4xx', 5: '5xx'}
+
+
+def record_cache(cache, hit):
+    """Count one lookup in a named cache (e.g. 'catalog', 'page')"""
+    CACHE_REQUESTS.inc(cache, 'hit' if hit else 'miss')
+
+
+def snapshot():
+    with _lock:
+        return {
+            name: [[list(labels), value if metric.kind == 'counter' else list(value)]
+                   for labels, value in metric.values.items()]
+            for name, metric in REGISTRY.items()
+        }
+
+
+_last_flush = 0.0
+
+
+def flush():
+    """Write this process's snapshot to METRICS_DIR (atomically; no-op without METRICS_DIR)"""
+    global _last_flush
+    _last_flush = time.monotonic()
+    if not settings.METRICS_DIR:
+        return
+    folder = Path(settings.METRICS_DIR)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f'{os.getpid()}.json'
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(snapshot()))
+    os.replace(tmp, path)
+
+
+def merge_snapshot(merged, data):
+    """Add a snapshot's rows to `merged`, {name: {labels: value}}"""
+    for name, rows in data.items():
+        metric = REGISTRY.get(name)
+        if metric is None:
+            continue
+        values = merged[name]
+        for labels, value in rows:
+            labels = tuple(labels)
+            values[labels] = metric.merge(values[labels], value) if labels in values else value
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's process
+    return True
+
+
+def adopt_exited(folder):
+    """Add the snapshots of exited workers to this process's numbers; returns their claimed files"""
+    claimed = []
+    for path in folder.glob('*.json'):
+        if not path.stem.isdigit() or int(path.stem) == os.getpid() or is_running(int(path.stem)):
+            continue
+        claim = path.with_suffix(f'.{os.getpid()}.adopted')
+        try:
+            os.rename(path, claim)  # only one scraping worker wins each file
+            data = json.loads(claim.read_text())
+        except (OSError, ValueError):
+            continue
+        with _lock:
+            merge_snapshot({name: metric.values for name, metric in REGISTRY.items()}, data)
+        claimed.append(claim)
+    return claimed
+
+
+def collect():
+    """{name: {labels: value}} summed over every worker's snapshot"""
+    claimed = adopt_exited(Path(settings.METRICS_DIR)) if settings.METRICS_DIR else []
+    flush()
+    for claim in claimed:
+        claim.unlink()  # its numbers are in this process's file now
+    if settings.METRICS_DIR:
+        snapshots = []
+        for path in Path(settings.METRICS_DIR).glob('*.json'):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # A worker replaced its file while we were reading; it'll be in the next scrape
+                continue
+    else:
+        snapshots = [snapshot()]
+
+    merged = {name: {} for name in REGISTRY}
+    for data in snapshots:
+        merge_snapshot(merged, data)
+    return merged
+
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def render(merged):
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f'# HELP {name} {metric.help_text}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for labels, value in sorted(merged[name].items()):
+            if metric.kind == 'counter':
+                lines.append(f'{name}{format_labels(metric.labelnames, labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ('+Inf',), value[:-1]):
+                cumulative += count
+                le = format_labels(metric.labelnames, labels, f'le="{bound}"')
+                lines.append(f'{name}_bucket{le} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(metric.labelnames, labels)} {value[-1]:.6f}')
+            lines.append(f'{name}_count{format_labels(metric.labelnames, labels)} {cumulative}')
+
+    # Convenience gauge; Prometheus users can derive it from cache_requests_total
+    caches = {}
+    for (cache, result), count in merged[CACHE_REQUESTS.name].items():
+        caches.setdefault(cache, {'hit': 0, 'miss': 0})[result] += count
+    lines.append('# HELP cache_hit_ratio Cache hits / lookups by cache')
+    lines.append('# TYPE cache_hit_ratio gauge')
+    for cache, counts in sorted(caches.items()):
+        lines.append(f'cache_hit_ratio{{cache="{cache}"}} {counts["hit"] / (counts["hit"] + counts["miss"]):.4f}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus text endpoint; requires "Authorization: Bearer <METRICS_TOKEN>".
+    Without a token it is only served under DEBUG.
+    """
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            raise Http404
+    elif request.headers.get('Authorization') != f'Bearer {settings.METRICS_TOKEN}':
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and DB numbers per resolved view.
+
+    Goes first in MIDDLEWARE so latency covers the whole stack; the DB numbers
+    come from request.timings, set by the ServerTimingMiddleware further in.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.flush_interval = settings.METRICS_FLUSH_INTERVAL
+
+    def record(self, request, response, elapsed):
+        match = request.resolver_match
+        # Unresolved paths share one label so 404 probes can't blow up cardinality
+        labels = (match.view_name if match else 'unresolved',)
+        status = STATUS_CLASSES.get(response.status_code // 100, 'other')
+        timings = getattr(request, 'timings', None)
+        with _lock:
+            REQUEST_LATENCY._observe(elapsed, labels)
+            REQUESTS._inc(labels + (status,))
+            if timings is not None:
+                DB_TIME._observe(timings.db, labels)
+                DB_QUERIES._observe(timings.queries, labels)
+        if time.monotonic() - _last_flush >= self.flush_interval:
+            flush()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
@@ -0,0 +1,212 @@
+"""
+Whole-page cache for anonymous visitors, with stale-while-revalidate.
+
+Only cookie-free GETs to routes listed in settings.PAGE_CACHE_ROUTES are
+cached. A cookie means a session, a CSRF token or a logged-in user, whose
+pages may differ. Each route has a TTL and the content versions its pages
+depend on:
+
+    PAGE_CACHE_ROUTES = {
+        'about': {'ttl': 3600, 'versions': ['catalog']},
+        'products:product_detail': {'ttl': 600, 'versions': ['catalog']},
+        'products:product_list': {'ttl': 300, 'versions': ['catalog'], 'skip_params': ['q']},
+    }
+
+An entry is fresh until its TTL passes or one of its versions is bumped
+(prime_impex/versions.py). After that it is still served, marked stale,
+while one request, chosen by a short lock in the cache, re-renders the page
+in the background. Only a page that has never been rendered, or whose stale
+copy has also expired (PAGE_CACHE_STALE_TTL), is rendered while the
+visitor waits.
+
+Responses are stored only when they are 200s without Set-Cookie or
+Cache-Control private/no-store, so a page that starts a session or sets a
+CSRF cookie never reaches the cache. Each entry also holds the page's
+compressed bodies (prime_impex/compression.py), made once when it's stored.
+"""
+import asyncio
+import copy
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+from prime_impex.assets import asset_version
+from prime_impex.compression import encode_all
+from prime_impex.metrics import record_cache
+from prime_impex.versions import aget_version, get_version
+
+logger = logging.getLogger(__name__)
+
+# Per-request headers that must not be replayed from the cache
+UNCACHED_HEADERS = {'set-cookie', 'server-timing', 'x-request-id', 'x-page-cache'}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='page-refresh')
+# Refreshes in flight (futures or tasks); holds references until they finish
+pending = set()
+
+
+def route_config(request):
+    """The PAGE_CACHE_ROUTES entry for this request, or None when it isn't cacheable"""
+    if request.method != 'GET' or request.COOKIES or not settings.PAGE_CACHE_ENABLED:
+        return None
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    # A hit is answered before Django resolves the URL; MetricsMiddleware labels
+    # it by this match instead of 'unresolved'
+    request.resolver_match = match
+    config = settings.PAGE_CACHE_ROUTES.get(match.view_name)
+    if config is None or any(param in request.GET for param in config.get('skip_params', ())):
+        return None
+    return config
+
+
+def cache_key(request):
+    query = sorted(request.GET.lists())
+    digest = hashlib.sha256(f'{request.get_host()}|{request.path}|{query}'.encode()).hexdigest()[:32]
+    return f'page:{asset_version()}:{digest}'
+
+
+def is_cacheable(response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    cache_control = response.get('Cache-Control', '')
+    return 'private' not in cache_control and 'no-store' not in cache_control
+
+
+def make_entry(response, versions, ttl):
+    headers = [(name, value) for name, value in response.items() if name.lower() not in UNCACHED_HEADERS]
+    return {
+        'status': response.status_code,
+        'headers': headers,
+        'content': response.content,
+        'encoded': encode_all(response),
+        'versions': versions,
+        'expires': time.time() + ttl,
+    }
+
+
+def from_entry(entry, state):
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for name, value in entry['headers']:
+        response[name] = value
+    response.encoded_content = entry.get('encoded', {})
+    response['X-Page-Cache'] = state
+    return response
+
+
+def entry_state(entry, versions):
+    if entry is None:
+        return 'miss'
+    if entry['versions'] == versions and time.time() < entry['expires']:
+        return 'hit'
+    return 'stale'
+
+
+def track(future):
+    pending.add(future)
+    future.add_done_callback(pending.discard)
+
+
+class PageCacheMiddleware:
+    """
+    Serves and stores the cached pages. Sits right after SecurityMiddleware,
+    so HTTPS redirects still happen and nothing below it runs on a hit.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def store(self, key, response, versions, ttl):
+        if is_cacheable(response):
+            entry = make_entry(response, versions, ttl)
+            response.encoded_content = entry.get('encoded', {})
+            cache.set(key, entry, ttl + settings.PAGE_CACHE_STALE_TTL)
+        else:
+            # e.g. the page now 404s; don't keep serving the old copy
+            cache.delete(key)
+
+    def refresh(self, request, key, versions, ttl):
+        try:
+            self.store(key, self.get_response(request), versions, ttl)
+        except Exception:
+            logger.exception('Page cache refresh failed', extra={'path': request.path})
+        finally:
+            cache.delete(f'{key}:lock')
+            connections.close_all()
+
+    async def astore(self, key, response, versions, ttl):
+        if is_cacheable(response):
+            entry = make_entry(response, versions, ttl)
+            response.encoded_content = entry.get('encoded', {})
+            await cache.aset(key, entry, ttl + settings.PAGE_CACHE_STALE_TTL)
+        else:
+            await cache.adelete(key)
+
+    async def arefresh(self, request, key, versions, ttl):
+        try:
+            await self.astore(key, await self.get_response(request), versions, ttl)
+        except Exception:
+            logger.exception('Page cache refresh failed', extra={'path': request.path})
+        finally:
+            await cache.adelete(f'{key}:lock')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        config = route_config(request)
+        if config is None:
+            return self.get_response(request)
+
+        key = cache_key(request)
+        versions = [get_version(name) for name in config.get('versions', ())]
+        entry = cache.get(key)
+        state = entry_state(entry, versions)
+        record_cache('page', hit=state != 'miss')
+        if state == 'stale' and cache.add(f'{key}:lock', 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+            # Re-render from a copy: this request's object is about to be answered
+            track(_executor.submit(self.refresh, copy.copy(request), key, versions, config['ttl']))
+        if state != 'miss':
+            return from_entry(entry, state)
+
+        response = self.get_response(request)
+        self.store(key, response, versions, config['ttl'])
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+    async def __acall__(self, request):
+        config = route_config(request)
+        if config is None:
+            return await self.get_response(request)
+
+        key = cache_key(request)
+        versions = [await aget_version(name) for name in config.get('versions', ())]
+        entry = await cache.aget(key)
+        state = entry_state(entry, versions)
+        record_cache('page', hit=state != 'miss')
+        if state == 'stale' and await cache.aadd(f'{key}:lock', 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+            track(asyncio.get_running_loop().create_task(
+                self.arefresh(copy.copy(request), key, versions, config['ttl'])
+            ))
+        if state != 'miss':
+            return from_entry(entry, state)
+
+        response = await self.get_response(request)
+        await self.astore(key, response, versions, config['ttl'])
+        response['X-Page-Cache'] = 'miss'
+        return response
@@ -0,0 +1,16 @@
+from django.core.paginator import Paginator
+
+
+async def aget_page(object_list, number, per_page):
+    """
+    Async counterpart of Paginator(object_list, per_page).get_page(number).
+
+    Django's Paginator only knows the sync ORM, so the COUNT and the page
+    slice are awaited here and the Page is returned with a plain list.
+    """
+    paginator = Paginator(object_list, per_page)
+    # count is a cached_property: priming it keeps get_page() off the sync ORM
+    paginator.count = await object_list.acount()
+    page = paginator.get_page(number)
+    page.object_list = [obj async for obj in page.object_list]
+    return page
@@ -0,0 +1,239 @@
+"""
+Per-request timing and sampled profiling.
+
+ServerTimingMiddleware adds a Server-Timing header (db, template, total) to
+every response. A PROFILING_SAMPLE_RATE fraction of requests, plus any request
+from a staff user carrying an ``X-Profile: 1`` header, is also profiled by a
+stack sampler. Samples are appended to PROFILING_DIR/<view_name>.folded in
+collapsed-stack format, ready for flamegraph.pl, speedscope or inferno.
+
+Sampling is sync-only. The sampler follows one thread, and under ASGI a
+request's thread is the event loop shared with every other request, while
+its queries run on sync_to_async threads, so its stacks would be neither
+this request's nor complete. The async path adds Server-Timing only.
+
+Template time is measured by the TimedDjangoTemplates backend configured in
+settings.TEMPLATES; it includes any queries the template itself triggers.
+"""
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def current_timings():
+    """The RequestTimings of the request being handled, or None outside a request"""
+    return _current_timings.get()
+
+
+class RequestTimings:
+    """Accumulates database and template time for one request"""
+
+    __slots__ = ('start', 'total', 'db', 'queries', 'template')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def header(self):
+        return (
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries", '
+            f'template;dur={self.template * 1000:.1f}, '
+            f'total;dur={self.total * 1000:.1f}'
+        )
+
+
+def time_query(execute, sql, params, many, context):
+    timings = _current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def install_query_timer(connection, **kwargs):
+    """
+    Put time_query at the bottom of a connection's execute_wrappers.
+
+    Connections are per thread, and async views run their queries on
+    sync_to_async threads, so the wrapper is installed on every connection
+    as it is opened (connection_created) rather than around each request;
+    the request's timings travel in a contextvar. Inserting at index 0 keeps
+    it clear of execute_wrapper() blocks, which pop from the end.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+connection_created.connect(install_query_timer, dispatch_uid='prime_impex.profiling.install_query_timer')
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current_timings.get()
+        if timings is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that adds top-level render time to the request's timings"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def frame_label(code):
+    filename = code.co_filename
+    prefix = max((p for p in sys.path if p and filename.startswith(p)), key=len, default='')
+    filename = filename[len(prefix):].lstrip(os.sep)
+    # ';' separates frames in collapsed stacks
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack every `interval` seconds"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        labels = {}
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def write_profile(view_name, stacks):
+    """Append collapsed stacks ("frame;frame;frame count" lines) for a view"""
+    if not stacks:
+        return
+    folder = Path(settings.PROFILING_DIR)
+    folder.mkdir(parents=True, exist_ok=True)
+    lines = ''.join(f'{stack} {count}\n' for stack, count in stacks.items())
+    # One write per request on an O_APPEND file keeps workers from interleaving lines
+    with open(folder / f"{view_name.replace(':', '.')}.folded", 'a') as f:
+        f.write(lines)
+
+
+class ServerTimingMiddleware:
+    """
+    Adds Server-Timing to every response and profiles sampled requests.
+
+    Must come after AuthenticationMiddleware: the X-Profile header is only
+    honoured for staff users (and, like all sampling, only on the sync path).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def should_profile(self, request):
+        if request.headers.get('X-Profile') == '1':
+            return request.user.is_staff
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def start(self, request, profile):
+        timings = RequestTimings()
+        request.timings = timings
+        token = _current_timings.set(timings)
+        for alias in connections:
+            # Connections opened before this module was imported
+            install_query_timer(connections[alias])
+        sampler = None
+        if profile:
+            sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL)
+            sampler.start()
+        return timings, token, sampler
+
+    def finish(self, request, response, timings, token, sampler):
+        timings.finish()
+        _current_timings.reset(token)
+        if sampler is not None:
+            sampler.stop()
+            match = request.resolver_match
+            write_profile(match.view_name if match else 'unresolved', sampler.stacks)
+        response['Server-Timing'] = timings.header()
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token, sampler = self.start(request, self.should_profile(request))
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _current_timings.reset(token)
+            if sampler is not None:
+                sampler.stop()
+            raise
+        return self.finish(request, response, timings, token, sampler)
+
+    async def __acall__(self, request):
+        # No sampling (see the module docstring), so request.user, a
+        # synchronous session and user lookup, isn't touched on the event loop
+        timings, token, sampler = self.start(request, profile=False)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _current_timings.reset(token)
+            if sampler is not None:
+                sampler.stop()
+            raise
+        return self.finish(request, response, timings, token, sampler)
@@ -0,0 +1,190 @@
+"""
+N+1 query detection.
+
+Every SQL statement run while detection is on is reduced to a fingerprint
+(literals and IN-lists collapsed) and attributed to where it came from: the
+template line being rendered, or else the innermost project frame. When the
+same fingerprint comes from the same place NPLUSONE_THRESHOLD times or more in
+one request, that's reported with the SQL and the originating stack.
+
+NPLUSONE_DETECTION controls what happens:
+    'off'    middleware is removed from the stack (the production default)
+    'log'    warning on the prime_impex.querycheck logger (DEBUG default)
+    'raise'  NPlusOneError; prime_impex.test_runner turns this on for tests
+
+Outside requests (scripts, tests) wrap code in detect_nplusone().
+"""
+import contextvars
+import logging
+import os
+import re
+import sys
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current_log = contextvars.ContextVar('query_log', default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """SQL with literals and IN-lists collapsed, so same-shape queries compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+# The query wrappers and middleware that sit on every query's stack
+_INFRASTRUCTURE = {
+    os.path.join(os.path.dirname(__file__), name) for name in ('querycheck.py', 'profiling.py', 'metrics.py')
+}
+
+
+def _is_project_file(filename):
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and 'site-packages' not in filename
+        and filename not in _INFRASTRUCTURE
+    )
+
+
+def query_origin(frame):
+    """
+    (origin, stack) for a query issued with `frame` on top.
+
+    origin is "template.html:LINE" while a template is rendering (the innermost
+    node being rendered), otherwise "path.py:LINE in function" for the
+    innermost project frame. stack lists the project frames, outermost first.
+    """
+    origin = None
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        if origin is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            if token is not None and getattr(node, 'origin', None) is not None:
+                origin = f'{node.origin.template_name}:{token.lineno}'
+        if _is_project_file(code.co_filename):
+            location = f'{code.co_filename[len(str(settings.BASE_DIR)) + 1:]}:{frame.f_lineno} in {code.co_name}'
+            stack.append(location)
+            if origin is None:
+                origin = location
+        frame = frame.f_back
+    stack.reverse()
+    return origin or '<unknown>', stack
+
+
+class QueryLog:
+    """Same-shape query counts for one request (or detect_nplusone block)"""
+
+    def __init__(self, label):
+        self.label = label
+        self.counts = {}
+        self.first_seen = {}
+
+    def record(self, sql):
+        origin, stack = query_origin(sys._getframe(1))
+        key = (fingerprint(sql), origin)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if key not in self.first_seen:
+            self.first_seen[key] = (sql, stack)
+
+    def problems(self, threshold):
+        return [(key, count) for key, count in self.counts.items() if count >= threshold]
+
+    def report(self, threshold):
+        lines = []
+        for (_fingerprint, origin), count in self.problems(threshold):
+            sql, stack = self.first_seen[(_fingerprint, origin)]
+            lines.append(f'{count} same-shape queries from {origin} in {self.label}')
+            lines.append(f'    SQL: {sql}')
+            lines.extend(f'      at {location}' for location in stack)
+        return '\n'.join(lines)
+
+
+def log_query(execute, sql, params, many, context):
+    query_log = _current_log.get()
+    if query_log is not None:
+        query_log.record(sql)
+    return execute(sql, params, many, context)
+
+
+def install_query_log(connection, **kwargs):
+    # Same arrangement as prime_impex.profiling.install_query_timer: bottom of
+    # the wrapper stack, on every connection, with per-request state in a contextvar
+    if log_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_query)
+
+
+connection_created.connect(install_query_log, dispatch_uid='prime_impex.querycheck.install_query_log')
+
+
+def check(query_log, mode=None):
+    mode = mode or settings.NPLUSONE_DETECTION
+    report = query_log.report(settings.NPLUSONE_THRESHOLD)
+    if not report:
+        return
+    if mode == 'raise':
+        raise NPlusOneError('N+1 queries detected:\n' + report)
+    logger.warning('N+1 queries detected:\n%s', report)
+
+
+@contextmanager
+def detect_nplusone(label='block', mode=None):
+    """Check the queries run inside the block; `mode` defaults to NPLUSONE_DETECTION"""
+    query_log = QueryLog(label)
+    token = _current_log.set(query_log)
+    for alias in connections:
+        install_query_log(connections[alias])
+    try:
+        yield query_log
+    finally:
+        _current_log.reset(token)
+    check(query_log, mode)
+
+
+class NPlusOneMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.NPLUSONE_DETECTION not in ('log', 'raise'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with detect_nplusone(request.path) as query_log:
+            response = self.get_response(request)
+            self.label(query_log, request)
+        return response
+
+    async def __acall__(self, request):
+        with detect_nplusone(request.path) as query_log:
+            response = await self.get_response(request)
+            self.label(query_log, request)
+        return response
+
+    @staticmethod
+    def label(query_log, request):
+        if request.resolver_match:
+            query_log.label = f'{request.resolver_match.view_name} ({request.path})'
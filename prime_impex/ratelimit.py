@@ -0,0 +1,202 @@
+"""
+Sliding-window rate limiting in the shared cache.
+
+Each limit keeps one counter per fixed window; a request is allowed while
+
+    previous_window_count * (1 - elapsed / window) + current_window_count
+
+stays within the limit, which approximates a true sliding window with two
+cache keys and no timestamps. Limits are named in settings.RATELIMITS:
+
+    RATELIMITS = {'contact': {'ip': '5/10m', 'subnet': '20/10m', 'fingerprint': '3/h'}}
+
+and applied with the decorator, to sync or async views alike:
+
+    @ratelimit('contact', methods=('POST',), fingerprint=inquiry_fingerprint)
+    def contact_view(request): ...
+
+Requests over any limit get a bare 429 with Retry-After before the view runs.
+"""
+import functools
+import ipaddress
+import math
+import re
+import time
+from collections import namedtuple
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from prime_impex.metrics import RATELIMITED
+
+_RATE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'5/10m' -> (5, 600)"""
+    match = _RATE.match(rate)
+    if not match:
+        raise ValueError(f'Invalid rate {rate!r}; expected e.g. "5/m" or "20/10m"')
+    limit, count, unit = match.groups()
+    return int(limit), int(count or 1) * _UNITS[unit]
+
+
+def client_ip(request):
+    """
+    The client address. With RATELIMIT_PROXY_COUNT proxies in front (the host's
+    load balancer), it's that many entries from the right of X-Forwarded-For.
+    """
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_subnet(ip):
+    """/24 for IPv4, /64 for IPv6: what one host or small network can rotate through"""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return ip
+    prefix = 24 if address.version == 4 else 64
+    return str(ipaddress.ip_network(f'{address}/{prefix}', strict=False))
+
+
+Window = namedtuple('Window', 'kind limit length previous_key current_key elapsed')
+
+
+def limit_windows(scope, request, fingerprint, now):
+    """A Window for each limit configured for `scope` that applies to this request"""
+    ip = client_ip(request)
+    values = {'ip': ip, 'subnet': client_subnet(ip)}
+    if fingerprint is not None:
+        values['fingerprint'] = fingerprint(request)
+    windows = []
+    for kind, rate in settings.RATELIMITS.get(scope, {}).items():
+        value = values.get(kind)
+        if not value:
+            continue
+        limit, length = parse_rate(rate)
+        index = int(now // length)
+        base = f'rl:{scope}:{kind}:{value}:{length}'
+        windows.append(Window(kind, limit, length, f'{base}:{index - 1}', f'{base}:{index}', now - index * length))
+    return windows
+
+
+def retry_after(previous, current, limit, length, elapsed):
+    """Seconds until the sliding estimate drops back within `limit`"""
+    if current <= limit and previous:
+        # The previous window's weight decays until the estimate fits
+        wait = length * (1 - (limit - current) / previous) - elapsed
+    else:
+        # The current window alone is over; it decays through the next one
+        wait = length - elapsed + length * (1 - limit / current)
+    return max(1, math.ceil(wait))
+
+
+def too_many_requests(seconds):
+    response = HttpResponse('Too many requests. Please try again later.\n', status=429, content_type='text/plain')
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def evaluate(scope, windows, previous_counts, counts):
+    """Retry-After of the most restrictive exceeded limit, or None when all pass"""
+    worst = None
+    for window in windows:
+        previous = previous_counts.get(window.previous_key, 0)
+        current = counts[window.current_key]
+        if previous * (1 - window.elapsed / window.length) + current > window.limit:
+            RATELIMITED.inc(scope, window.kind)
+            wait = retry_after(previous, current, window.limit, window.length, window.elapsed)
+            worst = wait if worst is None else max(worst, wait)
+    return worst
+
+
+def check(scope, request, fingerprint=None):
+    """Count this request against `scope`; returns Retry-After seconds if it's over a limit"""
+    windows = limit_windows(scope, request, fingerprint, time.time())
+    if not windows:
+        return None
+    previous_counts = cache.get_many([window.previous_key for window in windows])
+    counts = {window.current_key: incr(window.current_key, window.length) for window in windows}
+    return evaluate(scope, windows, previous_counts, counts)
+
+
+async def acheck(scope, request, fingerprint=None):
+    windows = limit_windows(scope, request, fingerprint, time.time())
+    if not windows:
+        return None
+    previous_counts = await cache.aget_many([window.previous_key for window in windows])
+    counts = {window.current_key: await aincr(window.current_key, window.length) for window in windows}
+    return evaluate(scope, windows, previous_counts, counts)
+
+
+def incr(key, length):
+    # A window's counter is read as "previous" during the next window, so it lives for two
+    if cache.add(key, 1, timeout=2 * length):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.set(key, 1, timeout=2 * length)
+        return 1
+
+
+async def aincr(key, length):
+    if await cache.aadd(key, 1, timeout=2 * length):
+        return 1
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, timeout=2 * length)
+        return 1
+
+
+def ratelimit(scope, methods=None, when=None, fingerprint=None):
+    """
+    Apply the settings.RATELIMITS[scope] limits to a view.
+
+    methods: only count these HTTP methods (default: all).
+    when: predicate on the request; only matching requests are counted.
+    fingerprint: function returning a key for the submitted content, used by
+        a 'fingerprint' limit (None skips it for that request).
+    """
+
+    def applies(request):
+        if not settings.RATELIMIT_ENABLED:
+            return False
+        if methods is not None and request.method not in methods:
+            return False
+        return when is None or when(request)
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if applies(request):
+                    wait = await acheck(scope, request, fingerprint)
+                    if wait is not None:
+                        return too_many_requests(wait)
+                return await view(request, *args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if applies(request):
+                wait = check(scope, request, fingerprint)
+                if wait is not None:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
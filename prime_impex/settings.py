@@ -12,14 +12,17 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Load environment variables from .env (local development). Hosted
+# environments set real env vars, so skip importing dotenv when there is no file.
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -32,14 +35,13 @@ DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
 # ✅ Allowed hosts for local testing and production
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '127.0.0.1,localhost').split(',')
-print("---------------------------------------LOADED ALLOWED_HOSTS =", ALLOWED_HOSTS)
 
 
 # Application definition
 
 # ✅ Add all apps including products and blog
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'prime_impex.apps.LazyAdminConfig',  # django.contrib.admin without startup autodiscover
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -49,14 +51,21 @@ INSTALLED_APPS = [
     'contact',
     'products',
     'blog',
+    'api',
 ]
 
 MIDDLEWARE = [
+    'prime_impex.log.RequestLogMiddleware',
+    'prime_impex.metrics.MetricsMiddleware',
+    'prime_impex.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'prime_impex.pagecache.PageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'prime_impex.profiling.ServerTimingMiddleware',
+    'prime_impex.querycheck.NPlusOneMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,7 +74,8 @@ ROOT_URLCONF = 'prime_impex.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for the Server-Timing header
+        'BACKEND': 'prime_impex.profiling.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],  # 👈 global templates
         'APP_DIRS': True,
         'OPTIONS': {
@@ -74,20 +84,157 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'prime_impex.context_processors.chrome',
             ],
+            'libraries': {
+                'assets': 'prime_impex.asset_tags',
+            },
         },
     },
 ]
+
+# ✅ Templates precompiled by scripts/compile_template.py (whitespace collapsed,
+# image sizes and WebP sources filled in). In production they're loaded
+# first; templates missing from the build fall back to the sources
+COMPILED_TEMPLATES_DIR = BASE_DIR / 'build' / 'templates'
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False  # Django refuses APP_DIRS together with explicit loaders
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            ('django.template.loaders.filesystem.Loader', [COMPILED_TEMPLATES_DIR]),
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
 WSGI_APPLICATION = 'prime_impex.wsgi.application'
 
+# ✅ Async views: prime_impex/asgi.py turns this on so uvicorn workers serve
+# the async variants of the public views; gunicorn sync workers keep the sync ones
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# ✅ Profiling (prime_impex/profiling.py): every response gets Server-Timing;
+# this fraction of requests (and staff requests sent with "X-Profile: 1") also
+# writes a sampled flamegraph stack to PROFILING_DIR/<view_name>.folded
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_INTERVAL = float(os.getenv('PROFILING_INTERVAL', '0.005'))  # seconds between samples
+PROFILING_DIR = Path(os.getenv('PROFILING_DIR', BASE_DIR / 'profiles'))
+
+# ✅ Metrics (prime_impex/metrics.py), served at /metrics. gunicorn.conf.py sets
+# METRICS_DIR so the workers' numbers are aggregated; empty = this process only
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))  # seconds
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # bearer token for /metrics; without one it 404s unless DEBUG
+
+# ✅ N+1 query detection (prime_impex/querycheck.py): 'off', 'log' or 'raise'.
+# Logs in development; the test runner switches it to 'raise'
+NPLUSONE_DETECTION = os.getenv('NPLUSONE_DETECTION', 'log' if DEBUG else 'off')
+NPLUSONE_THRESHOLD = int(os.getenv('NPLUSONE_THRESHOLD', '3'))  # same-shape queries from one place
+TEST_RUNNER = 'prime_impex.test_runner.DiscoverRunner'
+
+# ✅ Cache: Redis when REDIS_URL is set, shared by every worker and server.
+# The in-memory fallback is per process, so rate limits count per worker and
+# posts made live by the Procfile's scheduler reach cached listings only as
+# those pages expire (PAGE_CACHE_ROUTES ttl)
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# ✅ Cached template fragments (base.html chrome, home page sections), keyed by
+# prime_impex.assets.asset_version(); off under DEBUG so template edits show up
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', '0' if DEBUG else str(24 * 60 * 60)))
+
+# ✅ Compression (prime_impex/compression.py): brotli when installed, else gzip,
+# for text-like responses of at least this many bytes
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '512'))
+
+# ✅ Page cache (prime_impex/pagecache.py) for cookie-free GETs: url name ->
+# TTL in seconds and the content versions (prime_impex/versions.py) the page
+# shows. Expired or outdated pages are served stale for up to
+# PAGE_CACHE_STALE_TTL more seconds while one request re-renders them.
+# Blog posts aren't listed: each view counts towards views_count. Every page
+# depends on 'catalog' through the footer's category links
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'True') == 'True'
+PAGE_CACHE_STALE_TTL = int(os.getenv('PAGE_CACHE_STALE_TTL', str(24 * 60 * 60)))
+PAGE_CACHE_LOCK_TIMEOUT = 30  # seconds before a stuck refresh can be retried
+PAGE_CACHE_ROUTES = {
+    'home': {'ttl': 5 * 60, 'versions': ['catalog', 'blog']},
+    'about': {'ttl': 60 * 60, 'versions': ['catalog']},
+    'careers': {'ttl': 60 * 60, 'versions': ['catalog']},
+    'quality': {'ttl': 60 * 60, 'versions': ['catalog']},
+    'privacy': {'ttl': 60 * 60, 'versions': ['catalog']},
+    'terms': {'ttl': 60 * 60, 'versions': ['catalog']},
+    # Searches skip the cache so they stay rate limited
+    'products:product_list': {'ttl': 5 * 60, 'versions': ['catalog'], 'skip_params': ['q']},
+    'products:product_detail': {'ttl': 10 * 60, 'versions': ['catalog']},
+    'blog:blog_list': {'ttl': 10 * 60, 'versions': ['blog']},
+}
+
+# ✅ Contact spam filter (contact/spam.py): submissions sent sooner than this
+# after the form was served, or repeating a recent inquiry from the same
+# email/phone, are dropped without saving or notifying
+CONTACT_MIN_SUBMIT_SECONDS = int(os.getenv('CONTACT_MIN_SUBMIT_SECONDS', '3'))
+CONTACT_FORM_MAX_AGE = 24 * 60 * 60  # seconds a served form stays valid
+CONTACT_DUPLICATE_WINDOW = int(os.getenv('CONTACT_DUPLICATE_WINDOW', str(60 * 60)))
+CONTACT_DUPLICATE_SIMILARITY = 0.8  # estimated Jaccard similarity of message shingles
+
+# ✅ Rate limits (prime_impex/ratelimit.py): "requests/window" per client IP,
+# per /24 (or /64) subnet and per submitted-content fingerprint
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True') == 'True'
+RATELIMIT_PROXY_COUNT = int(os.getenv('RATELIMIT_PROXY_COUNT', '0'))  # proxies adding X-Forwarded-For
+RATELIMITS = {
+    'contact': {'ip': '5/10m', 'subnet': '20/10m', 'fingerprint': '3/h'},
+    'search': {'ip': '30/m', 'subnet': '120/m'},
+}
+
+# ✅ Logging (prime_impex/log.py): JSON lines on stderr, written by a background
+# thread so requests never block on the stream. The per-request access log is
+# sampled; WARNING and above are always kept
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_REQUEST_SAMPLE_RATE = float(os.getenv('LOG_REQUEST_SAMPLE_RATE', '1' if DEBUG else '0.1'))
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {'()': 'prime_impex.log.RequestContextFilter'},
+        'sampling': {
+            '()': 'prime_impex.log.SamplingFilter',
+            'rates': {'prime_impex.request': LOG_REQUEST_SAMPLE_RATE},
+        },
+    },
+    'handlers': {
+        'queue': {
+            'class': 'prime_impex.log.QueueStreamHandler',
+            'stream': 'ext://sys.stderr',
+            'filters': ['request_context', 'sampling'],
+        },
+    },
+    'root': {'handlers': ['queue'], 'level': LOG_LEVEL},
+    'loggers': {
+        # Replaces Django's DEBUG-only console handler; django.request still
+        # reports 4xx/5xx responses and unhandled exceptions
+        'django': {'handlers': ['queue'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# SQLITE_PATH points a run elsewhere, e.g. the startup test at a throwaway copy
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -131,9 +278,36 @@ STATIC_URL = "https://patel-universal-traders-1.onrender.com/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# ✅ CSS/JS bundles built by scripts/build_assets.py into static/dist/ (run it
+# before collectstatic). Until then {% stylesheet %}/{% script %} link the sources
+ASSET_MANIFEST = BASE_DIR / 'static' / 'dist' / 'manifest.json'
+ASSET_BUNDLES = {
+    'base.css': ['css/style.css', 'css/cursor.css'],
+    'base.js': ['js/cursor.js'],
+    'contact.css': ['css/oldschool.css'],
+}
+# url name -> template whose first screen gets its critical CSS inlined
+CRITICAL_CSS = {
+    'home': 'home.html',
+    'products:product_list': 'products/product_list.html',
+    'blog:blog_list': 'blog/blog_list.html',
+}
+
 # ✅ Media files (user uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Uploads are stored under the hash of their content (prime_impex/storage.py),
+# so identical uploads share a file and /media/ URLs never change content:
+# serve them with "Cache-Control: public, max-age=31536000, immutable".
+# `manage.py gc_media` removes files nothing refers to
+STORAGES = {
+    'default': {'BACKEND': 'prime_impex.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# ✅ Catalog import (products/importer.py): image file names in an imported
+# CSV are looked up in this server-side folder, by both the admin upload and
+# `manage.py import_products` (which can point elsewhere with --images)
+PRODUCT_IMPORT_IMAGE_DIR = Path(os.getenv('PRODUCT_IMPORT_IMAGE_DIR', BASE_DIR / 'imports'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -163,7 +337,8 @@ SITE_KEYWORDS = 'rice exporters India, basmati rice, non-basmati rice, organic r
 
 # ✅ Security Settings (Production)
 if not DEBUG:
-    SECURE_SSL_REDIRECT = True
+    # Local benchmarks run DEBUG=False over plain HTTP and switch this off
+    SECURE_SSL_REDIRECT = os.getenv('SECURE_SSL_REDIRECT', 'True') == 'True'
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     SECURE_BROWSER_XSS_FILTER = True
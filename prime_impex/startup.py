@@ -0,0 +1,93 @@
+"""
+Process startup helpers: warming a preloaded gunicorn master and measuring
+time-to-first-response.
+"""
+import io
+import os
+
+# Templates compiled into the master before workers fork. These are the pages
+# every worker would otherwise parse on its own first hits.
+WARM_TEMPLATES = [
+    'base.html',
+    'home.html',
+    'partials/hero.html',
+    'partials/why.html',
+    'products/product_list.html',
+    'products/product_detail.html',
+    'blog/blog_list.html',
+    'blog/blog_detail.html',
+    'contact/contact.html',
+]
+
+
+def warm_up():
+    """
+    Import the URLconf and views and compile the main templates.
+
+    Called in the gunicorn master with preload_app (see gunicorn.conf.py) so
+    forked workers share these modules copy-on-write instead of each
+    importing them on its first request.
+    """
+    from django.db import connections
+    from django.template import TemplateDoesNotExist
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    # Resolving the reverse maps imports every (non-lazy) included URLconf and view
+    resolver.reverse_dict
+
+    for name in WARM_TEMPLATES:
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            pass
+
+    # The autocomplete index, built once here and shared by the workers
+    from products.suggest import get_index
+
+    get_index()
+
+    # Never hand a database connection opened in the master to the workers
+    connections.close_all()
+
+
+def first_response(path='/about/'):
+    """
+    Boot Django in this process and serve a single GET through the WSGI app.
+
+    Returns the response status code. Used by scripts/startup_report.py and
+    the startup-budget test to time a cold start end to end.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prime_impex.settings')
+
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    host = next(
+        (h for h in settings.ALLOWED_HOSTS if h and h[0] not in '.*'),
+        'localhost',
+    )
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '443',
+        'HTTP_HOST': host,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        # https keeps SECURE_SSL_REDIRECT from short-circuiting the render
+        'wsgi.url_scheme': 'https',
+    }
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    response = application(environ, start_response)
+    b''.join(response)
+    if hasattr(response, 'close'):
+        response.close()
+    return statuses[0]
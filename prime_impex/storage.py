@@ -0,0 +1,130 @@
+"""
+Content-addressed media storage (STORAGES['default']).
+
+An upload is stored under the hash of its bytes instead of its file name:
+
+    products/IMG-20251112-WA0002.jpg  ->  products/3f/a9/3fa94c...e1.jpg
+
+The first two pairs of hex digits shard the directory, so no directory
+grows past a few hundred files. Uploading the same image again (or to the
+same product twice) reuses the existing file instead of writing a copy with
+a random suffix, and the same bytes uploaded under another directory
+(a product photo reused for a blog post) are hard-linked, not copied. A
+name never changes content, so MEDIA_URL can be served with a far-future,
+immutable Cache-Control.
+
+Names that are already content-addressed, like the resized variants
+save_variants() derives from one (<hash>-800.webp), are stored as given.
+Files nothing refers to any more are removed by `manage.py gc_media`;
+a variant counts as referred to while its original is.
+"""
+import hashlib
+import os
+import posixpath
+import re
+from io import BytesIO
+from pathlib import Path
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.utils import validate_file_name
+
+HASH_LENGTH = 32  # hex digits of sha256 kept; 128 bits
+CHUNK_SIZE = 64 * 1024
+CONTENT_ADDRESSED = re.compile(rf'(?:^|/)([0-9a-f]{{2}})/([0-9a-f]{{2}})/\1\2[0-9a-f]{{{HASH_LENGTH - 4}}}[^/]*$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def is_content_addressed(name):
+    return CONTENT_ADDRESSED.search(name) is not None
+
+
+def hashed_name(name, digest):
+    """upload_to directory of `name` / shards / digest + lowercased extension"""
+    directory, filename = posixpath.split(name)
+    ext = posixpath.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:2], digest[2:4], f'{digest}{ext}')
+
+
+def save_variants(name, image, widths):
+    """
+    (name, width) of resized WebP copies of the Pillow `image` stored as
+    `name`, one per width narrower than the image, written next to it as
+    <name>-<width>.webp unless they exist already
+    """
+    from PIL import Image
+
+    width, height = image.size
+    stem = posixpath.splitext(name)[0]
+    variants = []
+    for variant_width in widths:
+        if variant_width >= width:
+            break
+        variant = f'{stem}-{variant_width}.webp'
+        if not default_storage.exists(variant):
+            resized = image.convert('RGBA' if image.mode in ('RGBA', 'P') else 'RGB')
+            resized = resized.resize((variant_width, round(height * variant_width / width)), Image.LANCZOS)
+            buffer = BytesIO()
+            resized.save(buffer, 'WEBP', quality=80, method=6)
+            # Stored as named when the original is content-addressed; otherwise
+            # the storage picks the name
+            variant = default_storage.save(variant, ContentFile(buffer.getvalue()))
+        variants.append((variant, variant_width))
+    return variants
+
+
+_stored_variants = {}
+
+
+def stored_variants(name, widths):
+    """
+    (name, width) of the variants save_variants() left next to `name`, without
+    opening the image. Found ones are remembered per process: a
+    content-addressed name and its variants never change, and gc_media keeps
+    the variants as long as the name is referred to.
+    """
+    key = (name, tuple(widths))
+    if key not in _stored_variants:
+        stem = posixpath.splitext(name)[0]
+        variants = [(f'{stem}-{width}.webp', width) for width in widths]
+        variants = [(variant, width) for variant, width in variants if default_storage.exists(variant)]
+        if not variants:
+            return []  # looked up again: an import may add them later
+        _stored_variants[key] = variants
+    return _stored_variants[key]
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+        if not is_content_addressed(name):
+            name = hashed_name(name, content_hash(content))
+        if self.exists(name) or self.link_existing(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def link_existing(self, name):
+        """Hard-link the same content from another upload directory; False when there is none"""
+        target = Path(self.path(name))
+        shard = posixpath.join(*name.split('/')[-3:])
+        for existing in Path(self.location).glob(f'*/{shard}'):
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.link(existing, target)
+                return True
+            except OSError:
+                return False  # another filesystem, or links not supported: write a copy
+        return False
@@ -0,0 +1,45 @@
+import importlib
+import logging
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner as BaseDiscoverRunner
+from django.urls import clear_url_caches
+
+from prime_impex.log import QueueStreamHandler
+
+# URLconfs that pick their views by settings.ASYNC_VIEWS when imported
+URLCONFS = ('products.urls', 'blog.urls', 'contact.urls', 'api.urls', 'prime_impex.urls')
+
+
+class DiscoverRunner(BaseDiscoverRunner):
+    """
+    The default runner, with N+1 queries failing the request that runs them
+    and without a log line per test-client request or expected 4xx: the JSON
+    log handler only writes warnings and errors. Template fragments and pages
+    aren't cached, so query counts don't depend on test order.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.NPLUSONE_DETECTION = 'raise'
+        settings.FRAGMENT_CACHE_TIMEOUT = 0
+        settings.PAGE_CACHE_ENABLED = False
+        logging.getLogger('prime_impex.request').setLevel(logging.WARNING)
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, QueueStreamHandler):
+                handler.setLevel(logging.WARNING)
+
+
+def use_async_views(test):
+    """Route requests to the async views, as under ASGI, until `test` ends"""
+
+    def load(async_views):
+        with override_settings(ASYNC_VIEWS=async_views):
+            for name in URLCONFS:
+                importlib.reload(importlib.import_module(name))
+        clear_url_caches()
+
+    test.addCleanup(load, settings.ASYNC_VIEWS)
+    load(True)
@@ -0,0 +1,591 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from prime_impex.ratelimit import ratelimit, retry_after
+
+BOOT = 'from prime_impex.startup import first_response; print(first_response())'
+# Boots Django and resolves a public page, then lists what that loaded
+IMPORTS = """
+import json, sys
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.urls import get_resolver, reverse
+get_wsgi_application()
+get_resolver().resolve('/about/')
+reverse('products:product_list')
+print(json.dumps({'modules': sorted(sys.modules), 'connected': connection.connection is not None}))
+"""
+
+
+class StartupTests(SimpleTestCase):
+    """Guards cold start; see scripts/startup_report.py for the breakdown"""
+
+    def boot(self, code, **env):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'prime_impex.settings', **env}
+        proc = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env,
+                              capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        return proc.stdout
+
+    def test_serving_a_page_loads_no_admin_and_no_database(self):
+        import json
+
+        loaded = json.loads(self.boot(IMPORTS, DEBUG='False', SQLITE_PATH=os.devnull))
+        self.assertFalse(loaded['connected'])
+        deferred = {'prime_impex.admin_urls', 'products.admin', 'blog.admin', 'contact.admin',
+                    'django.conf.urls.static'}
+        self.assertEqual(deferred & set(loaded['modules']), set())
+
+    def test_time_to_first_response_within_budget(self):
+        """Opt-in, as wall-clock time depends on the machine: STARTUP_BUDGET_MS=2000 manage.py test"""
+        import tempfile
+
+        budget_ms = os.getenv('STARTUP_BUDGET_MS')
+        if not budget_ms:
+            self.skipTest('set STARTUP_BUDGET_MS to time a cold start')
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {'SQLITE_PATH': os.path.join(tmp, 'db.sqlite3')}
+            self.boot('from django.core.management import execute_from_command_line; '
+                      'execute_from_command_line(["manage.py", "migrate", "-v0"])', **env)
+            timings = []
+            # Best of three, so one slow disk read on a busy machine does not fail the build
+            for _ in range(3):
+                start = time.perf_counter()
+                status = self.boot(BOOT, **env)
+                timings.append((time.perf_counter() - start) * 1000)
+                self.assertEqual(status.strip(), '200')
+
+        self.assertLess(
+            min(timings), float(budget_ms),
+            f'Cold start took {min(timings):.0f} ms (budget {float(budget_ms):.0f} ms). '
+            'Run scripts/startup_report.py to see which imports grew.'
+        )
+
+
+@override_settings(RATELIMITS={'search': {'ip': '2/m', 'subnet': '3/m'}})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_search_over_limit_gets_429_with_retry_after(self):
+        url = reverse('products:product_list') + '?q=basmati'
+        for _ in range(2):
+            self.assertEqual(self.client.get(url, secure=True).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_browsing_without_query_is_not_counted(self):
+        for _ in range(4):
+            response = self.client.get(reverse('products:product_list'), secure=True)
+            self.assertEqual(response.status_code, 200)
+
+    def test_subnet_limit_spans_addresses(self):
+        url = reverse('products:product_list') + '?q=basmati'
+        statuses = [
+            self.client.get(url, secure=True, REMOTE_ADDR=f'203.0.113.{i}').status_code
+            for i in range(1, 5)
+        ]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    async def test_async_view(self):
+        @ratelimit('search')
+        async def view(request):
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        statuses = [(await view(request)).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_retry_after(self):
+        # Current window alone over the limit: wait out this window and part of the next
+        self.assertEqual(retry_after(previous=0, current=4, limit=2, length=60, elapsed=30), 60)
+        # Within the limit once the previous window's weight decays
+        self.assertEqual(retry_after(previous=4, current=1, limit=2, length=60, elapsed=0), 45)
+
+
+@override_settings(FRAGMENT_CACHE_TIMEOUT=60)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        from products.models import ProductCategory
+
+        ProductCategory.objects.create(name='Basmati Rice')
+
+    def get(self, name):
+        response = self.client.get(reverse(name), secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_chrome_renders_from_cache(self):
+        with self.assertNumQueries(1):  # footer categories
+            self.get('about')
+        with self.assertNumQueries(0):
+            self.get('about')
+
+    def test_nav_state_is_per_section(self):
+        self.get('products:product_list')
+        about = self.get('about')
+        self.assertIn('class="nav-link active">About Us', about)
+        self.assertNotIn('class="nav-link active">Products', about)
+
+    def test_footer_follows_category_changes(self):
+        from products.models import ProductCategory
+
+        self.assertIn('?category=basmati-rice">Basmati Rice</a>', self.get('about'))
+        ProductCategory.objects.create(name='Organic Rice')
+        self.assertIn('?category=organic-rice">Organic Rice</a>', self.get('about'))
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, FRAGMENT_CACHE_TIMEOUT=60)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, **kwargs):
+        response = self.client.get(reverse(name), secure=True, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def wait_for_refresh(self):
+        from concurrent.futures import wait
+
+        from prime_impex import pagecache
+
+        wait(list(pagecache.pending))
+
+    def expire(self, name):
+        from prime_impex.pagecache import cache_key
+
+        key = cache_key(RequestFactory().get(reverse(name), secure=True))
+        entry = cache.get(key)
+        entry['expires'] = 0
+        cache.set(key, entry)
+
+    def test_second_request_is_served_from_cache(self):
+        self.assertEqual(self.get('about')['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.get('about')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'About Us')
+
+    def test_hits_are_counted_under_their_view(self):
+        from prime_impex.metrics import REQUESTS
+
+        before = dict(REQUESTS.values)
+        self.get('about')
+        self.assertEqual(self.get('about')['X-Page-Cache'], 'hit')
+        self.assertEqual(REQUESTS.values[('about', '2xx')] - before.get(('about', '2xx'), 0), 2)
+        self.assertEqual(REQUESTS.values.get(('unresolved', '2xx'), 0), before.get(('unresolved', '2xx'), 0))
+
+    def test_requests_with_cookies_bypass_cache(self):
+        self.get('about')
+        self.client.cookies['sessionid'] = 'abc'
+        self.assertNotIn('X-Page-Cache', self.get('about'))
+
+    def test_expired_page_is_served_stale_then_refreshed(self):
+        self.get('about')
+        self.expire('about')
+        self.assertEqual(self.get('about')['X-Page-Cache'], 'stale')
+        self.wait_for_refresh()
+        self.assertEqual(self.get('about')['X-Page-Cache'], 'hit')
+
+    def test_version_bump_makes_page_stale(self):
+        from prime_impex.versions import bump_version
+
+        self.get('about')
+        bump_version('catalog')
+        self.assertEqual(self.get('about')['X-Page-Cache'], 'stale')
+        self.wait_for_refresh()
+        self.assertEqual(self.get('about')['X-Page-Cache'], 'hit')
+
+    def test_search_is_not_cached(self):
+        self.client.get(reverse('products:product_list'), {'q': 'rice'}, secure=True)
+        response = self.client.get(reverse('products:product_list'), {'q': 'rice'}, secure=True)
+        self.assertNotIn('X-Page-Cache', response)
+
+    async def test_async_request(self):
+        await self.async_client.get(reverse('about'), secure=True)
+        response = await self.async_client.get(reverse('about'), secure=True)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+
+class ChromeTests(TestCase):
+    async def test_async_view_loads_footer_categories_ahead(self):
+        from django.core.exceptions import SynchronousOnlyOperation
+        from django.shortcuts import render
+        from django.test import AsyncRequestFactory
+
+        from products.models import ProductCategory
+        from products.views import product_list_async
+
+        await ProductCategory.objects.acreate(name='Sella Rice', slug='sella-rice')
+        response = await product_list_async(AsyncRequestFactory().get('/products/', secure=True))
+        self.assertContains(response, '?category=sella-rice">Sella Rice</a>')
+
+        # Rendering the footer on the event loop without it queries, which the ORM refuses
+        with self.assertRaises(SynchronousOnlyOperation):
+            render(AsyncRequestFactory().get('/'), 'about.html')
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        from django.contrib.auth.models import User
+
+        cache.clear()
+        profiles = tempfile.TemporaryDirectory()
+        self.addCleanup(profiles.cleanup)
+        self.profiles = profiles.name
+        settings_override = override_settings(PROFILING_DIR=self.profiles, PROFILING_INTERVAL=0.001)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', is_staff=True)
+
+    def test_header_on_every_response(self):
+        response = self.client.get(reverse('about'), secure=True)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", template;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+
+    def test_sampler_records_the_target_thread(self):
+        import threading
+
+        from prime_impex.profiling import StackSampler
+
+        done = threading.Event()
+
+        def busy_rice_loop():
+            while not done.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_rice_loop)
+        worker.start()
+        sampler = StackSampler(worker.ident, 0.001)
+        sampler.start()
+        time.sleep(0.05)
+        sampler.stop()
+        done.set()
+        worker.join()
+        self.assertTrue(sampler.stacks)
+        self.assertTrue(all('busy_rice_loop' in stack for stack in sampler.stacks))
+
+    def profile_request(self, user):
+        from prime_impex.profiling import ServerTimingMiddleware
+
+        def view(request):
+            time.sleep(0.05)
+            return HttpResponse()
+
+        request = RequestFactory().get('/', HTTP_X_PROFILE='1')
+        request.user = user
+        request.resolver_match = type('Match', (), {'view_name': 'test:slow'})()
+        return ServerTimingMiddleware(view)(request)
+
+    def test_staff_x_profile_writes_folded_stacks(self):
+        from django.contrib.auth.models import AnonymousUser
+
+        self.profile_request(AnonymousUser())
+        self.assertEqual(os.listdir(self.profiles), [])
+        self.assertIn('Server-Timing', self.profile_request(self.staff))
+        with open(os.path.join(self.profiles, 'test.slow.folded')) as f:
+            self.assertIn('view (', f.read())
+
+    async def test_async_staff_x_profile_is_not_sampled(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('about'), secure=True, headers={'X-Profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertEqual(os.listdir(self.profiles), [])
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        import tempfile
+
+        from prime_impex import metrics
+
+        # Start from zero, and give the process its numbers back afterwards
+        for metric in metrics.REGISTRY.values():
+            self.addCleanup(setattr, metric, 'values', metric.values)
+            metric.values = {}
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        settings_override = override_settings(METRICS_DIR=tmp.name, METRICS_TOKEN='s3cret')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def scrape(self, token='s3cret'):
+        from prime_impex.metrics import metrics_view
+
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return metrics_view(RequestFactory().get('/metrics', headers=headers))
+
+    def exited_pid(self):
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        return process.pid
+
+    def test_token(self):
+        from django.http import Http404
+
+        self.assertEqual(self.scrape(token='wrong').status_code, 403)
+        self.assertEqual(self.scrape(token=None).status_code, 403)
+        self.assertEqual(self.scrape().status_code, 200)
+        with override_settings(METRICS_TOKEN='', DEBUG=False), self.assertRaises(Http404):
+            self.scrape(token=None)
+        with override_settings(METRICS_TOKEN='', DEBUG=True):
+            self.assertEqual(self.scrape(token=None).status_code, 200)
+
+    def test_counters_and_histograms_are_summed_over_workers(self):
+        import json
+
+        from prime_impex import metrics
+
+        metrics.NOTIFICATIONS.inc('email', 'sent')
+        metrics.DB_QUERIES.observe(2, 'home')
+        other = {
+            'notifications_total': [[['email', 'sent'], 2], [['whatsapp', 'failed'], 1]],
+            'db_queries_per_request': [[['home'], [0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1.0]]],
+        }
+        running, exited = os.getppid(), self.exited_pid()
+        (self.dir / f'{running}.json').write_text(json.dumps(other))
+        (self.dir / f'{exited}.json').write_text(json.dumps(other))
+
+        for _ in range(2):  # the exited worker's numbers are adopted, not lost or counted twice
+            body = self.scrape().content.decode()
+            self.assertIn('# TYPE notifications_total counter', body)
+            self.assertIn('notifications_total{channel="email",outcome="sent"} 5', body)
+            self.assertIn('notifications_total{channel="whatsapp",outcome="failed"} 2', body)
+            self.assertIn('# TYPE db_queries_per_request histogram', body)
+            self.assertIn('db_queries_per_request_bucket{view="home",le="1"} 2', body)
+            self.assertIn('db_queries_per_request_bucket{view="home",le="2"} 3', body)
+            self.assertIn('db_queries_per_request_bucket{view="home",le="+Inf"} 3', body)
+            self.assertIn('db_queries_per_request_sum{view="home"} 4.000000', body)
+            self.assertIn('db_queries_per_request_count{view="home"} 3', body)
+        self.assertEqual(
+            sorted(path.name for path in self.dir.iterdir()), sorted([f'{running}.json', f'{os.getpid()}.json'])
+        )
+
+
+class LoggingTests(TestCase):
+    def setUp(self):
+        import logging
+        from io import StringIO
+
+        from prime_impex.log import QueueStreamHandler, RequestContextFilter, access_logger
+
+        self.stream = StringIO()
+        self.handler = QueueStreamHandler(self.stream)
+        self.handler.addFilter(RequestContextFilter())
+        access_logger.addHandler(self.handler)
+        self.addCleanup(access_logger.removeHandler, self.handler)
+        self.addCleanup(self.handler.close)
+        # The test runner raises it to WARNING; and keep these records off stderr
+        self.addCleanup(access_logger.setLevel, access_logger.level)
+        access_logger.setLevel(logging.INFO)
+        self.addCleanup(setattr, access_logger, 'propagate', True)
+        access_logger.propagate = False
+
+    def records(self):
+        import json
+
+        self.handler.stop()  # drains the queue into the stream
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_access_record_carries_request_context(self):
+        response = self.client.get(reverse('about'), secure=True, headers={'X-Request-ID': 'edge-42.a'})
+        self.assertEqual(response['X-Request-ID'], 'edge-42.a')
+        response = self.client.get(reverse('about'), secure=True, headers={'X-Request-ID': 'no spaces!'})
+        generated = response['X-Request-ID']
+        self.assertRegex(generated, r'^[0-9a-f]{16}$')
+
+        first, second = self.records()
+        self.assertEqual(first['level'], 'INFO')
+        self.assertEqual(first['logger'], 'prime_impex.request')
+        self.assertEqual(first['message'], 'GET /about/ 200')
+        self.assertEqual((first['request_id'], first['view']), ('edge-42.a', 'about'))
+        self.assertEqual((first['method'], first['path'], first['status']), ('GET', '/about/', 200))
+        self.assertIsInstance(first['latency_ms'], float)
+        self.assertRegex(first['ts'], r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}\+00:00$')
+        self.assertEqual(second['request_id'], generated)
+
+    def test_sampling_keeps_or_drops_whole_requests(self):
+        import logging
+
+        from prime_impex.log import SamplingFilter, request_id_var
+
+        sampling = SamplingFilter({'prime_impex.request': 0.25})
+
+        def kept(request_id, level=logging.INFO, name='prime_impex.request'):
+            token = request_id_var.set(request_id)
+            try:
+                return sampling.filter(logging.LogRecord(name, level, '', 0, 'x', None, None))
+            finally:
+                request_id_var.reset(token)
+
+        decisions = [kept(f'{n:016x}') for n in range(2000)]
+        self.assertTrue(400 < sum(decisions) < 600, sum(decisions))
+        self.assertEqual(decisions, [kept(f'{n:016x}') for n in range(2000)])
+        dropped = f'{decisions.index(False):016x}'
+        self.assertTrue(kept(dropped, level=logging.WARNING))
+        self.assertTrue(kept(dropped, name='contact.views'))
+        self.assertTrue(kept(None))
+
+    def test_queue_handler_formats_in_its_listener(self):
+        import os
+
+        from prime_impex.log import access_logger
+
+        items = ['sella']
+        access_logger.info('stock %s', items)
+        items.append('steam')  # after the call: not in the message
+        try:
+            raise ValueError('bad row')
+        except ValueError:
+            access_logger.error('import failed', exc_info=True, extra={'line': 7})
+        listener = self.handler.listener
+        self.assertEqual(self.handler.pid, os.getpid())
+
+        # As in a forked worker: the first record starts a queue and listener of its own
+        self.handler.pid = None
+        access_logger.info('after fork')
+        self.assertIsNot(self.handler.listener, listener)
+        listener.stop()
+
+        stock, failed, after = self.records()
+        self.assertEqual(stock['message'], "stock ['sella']")
+        self.assertEqual((failed['level'], failed['line']), ('ERROR', 7))
+        self.assertIn('ValueError: bad row', failed['exc'])
+        self.assertEqual(after['message'], 'after fork')
+
+
+class CompressionTests(TestCase):
+    def test_negotiate(self):
+        from prime_impex import compression
+
+        self.assertEqual(compression.negotiate('gzip, deflate'), 'gzip')
+        self.assertEqual(compression.negotiate('gzip;q=0, identity'), None)
+        self.assertEqual(compression.negotiate('*'), compression.encodings()[0])
+        self.assertEqual(compression.negotiate(''), None)
+
+    def test_pages_are_gzipped(self):
+        import gzip
+
+        plain = self.client.get(reverse('about'), secure=True)
+        response = self.client.get(reverse('about'), secure=True, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_streamed_json_is_compressed_incrementally(self):
+        import gzip
+        import json
+
+        response = self.client.get('/api/v1/products/', secure=True, headers={'Accept-Encoding': 'gzip'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertIn('data', json.loads(gzip.decompress(b''.join(response.streaming_content))))
+
+    @override_settings(PAGE_CACHE_ENABLED=True, FRAGMENT_CACHE_TIMEOUT=60)
+    def test_page_cache_hits_reuse_compressed_body(self):
+        from unittest import mock
+
+        from prime_impex import compression
+
+        cache.clear()
+        self.client.get(reverse('about'), secure=True)
+        with mock.patch.object(compression, 'compress', side_effect=AssertionError('compressed again')):
+            response = self.client.get(reverse('about'), secure=True, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class AssetBuildTests(TestCase):
+    def build(self, output):
+        proc = subprocess.run(
+            [sys.executable, 'scripts/build_assets.py', '--output', output],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+
+    def test_bundles_and_critical_css(self):
+        import json
+        import tempfile
+        from pathlib import Path
+
+        from django.templatetags.static import static
+
+        from prime_impex.assets import bundle_manifest
+
+        with tempfile.TemporaryDirectory() as output:
+            self.build(output)
+            manifest = json.loads((Path(output) / 'manifest.json').read_text())
+            self.assertRegex(manifest['bundles']['base.css'], r'^base\.[0-9a-f]{10}\.css$')
+            self.assertTrue((Path(output) / manifest['bundles']['base.js']).exists())
+            critical = manifest['critical']['home']['css']
+            self.assertIn('.navbar{', critical)
+            self.assertNotIn(':hover', critical)
+
+            with override_settings(ASSET_MANIFEST=Path(output) / 'manifest.json'):
+                bundle_manifest.cache_clear()
+                self.addCleanup(bundle_manifest.cache_clear)
+                home = self.client.get(reverse('home'), secure=True).content.decode()
+                about = self.client.get(reverse('about'), secure=True).content.decode()
+        href = static(manifest['bundles']['base.css'])
+        self.assertIn(f'<link rel="preload" href="{href}"', home)
+        self.assertIn(f'<link rel="stylesheet" href="{href}"', about)
+        self.assertNotIn('css/style.css', about)
+
+    def test_sources_are_linked_before_a_build(self):
+        about = self.client.get(reverse('about'), secure=True).content.decode()
+        self.assertIn('css/style.css', about)
+        self.assertIn('js/cursor.js', about)
+
+
+class TemplateCompileTests(TestCase):
+    def test_compiled_templates_are_loaded_first(self):
+        import copy
+        import tempfile
+        from pathlib import Path
+
+        source = (Path(settings.BASE_DIR) / 'templates' / 'base.html').read_text()
+        with tempfile.TemporaryDirectory() as output:
+            proc = subprocess.run(
+                [sys.executable, 'scripts/compile_template.py', '--output', output],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+            )
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            compiled = (Path(output) / 'base.html').read_text()
+            self.assertTrue((Path(output) / 'contact' / 'contact.html').exists())
+
+            templates = copy.deepcopy(settings.TEMPLATES)
+            templates[0]['APP_DIRS'] = False
+            templates[0]['OPTIONS']['loaders'] = [
+                ('django.template.loaders.filesystem.Loader', [output]),
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]
+            with override_settings(TEMPLATES=templates):
+                about = self.client.get(reverse('about'), secure=True).content.decode()
+
+        self.assertEqual((Path(settings.BASE_DIR) / 'templates' / 'base.html').read_text(), source)
+        self.assertLess(len(compiled), len(source))
+        self.assertNotIn('\n  ', compiled.split('<style>')[0])
+        self.assertRegex(about, r'<img src="[^"]*Logo.png" [^>]*width="\d+" height="\d+" loading="lazy"')
@@ -1,51 +1,100 @@
-from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, URLResolver
+from django.urls.resolvers import RoutePattern
 from django.conf import settings
-from django.conf.urls.static import static
 from django.views.generic import TemplateView
 
+from prime_impex.context_processors import aprepare_chrome
+from prime_impex.metrics import metrics_view
+
 # Main pages views
+HOME_CONTEXT = {
+    'page_title': 'Patel Universal Traders PVT.LTD. - Trusted Rice Exporters from India',
+    'meta_description': 'Patel Universal Traders PVT.LTD. is a leading exporter of premium Basmati, Non-Basmati, and Organic rice from India. Supplying quality rice worldwide with certified excellence.',
+    'meta_keywords': 'rice exporters India, basmati rice exporters, 1121 basmati rice, premium rice suppliers, organic rice India',
+}
+
+
 def home_view(request):
     from products.models import Product
     from blog.models import BlogPost
     from django.shortcuts import render
     
-    featured_products = Product.objects.filter(is_active=True, is_featured=True)[:6]
-    latest_posts = BlogPost.objects.filter(is_published=True)[:3]
+    featured_products = Product.objects.filter(is_active=True, is_featured=True).cards()[:6]
+    latest_posts = BlogPost.objects.filter(is_live=True).cards()[:3]
     
     context = {
         'featured_products': featured_products,
         'latest_posts': latest_posts,
-        'page_title': 'Patel Universal Traders PVT.LTD. - Trusted Rice Exporters from India',
-        'meta_description': 'Patel Universal Traders PVT.LTD. is a leading exporter of premium Basmati, Non-Basmati, and Organic rice from India. Supplying quality rice worldwide with certified excellence.',
-        'meta_keywords': 'rice exporters India, basmati rice exporters, 1121 basmati rice, premium rice suppliers, organic rice India',
+        **HOME_CONTEXT,
+    }
+    return render(request, 'home.html', context)
+
+
+async def home_view_async(request):
+    from products.models import Product
+    from blog.models import BlogPost
+    from django.shortcuts import render
+
+    # Cards must not touch deferred fields, which would lazy-load in async code
+    featured_products = [
+        product async for product in
+        Product.objects.filter(is_active=True, is_featured=True).cards()[:6]
+    ]
+    latest_posts = [
+        post async for post in
+        BlogPost.objects.filter(is_live=True).cards()[:3]
+    ]
+
+    context = {
+        'featured_products': featured_products,
+        'latest_posts': latest_posts,
+        **HOME_CONTEXT,
     }
+    await aprepare_chrome(request)
     return render(request, 'home.html', context)
 
+class LazyURLResolver(URLResolver):
+    """
+    Included URLconf that is imported on its first resolve() or reverse().
+
+    The root resolver populates every child on the first {% url %} of any
+    page; a plain include() would therefore import the admin (and run its
+    autodiscovery) on the first public request.
+    """
+
+    def _populate(self):
+        if 'urlconf_module' in self.__dict__:
+            super()._populate()
+
+    def _reverse_with_prefix(self, *args, **kwargs):
+        self.urlconf_module
+        return super()._reverse_with_prefix(*args, **kwargs)
+
+
+admin_urls = LazyURLResolver(RoutePattern('admin/'), 'prime_impex.admin_urls', app_name='admin', namespace='admin')
+
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    admin_urls,
     
     # Main pages
-    path('', home_view, name='home'),
+    path('', home_view_async if settings.ASYNC_VIEWS else home_view, name='home'),
     path('about/', TemplateView.as_view(template_name="about.html"), name='about'),
     path('careers/', TemplateView.as_view(template_name="careers.html"), name='careers'),
     path('quality/', TemplateView.as_view(template_name="quality.html"), name='quality'),
     path('privacy/', TemplateView.as_view(template_name="privacy.html"), name='privacy'),
     path('terms/', TemplateView.as_view(template_name="terms.html"), name='terms'),
+    path('metrics', metrics_view, name='metrics'),
 
     # Apps
     path('products/', include('products.urls')),
     path('blog/', include('blog.urls')),
     path('contact/', include('contact.urls')),
+    path('api/', include('api.urls')),
 ]
 
 # Serve media files in development
 if settings.DEBUG:
+    from django.conf.urls.static import static
+
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-
-# Customize admin site
-admin.site.site_header = "Patel Universal Traders PVT.LTD. Administration"
-admin.site.site_title = "Patel Universal Traders PVT.LTD. Admin"
-admin.site.index_title = "Welcome to Patel Universal Traders PVT.LTD. Admin Panel"
-
@@ -0,0 +1,38 @@
+"""
+Content versions in the shared cache.
+
+Anything cached from the catalog or the blog is keyed by the current version
+of that content ('catalog', 'blog'). Changing the content bumps the version
+(products/signals.py, blog/signals.py), which orphans every old key at once
+instead of deleting them one by one. Bulk writes that skip model signals
+(seed_catalog, imports) call bump_version() themselves.
+"""
+from django.core.cache import cache
+
+
+def _key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    version = cache.get(_key(name))
+    if version is None:
+        cache.add(_key(name), 1, timeout=None)
+        version = cache.get(_key(name), 1)
+    return version
+
+
+async def aget_version(name):
+    version = await cache.aget(_key(name))
+    if version is None:
+        await cache.aadd(_key(name), 1, timeout=None)
+        version = await cache.aget(_key(name), 1)
+    return version
+
+
+def bump_version(name):
+    try:
+        return cache.incr(_key(name))
+    except ValueError:
+        cache.add(_key(name), 2, timeout=None)
+        return cache.get(_key(name), 2)
@@ -1,8 +1,27 @@
-from django.contrib import admin
+import io
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from .importer import ImportFileError, ProductImporter
 from .models import ProductCategory, Product
+from .reorder import ReorderMixin
+
+MAX_REPORTED_ERRORS = 50
+
+
+class ImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label='CSV file',
+        help_text=f'Image columns name files in {settings.PRODUCT_IMPORT_IMAGE_DIR} on the server',
+    )
 
 @admin.register(ProductCategory)
-class ProductCategoryAdmin(admin.ModelAdmin):
+class ProductCategoryAdmin(ReorderMixin, admin.ModelAdmin):
     list_display = ['name', 'slug', 'order', 'is_active', 'created_at']
     list_editable = ['order', 'is_active']
     list_filter = ['is_active', 'created_at']
@@ -12,13 +31,49 @@ class ProductCategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ReorderMixin, admin.ModelAdmin):
     list_display = ['name', 'category', 'is_featured', 'is_active', 'order', 'created_at']
     list_editable = ['is_featured', 'is_active', 'order']
     list_filter = ['category', 'is_featured', 'is_active', 'created_at']
     search_fields = ['name', 'description', 'short_description']
     prepopulated_fields = {'slug': ('name',)}
     ordering = ['order', '-created_at']
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='products_product_import'),
+        ] + super().get_urls()
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {'can_import': self.has_add_permission(request), **(extra_context or {})}
+        return super().changelist_view(request, extra_context)
+
+    def import_view(self, request):
+        """Upload a CSV to products/importer.py, as `manage.py import_products` does"""
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        form = ImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            lines = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            try:
+                result = ProductImporter(settings.PRODUCT_IMPORT_IMAGE_DIR).run(lines)
+            except ImportFileError as error:
+                form.add_error('csv_file', str(error))
+            else:
+                for line, message in result.errors[:MAX_REPORTED_ERRORS]:
+                    messages.warning(request, f'Line {line}: {message}')
+                if len(result.errors) > MAX_REPORTED_ERRORS:
+                    messages.warning(request, f'… and {len(result.errors) - MAX_REPORTED_ERRORS} more rows skipped')
+                messages.success(request, f'{result.created} products created, {result.updated} updated')
+                return redirect('admin:products_product_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': 'Import products',
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/products/import.html', context)
     
     fieldsets = (
         ('Basic Information', {
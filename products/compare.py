@@ -0,0 +1,131 @@
+"""
+Side-by-side comparison of a few products (/products/compare/?ids=3,7,12).
+
+The comparison is one in_bulk() query turned into a spec matrix: a row per
+specification, a column per product, blanks where a product doesn't list
+it. Rows come from get_specifications() and from additional_specs lines
+of the form "Label: value"; other lines are collected under "Notes". The
+matrix is cached per set of ids under the current 'catalog' version, and
+columns are put in the requested order afterwards.
+"""
+import re
+
+from django.core.cache import cache
+
+from prime_impex.metrics import record_cache
+from prime_impex.versions import aget_version, get_version
+
+from .models import Product
+
+MAX_PRODUCTS = 4
+MAX_ID = 2 ** 63 - 1
+ID = re.compile(r'[0-9]{1,19}')
+CACHE_TIMEOUT = 60 * 60
+NOTES = 'Notes'
+
+
+def parse_ids(request):
+    """Up to MAX_PRODUCTS distinct ids from ?ids=1,2,3 (or repeated ?ids=), in order"""
+    ids = []
+    for value in request.GET.getlist('ids'):
+        for part in value.split(','):
+            part = part.strip()
+            # ASCII only ('²'.isdigit() is true) and within a BigAutoField
+            if ID.fullmatch(part) and 0 < int(part) <= MAX_ID and int(part) not in ids:
+                ids.append(int(part))
+    return ids[:MAX_PRODUCTS]
+
+
+def parse_additional_specs(text):
+    """'Label: value' lines as (label, value) pairs; other lines as (NOTES, line)"""
+    specs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        label, sep, value = line.partition(':')
+        if sep and label.strip() and value.strip():
+            specs.append((label.strip(), value.strip()))
+        else:
+            specs.append((NOTES, line))
+    return specs
+
+
+def comparison_products():
+    return (
+        Product.objects.filter(is_active=True)
+        .select_related('category')
+        .defer('description', 'meta_title', 'meta_description', 'meta_keywords')
+    )
+
+
+def build_comparison(products):
+    """JSON-ready {'products': [...], 'rows': [{'label', 'values'}]} for products in column order"""
+    columns = []
+    labels = []
+    for product in products:
+        specs = {}
+        pairs = list(product.get_specifications().items()) + parse_additional_specs(product.additional_specs)
+        for label, value in pairs:
+            if label not in specs:
+                specs[label] = value
+                if label not in labels:
+                    labels.append(label)
+            else:
+                specs[label] = f'{specs[label]}; {value}'
+        columns.append(specs)
+
+    # Notes last, whatever order the products listed them in
+    if NOTES in labels:
+        labels.remove(NOTES)
+        labels.append(NOTES)
+    return {
+        'products': [
+            {
+                'id': product.id,
+                'name': product.name,
+                'slug': product.slug,
+                'category': product.category.name,
+                'short_description': product.short_description,
+                'image': product.main_image.url if product.main_image else '',
+            }
+            for product in products
+        ],
+        'rows': [{'label': label, 'values': [specs.get(label, '') for specs in columns]} for label in labels],
+    }
+
+
+def reorder(comparison, ids):
+    """The cached comparison (sorted by id) with its columns in the requested order"""
+    position = {product['id']: i for i, product in enumerate(comparison['products'])}
+    order = [position[product_id] for product_id in ids if product_id in position]
+    return {
+        'products': [comparison['products'][i] for i in order],
+        'rows': [{'label': row['label'], 'values': [row['values'][i] for i in order]} for row in comparison['rows']],
+    }
+
+
+def cache_key(version, ids):
+    return f'compare:{version}:{",".join(map(str, sorted(ids)))}'
+
+
+def get_comparison(ids):
+    key = cache_key(get_version('catalog'), ids)
+    comparison = cache.get(key)
+    record_cache('compare', hit=comparison is not None)
+    if comparison is None:
+        products = comparison_products().in_bulk(ids)
+        comparison = build_comparison([products[product_id] for product_id in sorted(products)])
+        cache.set(key, comparison, CACHE_TIMEOUT)
+    return reorder(comparison, ids)
+
+
+async def aget_comparison(ids):
+    key = cache_key(await aget_version('catalog'), ids)
+    comparison = await cache.aget(key)
+    record_cache('compare', hit=comparison is not None)
+    if comparison is None:
+        products = await comparison_products().ain_bulk(ids)
+        comparison = build_comparison([products[product_id] for product_id in sorted(products)])
+        await cache.aset(key, comparison, CACHE_TIMEOUT)
+    return reorder(comparison, ids)
@@ -0,0 +1,260 @@
+"""
+Bulk catalog import from CSV, shared by `manage.py import_products` and the
+"Import CSV" page of ProductAdmin.
+
+One row per product, with a header naming the columns:
+
+    slug,name,category,category_name,short_description,description,
+    grain_length,purity,moisture,broken_grains,packaging_options,
+    additional_specs,is_featured,is_active,order,main_image,image_2,image_3,
+    meta_title,meta_description,meta_keywords
+
+Only name and category are required. `category` is a category slug,
+resolved from in-memory {slug: id} and {name: id} maps loaded once; an
+unknown slug is created when the row also gives a category_name that isn't
+taken, otherwise the row is rejected. Slugs are slugified and every row
+goes through the model's validation (lengths, blank required columns)
+before it's written. Rows are matched to existing products by slug
+(derived from the name when blank), so re-importing a price list updates
+it in place; columns missing from the header are left alone on existing
+products. Image columns are file names in the image directory.
+
+The file is streamed in chunks of CHUNK_SIZE rows. Each chunk is validated,
+has its new images stored (content-addressed, so an image shared by many
+SKUs is written once) and their WebP variants generated in a thread pool,
+then is written with one bulk_create(update_conflicts=True) in its own
+transaction. Invalid rows are reported by line number and skipped; a file
+that can't be decoded or parsed stops with ImportFileError. The
+'catalog' version is bumped once at the end, as bulk writes skip the model
+signals.
+"""
+import csv
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from prime_impex.storage import save_variants
+from prime_impex.versions import bump_version
+
+from .models import Product, ProductCategory
+
+CHUNK_SIZE = 1000
+WORKERS = 4
+VARIANT_WIDTHS = (480, 800, 1200)
+
+TEXT_FIELDS = (
+    'name', 'short_description', 'description', 'grain_length', 'purity', 'moisture', 'broken_grains',
+    'packaging_options', 'additional_specs', 'meta_title', 'meta_description', 'meta_keywords',
+)
+BOOLEAN_FIELDS = ('is_featured', 'is_active')
+IMAGE_FIELDS = ('main_image', 'image_2', 'image_3')
+TRUE = {'1', 'true', 'yes', 'y'}
+FALSE = {'0', 'false', 'no', 'n', ''}
+
+
+class ImportFileError(ValueError):
+    """The file itself can't be read as CSV (encoding, malformed quoting)"""
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)  # (line number, message)
+
+
+class ImageStore:
+    """Stores image files from `directory` once each, with their variants"""
+
+    def __init__(self, directory, workers=WORKERS):
+        self.directory = Path(directory)
+        self.workers = workers
+        self.names = {}  # file name in the CSV -> storage name
+
+    def path(self, filename):
+        path = (self.directory / filename).resolve()
+        if not path.is_relative_to(self.directory.resolve()) or not path.is_file():
+            return None
+        return path
+
+    def store(self, filename):
+        path = self.path(filename)
+        with open(path, 'rb') as f:
+            name = default_storage.save(f'products/{path.name}', File(f))
+        try:
+            from PIL import Image, UnidentifiedImageError
+        except ImportError:
+            return name  # no Pillow: the original alone
+        try:
+            image = Image.open(path)
+            image.load()
+        except (UnidentifiedImageError, OSError):
+            return name  # not an image Pillow reads: the original alone
+        # Storage errors (disk full, permissions) propagate and stop the import
+        with image:
+            save_variants(name, image, VARIANT_WIDTHS)
+        return name
+
+    def store_all(self, filenames):
+        """Store the files not stored yet, in parallel (Pillow releases the GIL while it resizes and encodes)"""
+        new = sorted(set(filenames) - self.names.keys())
+        if new:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                self.names.update(zip(new, pool.map(self.store, new)))
+        return self.names
+
+
+class ProductImporter:
+    def __init__(self, image_dir, chunk_size=CHUNK_SIZE, workers=WORKERS):
+        self.images = ImageStore(image_dir, workers)
+        self.chunk_size = chunk_size
+        self.categories, self.category_names = {}, {}
+        for pk, slug, name in ProductCategory.objects.values_list('id', 'slug', 'name'):
+            self.categories[slug] = pk
+            self.category_names[name.lower()] = pk
+
+    def run(self, lines):
+        """Import CSV `lines` (an iterable of str, e.g. an open text file); returns an ImportResult"""
+        result = ImportResult()
+        reader = csv.DictReader(lines)
+        try:
+            columns = set(reader.fieldnames or ())
+        except (UnicodeDecodeError, csv.Error) as error:
+            raise ImportFileError(f'The file is not a UTF-8 CSV ({error})') from error
+        for required in ('name', 'category'):
+            if required not in columns:
+                result.errors.append((1, f'missing column "{required}"'))
+        if result.errors:
+            return result
+
+        update_fields = ['category', 'updated_at'] + [
+            name for name in (*TEXT_FIELDS, *BOOLEAN_FIELDS, 'order', *IMAGE_FIELDS) if name in columns
+        ]
+        # Line numbers as the user sees them: the header is line 1
+        rows = zip(itertools.count(2), reader)
+        try:
+            while chunk := list(itertools.islice(rows, self.chunk_size)):
+                self.import_chunk(chunk, update_fields, result)
+        except (UnicodeDecodeError, csv.Error) as error:
+            raise ImportFileError(
+                f'The file could not be read past line {reader.line_num} ({error}); '
+                f'{result.created} products were created and {result.updated} updated before that'
+            ) from error
+        finally:
+            if result.created or result.updated:
+                bump_version('catalog')
+        return result
+
+    def import_chunk(self, chunk, update_fields, result):
+        products, images, lines = {}, {}, {}
+        for line, row in chunk:
+            row = {key: (value or '').strip() for key, value in row.items() if key}
+            try:
+                product = self.build(row)
+            except ValueError as error:
+                result.errors.append((line, str(error)))
+                continue
+            missing = [row[name] for name in IMAGE_FIELDS if row.get(name) and not self.images.path(row[name])]
+            if missing:
+                result.errors.append((line, f'image not found: {", ".join(missing)}'))
+                continue
+            # A slug repeated in the file: its last row wins
+            products[product.slug] = product
+            lines[product.slug] = line
+            images[product.slug] = {name: row[name] for name in IMAGE_FIELDS if row.get(name)}
+        if not products:
+            return
+
+        existing = {
+            values[0]: values[1:]
+            for values in Product.objects.filter(slug__in=products).values_list('slug', *IMAGE_FIELDS)
+        }
+        stored = self.images.store_all(name for files in images.values() for name in files.values())
+        for slug, product in products.items():
+            for position, name in enumerate(IMAGE_FIELDS):
+                if name in images[slug]:
+                    setattr(product, name, stored[images[slug][name]])
+                elif slug in existing:
+                    setattr(product, name, existing[slug][position])  # blank cell: keep the current image
+            if not product.main_image:
+                result.errors.append((lines[slug], 'main_image is required for a new product'))
+
+        valid = [product for product in products.values() if product.main_image]
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                valid, update_conflicts=True, unique_fields=['slug'], update_fields=update_fields,
+            )
+        updated = sum(1 for product in valid if product.slug in existing)
+        result.updated += updated
+        result.created += len(valid) - updated
+
+    def build(self, row):
+        """An unsaved, validated Product from a CSV row; ValueError says what's wrong with it"""
+        if not row.get('name'):
+            raise ValueError('name is required')
+        slug = row.get('slug', '')
+        product = Product(
+            slug=slugify(slug),
+            category_id=self.category_id(row),
+            **{name: row[name] for name in TEXT_FIELDS if name in row},
+        )
+        if slug and not product.slug:
+            raise ValueError(f'slug "{slug}" has no letters or digits')
+        for name in BOOLEAN_FIELDS:
+            if name in row:
+                value = row[name].lower()
+                if value not in TRUE | FALSE:
+                    raise ValueError(f'{name} must be yes or no, not "{row[name]}"')
+                setattr(product, name, value in TRUE)
+        if row.get('order'):
+            try:
+                product.order = int(row['order'])
+            except ValueError:
+                raise ValueError(f'order must be a whole number, not "{row["order"]}"') from None
+        product.fill_defaults()
+        # Lengths, slug format, blank required columns. Columns the file leaves
+        # out aren't checked: new products get the model defaults for them
+        absent = [f.name for f in Product._meta.concrete_fields if f.name not in row and f.name != 'slug']
+        validate(product, exclude=[*IMAGE_FIELDS, 'category', *absent])
+        return product
+
+    def category_id(self, row):
+        typed = row.get('category', '')
+        slug = slugify(typed)
+        if not slug:
+            raise ValueError('category is required')
+        if slug in self.categories:
+            return self.categories[slug]
+        name = row.get('category_name', '')
+        if not name:
+            raise ValueError(f'unknown category "{typed}" (add a category_name to create it)')
+        if name.lower() in self.category_names:
+            # Already there under another slug
+            return self.category_names[name.lower()]
+        category = ProductCategory(name=name, slug=slug)
+        validate(category, exclude=['image'])
+        try:
+            with transaction.atomic():
+                # bulk_create(): no post_save, so no version bump before the one at the end
+                category, = ProductCategory.objects.bulk_create([category])
+        except IntegrityError:
+            raise ValueError(f'category "{name}" ({slug}) clashes with an existing category') from None
+        self.categories[slug] = self.category_names[name.lower()] = category.id
+        return category.id
+
+
+def validate(instance, exclude):
+    """full_clean() without the uniqueness queries, its errors as one ValueError"""
+    try:
+        instance.full_clean(exclude=exclude, validate_unique=False)
+    except ValidationError as error:
+        raise ValueError('; '.join(
+            f'{name}: {" ".join(messages)}' for name, messages in error.message_dict.items()
+        )) from None
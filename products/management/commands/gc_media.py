@@ -0,0 +1,85 @@
+import os
+import posixpath
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import models
+
+
+def reference_counts():
+    """How many times each media name is referred to: file fields, plus /media/ URLs in post bodies"""
+    from blog.models import BlogPost
+
+    counts = Counter()
+    for model in apps.get_models():
+        fields = [field.name for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+        if not fields:
+            continue
+        for row in model._default_manager.values_list(*fields).iterator(chunk_size=2000):
+            counts.update(name for name in row if name)
+
+    media_url = re.compile(rf'{re.escape(settings.MEDIA_URL)}([^"\'\s)<>,]+)')
+    for post in BlogPost.objects.values('content', 'content_html').iterator(chunk_size=500):
+        for text in post.values():
+            counts.update(unquote(name) for name in media_url.findall(text))
+    return counts
+
+
+VARIANT = re.compile(r'^(.+)-\d+\.webp$')
+
+
+def is_referenced(name, references, stems):
+    """Referred to itself, or a resized variant (<stem>-<width>.webp) of a name that is"""
+    if references[name]:
+        return True
+    variant = VARIANT.match(name)
+    return variant is not None and variant.group(1) in stems
+
+
+class Command(BaseCommand):
+    help = 'Delete media files that no file field or blog post refers to, with their resized variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List what would be deleted')
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help='Hours; younger files are kept, as their upload may not be saved to a row yet',
+        )
+
+    def handle(self, *args, **options):
+        root = Path(settings.MEDIA_ROOT)
+        references = reference_counts()
+        stems = {posixpath.splitext(name)[0] for name in references}
+        cutoff = time.time() - options['min_age'] * 3600
+        removed = freed = kept = 0
+
+        for path in sorted(root.rglob('*')):
+            if not path.is_file() or path.name.startswith('.'):
+                continue
+            if is_referenced(path.relative_to(root).as_posix(), references, stems):
+                kept += 1
+                continue
+            stat = path.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            removed += 1
+            # A hard-linked file's bytes stay on disk until its last name goes
+            freed += stat.st_size if stat.st_nlink == 1 else 0
+            if options['dry_run']:
+                self.stdout.write(f'would delete {path.relative_to(root).as_posix()}')
+            else:
+                path.unlink()
+
+        if not options['dry_run']:
+            # Shard directories left empty
+            for directory in sorted((p for p in root.rglob('*') if p.is_dir()), reverse=True):
+                if not any(directory.iterdir()):
+                    os.rmdir(directory)
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(f'{verb} {removed} files ({freed / 1024 / 1024:.1f} MB); {kept} referenced files kept')
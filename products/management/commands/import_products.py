@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import CHUNK_SIZE, WORKERS, ImportFileError, ProductImporter
+
+
+class Command(BaseCommand):
+    help = 'Create or update products from a CSV file (see products/importer.py for the columns)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument(
+            '--images', default=settings.PRODUCT_IMPORT_IMAGE_DIR,
+            help='Folder the CSV image file names are looked up in',
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=WORKERS, help='Threads storing images and their variants')
+
+    def handle(self, *args, **options):
+        importer = ProductImporter(options['images'], options['chunk_size'], options['workers'])
+        start = time.perf_counter()
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as f:
+                result = importer.run(f)
+        except (OSError, ImportFileError) as error:
+            raise CommandError(error)
+
+        for line, message in result.errors:
+            self.stderr.write(f'line {line}: {message}')
+        self.stdout.write(
+            f'{result.created} products created, {result.updated} updated, {len(result.errors)} rows skipped '
+            f'in {time.perf_counter() - start:.1f}s'
+        )
@@ -0,0 +1,205 @@
+import itertools
+import random
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import BlogCategory, BlogPost
+from contact.models import ContactInquiry
+from prime_impex.versions import bump_version
+from products.models import Product, ProductCategory
+
+GRAINS = ['1121', '1509', '1401', 'Pusa', 'Sugandha', 'Sharbati', 'PR-11', 'IR-64', 'Sona Masoori', 'Ponni']
+STYLES = ['Basmati', 'Non-Basmati', 'Organic', 'Parboiled', 'Steam', 'Sella', 'Golden Sella', 'White Sella', 'Raw']
+GRADES = ['Premium', 'Extra Long', 'Classic', 'Select', 'Royal', 'Export Quality', 'Double Polished']
+CATEGORIES = ['Basmati Rice', 'Non-Basmati Rice', 'Organic Rice', 'Parboiled Rice', 'Steam Rice', 'Broken Rice']
+BLOG_CATEGORIES = ['Market Trends', 'Export Guides', 'Quality & Certification', 'Company News', 'Recipes']
+COUNTRIES = ['UAE', 'U.A.E', 'Dubai', 'Saudi Arabia', 'KSA', 'United Kingdom', 'UK', 'USA', 'Oman', 'Kuwait',
+             'Qatar', 'Iran', 'Iraq', 'Yemen', 'Netherlands', 'Germany', 'South Africa', 'Kenya', 'Malaysia']
+FIRST_NAMES = ['Ahmed', 'Fatima', 'John', 'Maria', 'Ravi', 'Aisha', 'Omar', 'Li', 'Sara', 'David', 'Priya', 'Yusuf']
+LAST_NAMES = ['Khan', 'Smith', 'Al Mansoori', 'Patel', 'Garcia', 'Haddad', 'Chen', 'Muller', 'Okafor', 'Rahman']
+WORDS = (
+    'rice grain aroma long slender cooked elongation aged harvest paddy mill sortex polished export '
+    'quality purity moisture broken packaging bag container shipment fob cif port mundra kandla '
+    'basmati sella steam parboiled organic certified farmer punjab haryana season crop yield price '
+    'market demand supply buyer importer distributor retail wholesale sample specification lab test'
+).split()
+
+PLACEHOLDER_COLORS = [(222, 203, 164), (240, 234, 214), (201, 176, 122), (236, 226, 198)]
+
+
+def sentence(rng, low=8, high=18):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rng, sentences=5):
+    return ' '.join(sentence(rng) for _ in range(sentences))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic catalog (products, blog posts, inquiries) for load and scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50_000)
+        parser.add_argument('--posts', type=int, default=200_000)
+        parser.add_argument('--inquiries', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=1121, help='random seed, for repeatable datasets')
+        parser.add_argument('--clear', action='store_true', help='delete existing seeded rows first')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        if options['clear']:
+            self.clear()
+
+        images = self.placeholder_images()
+        categories = self.seed_categories(images)
+        self.seed_products(options['products'], categories, images)
+        blog_categories = self.seed_blog_categories()
+        self.seed_posts(options['posts'], blog_categories, images)
+        self.seed_inquiries(options['inquiries'])
+        # bulk_create() and queryset delete() don't send the signals that do this
+        bump_version('catalog')
+        bump_version('blog')
+
+    def clear(self):
+        self.stdout.write('Deleting seeded rows...')
+        ContactInquiry.objects.filter(company__startswith='Seed ').delete()
+        BlogPost.objects.filter(slug__startswith='seed-').delete()
+        Product.objects.filter(slug__startswith='seed-').delete()
+
+    def placeholder_images(self):
+        """Write a few small placeholder JPEGs under MEDIA_ROOT and return their storage names"""
+        from PIL import Image
+
+        folder = Path(settings.MEDIA_ROOT) / 'seed'
+        folder.mkdir(parents=True, exist_ok=True)
+        names = []
+        for i, color in enumerate(PLACEHOLDER_COLORS):
+            path = folder / f'placeholder-{i}.jpg'
+            if not path.exists():
+                Image.new('RGB', (800, 600), color).save(path, 'JPEG', quality=70)
+            names.append(f'seed/placeholder-{i}.jpg')
+        return names
+
+    def seed_categories(self, images):
+        categories = []
+        for order, name in enumerate(CATEGORIES):
+            category, _ = ProductCategory.objects.get_or_create(
+                name=name,
+                defaults={'description': paragraph(self.rng, 2), 'image': images[order % len(images)], 'order': order},
+            )
+            categories.append(category)
+        return categories
+
+    def seed_blog_categories(self):
+        return [BlogCategory.objects.get_or_create(name=name)[0] for name in BLOG_CATEGORIES]
+
+    def write(self, model, rows, total):
+        created = 0
+        for batch in batched(rows, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            created += len(batch)
+            self.stdout.write(f'\r  {model.__name__}: {created}/{total}', ending='')
+            self.stdout.flush()
+        self.stdout.write('')
+
+    def seed_products(self, count, categories, images):
+        rng = self.rng
+        start = Product.objects.filter(slug__startswith='seed-').count()
+
+        def rows():
+            for i in range(start, start + count):
+                name = f'{rng.choice(GRAINS)} {rng.choice(STYLES)} Rice {rng.choice(GRADES)} #{i}'
+                short_description = sentence(rng, 10, 20)
+                yield Product(
+                    name=name,
+                    slug=f'seed-product-{i}',
+                    category=rng.choice(categories),
+                    short_description=short_description[:300],
+                    description='\n\n'.join(paragraph(rng) for _ in range(rng.randint(3, 8))),
+                    main_image=rng.choice(images),
+                    grain_length=f'{rng.uniform(6.0, 8.6):.1f}mm',
+                    purity=f'{rng.randint(90, 99)}%',
+                    moisture=f'{rng.randint(10, 14)}%',
+                    broken_grains=f'{rng.randint(1, 5)}%',
+                    packaging_options='1kg, 5kg, 10kg, 25kg, 50kg PP / jute bags',
+                    additional_specs='\n'.join(sentence(rng, 3, 6) for _ in range(rng.randint(2, 6))),
+                    meta_title=f'{name} - Patel Universal Traders PVT.LTD.',
+                    meta_description=short_description[:300],
+                    is_featured=rng.random() < 0.02,
+                    order=rng.randint(0, 100),
+                )
+
+        self.write(Product, rows(), count)
+
+    def seed_posts(self, count, categories, images):
+        rng = self.rng
+        start = BlogPost.objects.filter(slug__startswith='seed-').count()
+
+        def rows():
+            for i in range(start, start + count):
+                is_published = rng.random() < 0.9
+                # Mostly past dates, a few scheduled in the future
+                publish_date = self.now - timedelta(days=rng.uniform(-30, 1500))
+                title = sentence(rng, 4, 9).rstrip('.')
+                excerpt = sentence(rng, 15, 30)[:300]
+                content = ''.join(
+                    f'<h2>{sentence(rng, 3, 6)}</h2><p>{paragraph(rng)}</p>' for _ in range(rng.randint(3, 10))
+                )
+                post = BlogPost(
+                    title=title[:200],
+                    slug=f'seed-post-{i}',
+                    category=rng.choice(categories + [None]),
+                    excerpt=excerpt,
+                    content=content,
+                    featured_image=rng.choice(images),
+                    meta_title=f'{title[:170]} - Prime Impex Blog',
+                    meta_description=excerpt,
+                    is_published=is_published,
+                    is_featured=rng.random() < 0.01,
+                    publish_date=publish_date,
+                    # bulk_create() skips save(), which normally sets this and the rendered content
+                    is_live=is_published and publish_date <= self.now,
+                    views_count=rng.randint(0, 5000),
+                )
+                post.render_content()
+                yield post
+
+        self.write(BlogPost, rows(), count)
+
+    def seed_inquiries(self, count):
+        rng = self.rng
+        products = [f'{g} {s}' for g in GRAINS for s in STYLES]
+
+        def rows():
+            for i in range(count):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                yield ContactInquiry(
+                    name=f'{first} {last}',
+                    company=f'Seed {last} Trading Co.',
+                    email=f'{first}.{last}.{i}@example.com'.lower().replace(' ', ''),
+                    phone=f'+{rng.randint(1, 999)} {rng.randint(10**8, 10**10 - 1)}',
+                    country=rng.choice(COUNTRIES),
+                    product_interest=rng.choice(products + ['']),
+                    quantity=f'{rng.choice([25, 50, 100, 250, 500, 1000])} MT',
+                    message=paragraph(rng, rng.randint(1, 4)),
+                    is_read=rng.random() < 0.5,
+                )
+
+        self.write(ContactInquiry, rows(), count)
@@ -25,6 +25,20 @@ class ProductCategory(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    # What a product card shows (get_specifications() included). Leaves out
+    # description, additional_specs and the SEO fields, the bulk of a row
+    CARD_FIELDS = (
+        'name', 'slug', 'category', 'short_description', 'main_image', 'is_featured',
+        'grain_length', 'purity', 'moisture', 'broken_grains', 'packaging_options',
+        'category__name', 'category__slug',
+    )
+
+    def cards(self):
+        """Products for list cards, with their category joined in"""
+        return self.select_related('category').only(*self.CARD_FIELDS)
+
+
 class Product(models.Model):
     """Rice products with detailed specifications"""
     
@@ -67,16 +81,23 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['order', '-created_at']
 
-    def save(self, *args, **kwargs):
+    def fill_defaults(self):
+        """Slug and SEO fields derived from the name when left blank (also used by bulk imports)"""
         if not self.slug:
             self.slug = slugify(self.name)
         if not self.meta_title:
-            self.meta_title = f"{self.name} - Patel Universal Traders PVT.LTD."
+            # Cut to fit: a name near its max_length would overrun meta_title's
+            self.meta_title = f"{self.name} - Patel Universal Traders PVT.LTD."[:200]
         if not self.meta_description:
             self.meta_description = self.short_description
+
+    def save(self, *args, **kwargs):
+        self.fill_defaults()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -0,0 +1,87 @@
+"""
+Drag-and-drop reordering of the catalog in the admin.
+
+ProductAdmin and ProductCategoryAdmin get a "Reorder" page (<changelist>/
+reorder/) listing their rows in display order. Dragging rows and pressing
+Save posts the whole ordering as JSON, {"ids": [...]}, and apply_order()
+numbers the rows 1, 2, 3... in that order. It reads the current values in
+one query, writes only the rows whose position changed with one bulk_update()
+(a single UPDATE ... CASE per batch) in one transaction, and bumps the
+'catalog' version once, where saving the same change through list_editable
+costs an UPDATE and a version bump per row.
+"""
+import json
+
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from prime_impex.versions import bump_version
+
+BATCH_SIZE = 500
+
+
+def apply_order(queryset, ids):
+    """Set `order` to each row's 1-based position in `ids`; returns how many rows changed"""
+    current = dict(queryset.filter(pk__in=ids).values_list('pk', 'order'))
+    changed = []
+    for position, pk in enumerate(ids, start=1):
+        if current.get(pk, position) != position:
+            changed.append(queryset.model(pk=pk, order=position))
+    if changed:
+        with transaction.atomic():
+            queryset.model.objects.bulk_update(changed, ['order'], batch_size=BATCH_SIZE)
+        # bulk_update() sends no post_save, so products/signals.py doesn't run
+        bump_version('catalog')
+    return len(changed)
+
+
+def parse_ids(body):
+    """The posted ordering as a list of distinct ints, or None when it isn't one"""
+    try:
+        ids = json.loads(body)['ids']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(ids, list) or not all(type(pk) is int for pk in ids) or len(set(ids)) != len(ids):
+        return None
+    return ids
+
+
+class ReorderMixin:
+    """Adds the reorder page to a ModelAdmin whose model has an `order` field"""
+
+    reorder_template = 'admin/products/reorder.html'
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path('reorder/', self.admin_site.admin_view(self.reorder_view), name='%s_%s_reorder' % info),
+        ] + super().get_urls()
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {'can_reorder': self.has_change_permission(request), **(extra_context or {})}
+        return super().changelist_view(request, extra_context)
+
+    def reorder_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        queryset = self.get_queryset(request)
+        if request.method == 'POST':
+            ids = parse_ids(request.body)
+            if ids is None:
+                return JsonResponse({'error': 'Expected {"ids": [distinct integer ids]}'}, status=400)
+            missing = len(ids) - queryset.filter(pk__in=ids).count()
+            if missing:
+                return JsonResponse({'error': f'{missing} ids are not {self.opts.verbose_name_plural}'}, status=400)
+            return JsonResponse({'updated': apply_order(queryset, ids)})
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': f'Reorder {self.opts.verbose_name_plural}',
+            'rows': queryset.order_by(*self.get_ordering(request)).values_list('pk', 'name', 'order'),
+        }
+        return TemplateResponse(request, self.reorder_template, context)
+
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from prime_impex.versions import bump_version
+
+from .models import Product, ProductCategory
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductCategory)
+def catalog_changed(sender, **kwargs):
+    """Orphan everything cached from the catalog (suggest index included)"""
+    bump_version('catalog')
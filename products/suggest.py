@@ -0,0 +1,190 @@
+"""
+In-process autocomplete index for the product search box.
+
+The index holds every active product, active category and common name term
+("1121", "sella", ...) as an entry, numbered in display-rank order. Each
+distinct word maps to the sorted tuple of entries containing it, and the words
+themselves sit in one sorted list, so a prefix is a bisect range of words
+whose postings merge lazily in rank order. Results for one- and two-letter
+prefixes, which match most of the catalog, are merged ahead of time.
+
+The index is built once per process (in the gunicorn master by
+prime_impex.startup.warm_up, so workers share it) and rebuilt in the
+background after the 'catalog' version changes; see products/signals.py.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import islice
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.urls import reverse
+
+from prime_impex.versions import aget_version, get_version
+
+WORD = re.compile(r'\w+')
+# Filler words that would make poor suggestions on their own
+STOPWORDS = {'rice', 'and', 'the', 'with', 'for', 'from', 'of'}
+MAX_TERMS = 200
+HOT_SIZE = 200  # entries kept per one/two-letter prefix
+MAX_SCAN = 2000  # candidates examined for multi-word queries
+VERSION_CHECK_INTERVAL = 5  # seconds between 'catalog' version lookups
+
+KIND_ORDER = {'category': 0, 'term': 1, 'product': 2}
+
+
+def words(text):
+    return WORD.findall(text.lower())
+
+
+def is_term(word):
+    """Words worth suggesting on their own, e.g. grades like 1121 and styles like sella"""
+    if word.isdigit():
+        return len(word) == 4
+    return len(word) >= 3 and word not in STOPWORDS
+
+
+class SuggestIndex:
+    def __init__(self, entries):
+        """entries: (sort_key, label, kind, url) tuples"""
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self.labels = tuple(entry[1] for entry in entries)
+        self.kinds = tuple(entry[2] for entry in entries)
+        self.urls = tuple(entry[3] for entry in entries)
+        self.entry_words = tuple(frozenset(words(label)) for label in self.labels)
+
+        postings = defaultdict(list)
+        for entry_id, entry_words in enumerate(self.entry_words):
+            for word in entry_words:
+                postings[word].append(entry_id)
+        self.words = sorted(postings)
+        self.postings = [tuple(postings[word]) for word in self.words]
+
+        self.hot = {}
+        for prefix in {word[:n] for word in self.words for n in (1, 2)}:
+            self.hot[prefix] = tuple(islice(self._merged(prefix), HOT_SIZE))
+
+    def _merged(self, prefix):
+        """Entry ids having a word that starts with `prefix`, in rank order, without repeats"""
+        lo = bisect_left(self.words, prefix)
+        hi = bisect_left(self.words, prefix + '\U0010ffff', lo)
+        if hi - lo == 1:
+            yield from self.postings[lo]
+            return
+        last = None
+        for entry_id in heapq.merge(*self.postings[lo:hi]):
+            if entry_id != last:
+                yield entry_id
+                last = entry_id
+
+    def search(self, query, limit=8):
+        query_words = words(query)
+        if not query_words:
+            return []
+        # Drive the scan with the longest (most selective) word; every word is a prefix
+        driver = max(query_words, key=len)
+        others = list(query_words)
+        others.remove(driver)
+        candidates = self.hot.get(driver, ()) if len(driver) <= 2 else self._merged(driver)
+
+        results = []
+        for entry_id in islice(candidates, MAX_SCAN):
+            entry_words = self.entry_words[entry_id]
+            if all(any(word.startswith(other) for word in entry_words) for other in others):
+                results.append({
+                    'label': self.labels[entry_id],
+                    'type': self.kinds[entry_id],
+                    'url': self.urls[entry_id],
+                })
+                if len(results) == limit:
+                    break
+        return results
+
+
+def build_index():
+    from products.models import Product, ProductCategory
+
+    list_url = reverse('products:product_list')
+    entries = []
+    for name, slug, order in ProductCategory.objects.filter(is_active=True).values_list('name', 'slug', 'order'):
+        entries.append(((KIND_ORDER['category'], order, name), name, 'category',
+                        f'{list_url}?{urlencode({"category": slug})}'))
+
+    term_counts = Counter()
+    products = Product.objects.filter(is_active=True).values_list('name', 'slug', 'is_featured', 'order')
+    for name, slug, is_featured, order in products.iterator(chunk_size=5000):
+        entries.append(((KIND_ORDER['product'], not is_featured, order, name), name, 'product',
+                        reverse('products:product_detail', args=[slug])))
+        term_counts.update(word for word in set(words(name)) if is_term(word))
+
+    for term, count in term_counts.most_common(MAX_TERMS):
+        if count < 2:
+            break
+        entries.append(((KIND_ORDER['term'], -count, term), term, 'term', f'{list_url}?{urlencode({"q": term})}'))
+
+    return SuggestIndex(entries)
+
+
+class IndexHolder:
+    """
+    The process-wide index. The first build happens inline; after that a new
+    'catalog' version triggers a rebuild in a background thread while requests
+    keep using the current index (a large catalog takes seconds to index).
+    """
+
+    def __init__(self):
+        self.index = None
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def build(self, version):
+        with self.lock:
+            if self.index is None:
+                self.index = build_index()
+                self.version = version
+
+    def refresh(self, version):
+        if self.lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild, args=(version,), name='suggest-rebuild', daemon=True).start()
+
+    def _rebuild(self, version):
+        try:
+            self.index = build_index()
+            self.version = version
+        finally:
+            connections.close_all()
+            self.lock.release()
+
+    def stale(self):
+        return self.index is None or time.monotonic() - self.checked_at >= VERSION_CHECK_INTERVAL
+
+    def get(self):
+        if self.stale():
+            version = get_version('catalog')
+            self.checked_at = time.monotonic()
+            if self.index is None:
+                self.build(version)
+            elif version != self.version:
+                self.refresh(version)
+        return self.index
+
+    async def aget(self):
+        if self.stale():
+            version = await aget_version('catalog')
+            self.checked_at = time.monotonic()
+            if self.index is None:
+                await sync_to_async(self.build)(version)
+            elif version != self.version:
+                self.refresh(version)
+        return self.index
+
+
+holder = IndexHolder()
+get_index = holder.get
+aget_index = holder.aget
@@ -0,0 +1,27 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from prime_impex.storage import stored_variants
+from products.importer import VARIANT_WIDTHS
+
+register = template.Library()
+
+# Product cards: one column on phones, two on tablets, three from lg up
+CARD_SIZES = '(max-width: 767px) 100vw, (max-width: 991px) 50vw, 33vw'
+
+
+@register.simple_tag
+def srcset(image, sizes=CARD_SIZES):
+    """
+    srcset and sizes attributes for the WebP variants the importer stored
+    next to an image; empty when it has none, leaving just the src.
+    Usage: <img src="{{ product.main_image.url }}"{% srcset product.main_image %}>
+    """
+    if not image:
+        return ''
+    variants = stored_variants(image.name, VARIANT_WIDTHS)
+    if not variants:
+        return ''
+    candidates = ', '.join(f'{default_storage.url(variant)} {width}w' for variant, width in variants)
+    return format_html(' srcset="{}" sizes="{}"', candidates, sizes)
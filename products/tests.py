@@ -1,3 +1,452 @@
+from io import StringIO
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from prime_impex.querycheck import NPlusOneError, detect_nplusone
+
+from .models import Product, ProductCategory
+from .suggest import holder
+
+
+def create_catalog(products_per_category=5):
+    """Two categories of active products, a few of them featured"""
+    for name in ('Basmati Rice', 'Non-Basmati Rice'):
+        category = ProductCategory.objects.create(name=name)
+        for i in range(products_per_category):
+            Product.objects.create(
+                name=f'{name} Grade {i}',
+                category=category,
+                short_description='Long grain rice',
+                description='Aged long grain rice.',
+                main_image='products/rice.jpg',
+                is_featured=i < 2,
+            )
+
+
+class ProductViewQueryTests(TestCase):
+    """
+    The test runner sets NPLUSONE_DETECTION = 'raise', so a page that loads
+    a relation per row fails these with NPlusOneError.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog()
+
+    def test_product_list(self):
+        response = self.client.get(reverse('products:product_list'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['products']), 9)
+        # Cards skip the long text columns
+        self.assertIn('description', response.context['products'][0].get_deferred_fields())
+
+    def test_product_list_filtered_by_category(self):
+        url = reverse('products:product_list') + '?category=basmati-rice'
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_detail_with_related_products(self):
+        product = Product.objects.filter(category__slug='basmati-rice').first()
+        response = self.client.get(reverse('products:product_detail', args=[product.slug]), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['related_products']), 3)
+
+    def test_home_featured_products(self):
+        response = self.client.get(reverse('home'), secure=True)
+        self.assertEqual(response.status_code, 200)
+
+
+class NPlusOneDetectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog()
+
+    def test_per_row_relation_access_raises(self):
+        with self.assertRaises(NPlusOneError) as cm:
+            with detect_nplusone('loop', mode='raise'):
+                [product.category.name for product in Product.objects.all()]
+        self.assertIn('products/tests.py', str(cm.exception))
+
+    def test_select_related_passes(self):
+        with detect_nplusone('loop', mode='raise'):
+            [product.category.name for product in Product.objects.select_related('category')]
+
+
+class AsyncViewTests(TestCase):
+    """The async views, as the ASGI entry point routes to them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog()
+
+    def setUp(self):
+        from prime_impex.test_runner import use_async_views
+
+        use_async_views(self)
+        cache.clear()
+        holder.index = None
+
+    async def get(self, name, *args, **params):
+        response = await self.async_client.get(reverse(f'products:{name}', args=args), params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.resolver_match.func.__name__.endswith('_async'))
+        return response
+
+    async def test_product_list(self):
+        response = await self.get('product_list')
+        self.assertEqual(len(response.context['products']), 9)
+        self.assertContains(response, '?category=basmati-rice">Basmati Rice</a>')  # footer
+        response = await self.get('product_list', category='non-basmati-rice', q='grade')
+        self.assertEqual(response.context['paginator'].count, 5)
+
+    async def test_product_detail(self):
+        product = await Product.objects.filter(category__slug='basmati-rice').afirst()
+        response = await self.get('product_detail', product.slug)
+        self.assertEqual(len(response.context['related_products']), 3)
+
+    async def test_suggest_and_compare(self):
+        response = await self.get('suggest', q='non gra')
+        self.assertEqual(len(response.json()['suggestions']), 5)
+        ids = [pk async for pk in Product.objects.order_by('pk').values_list('pk', flat=True)[:2]]
+        response = await self.get('compare', ids=f'{ids[1]},{ids[0]}', format='json')
+        self.assertEqual(response.json()['ids'], [ids[1], ids[0]])
+        response = await self.get('compare', ids=f'{ids[0]},{ids[1]}')
+        self.assertEqual(len(response.context['comparison']['products']), 2)
+
+
+class SuggestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(products_per_category=3)
+
+    def setUp(self):
+        # Index the rows of this test's transaction
+        holder.index = None
+
+    def suggest(self, query):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('products:suggest'), {'q': query}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['suggestions']
+
+    def test_categories_rank_before_terms_and_products(self):
+        holder.get()
+        types = [s['type'] for s in self.suggest('basm')]
+        self.assertEqual(types[:2], ['category', 'category'])
+        self.assertIn('term', types)
+        self.assertEqual(types[-1], 'product')
+
+    def test_every_word_is_a_prefix(self):
+        holder.get()
+        labels = [s['label'] for s in self.suggest('non gra')]
+        self.assertEqual(labels, [f'Non-Basmati Rice Grade {i}' for i in range(3)])
+
+    def test_no_match(self):
+        holder.get()
+        self.assertEqual(self.suggest('zzz'), [])
+
+
+class CompareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = ProductCategory.objects.create(name='Basmati Rice')
+        cls.sella = Product.objects.create(
+            name='1121 Sella', category=category, short_description='Parboiled', description='Sella rice.',
+            main_image='products/sella.jpg', grain_length='8.3mm', purity='95%',
+            additional_specs='Origin: Punjab\nAged 12 months',
+        )
+        cls.steam = Product.objects.create(
+            name='1121 Steam', category=category, short_description='Steamed', description='Steam rice.',
+            main_image='products/steam.jpg', grain_length='8.35mm', moisture='12%',
+            additional_specs='Origin: Haryana',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def compare(self, ids, **params):
+        return self.client.get(reverse('products:compare'), {'ids': ids, **params}, secure=True)
+
+    def test_spec_matrix(self):
+        data = self.compare(f'{self.steam.pk},{self.sella.pk}', format='json').json()
+        self.assertEqual([product['name'] for product in data['products']], ['1121 Steam', '1121 Sella'])
+        rows = {row['label']: row['values'] for row in data['rows']}
+        self.assertEqual(rows['Grain Length'], ['8.35mm', '8.3mm'])
+        self.assertEqual(rows['Moisture'], ['12%', ''])
+        self.assertEqual(rows['Origin'], ['Haryana', 'Punjab'])
+        self.assertEqual(data['rows'][-1], {'label': 'Notes', 'values': ['', 'Aged 12 months']})
+
+    def test_cached_per_id_set(self):
+        with self.assertNumQueries(2):  # products, footer categories
+            self.compare(f'{self.sella.pk},{self.steam.pk}')
+        with self.assertNumQueries(1):  # footer categories only
+            response = self.compare(f'{self.steam.pk},{self.sella.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['name'] for p in response.context['comparison']['products']], ['1121 Steam', '1121 Sella'])
+
+    def test_unknown_and_invalid_ids(self):
+        data = self.compare(f'x,{self.sella.pk},999999', format='json').json()
+        self.assertEqual(data['ids'], [self.sella.pk, 999999])
+        self.assertEqual(len(data['products']), 1)
+        response = self.compare('')
+        self.assertContains(response, 'Nothing to Compare')
+
+    def test_non_ascii_and_out_of_range_ids_are_ignored(self):
+        for ids in ('\u00b2', '\u0663', '99999999999999999999999', str(2 ** 63), '-1', '0'):
+            response = self.compare(f'{ids},{self.sella.pk}', format='json')
+            self.assertEqual(response.status_code, 200, ids)
+            self.assertEqual(response.json()['ids'], [self.sella.pk], ids)
+
+
+class MediaStorageTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        from django.test import override_settings
+
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.root = media_root.name
+        settings_override = override_settings(MEDIA_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, field_file, name, data):
+        from django.core.files.base import ContentFile
+
+        field_file.save(name, ContentFile(data), save=True)
+        return field_file.name
+
+    def test_identical_uploads_share_one_file(self):
+        import os
+
+        from blog.models import BlogCategory, BlogPost
+
+        category = ProductCategory.objects.create(name='Basmati Rice')
+        first = Product.objects.create(name='One', category=category, main_image='x.jpg')
+        second = Product.objects.create(name='Two', category=category, main_image='x.jpg')
+        name = self.upload(first.main_image, 'IMG-0001.JPG', b'rice photo')
+        self.assertRegex(name, r'^products/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{28}\.jpg$')
+        self.assertEqual(self.upload(second.main_image, 'copy of IMG-0001.jpg', b'rice photo'), name)
+        self.assertEqual(len(os.listdir(os.path.join(self.root, os.path.dirname(name)))), 1)
+
+        post = BlogPost(title='Harvest', excerpt='e', content='<p>c</p>',
+                        category=BlogCategory.objects.create(name='News'), featured_image='x.jpg')
+        post.save()
+        blog_name = self.upload(post.featured_image, 'harvest.jpg', b'rice photo')
+        self.assertEqual(blog_name, 'blog/' + name.split('/', 1)[1])
+        self.assertEqual(os.stat(os.path.join(self.root, blog_name)).st_nlink, 2)
+
+    def test_gc_removes_unreferenced_files(self):
+        import os
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        category = ProductCategory.objects.create(name='Basmati Rice')
+        product = Product.objects.create(name='One', category=category, main_image='x.jpg')
+        kept = self.upload(product.main_image, 'a.jpg', b'current photo')
+        product.main_image = 'x.jpg'
+        orphan = self.upload(product.main_image, 'b.jpg', b'replaced photo')
+        product.main_image = kept
+        product.save()
+        variants = {}
+        for name in (kept, orphan):
+            variants[name] = os.path.join(self.root, f'{os.path.splitext(name)[0]}-480.webp')
+            with open(variants[name], 'wb') as f:
+                f.write(b'resized')
+
+        call_command('gc_media', min_age=0, stdout=StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.root, kept)))
+        self.assertTrue(os.path.exists(variants[kept]))
+        self.assertFalse(os.path.exists(os.path.join(self.root, orphan)))
+        self.assertFalse(os.path.exists(variants[orphan]))
+        self.assertFalse(os.path.exists(os.path.dirname(os.path.join(self.root, orphan))))
+
+
+class ReorderTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        cache.clear()
+        category = ProductCategory.objects.create(name='Basmati Rice')
+        self.products = [
+            Product.objects.create(name=f'Grade {i}', category=category, main_image='x.jpg', order=i)
+            for i in range(1, 5)
+        ]
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.url = reverse('admin:products_product_reorder')
+
+    def post(self, payload):
+        import json
+
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json', secure=True)
+
+    def test_page_lists_rows_in_order(self):
+        response = self.client.get(self.url, secure=True)
+        self.assertEqual([row[0] for row in response.context['rows']], [p.pk for p in self.products])
+        self.assertContains(self.client.get(reverse('admin:products_product_changelist'), secure=True), self.url)
+
+    def test_only_moved_rows_are_written_with_one_version_bump(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from prime_impex.versions import get_version
+
+        first, second, third, fourth = self.products
+        version = get_version('catalog')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post({'ids': [first.pk, third.pk, second.pk, fourth.pk]})
+        self.assertEqual(response.json(), {'updated': 2})
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "products_product"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(get_version('catalog'), version + 1)
+        orders = dict(Product.objects.values_list('pk', 'order'))
+        self.assertEqual([orders[p.pk] for p in (first, second, third, fourth)], [1, 3, 2, 4])
+
+    def test_bad_payloads_are_rejected(self):
+        for payload in ({'ids': [1, 1]}, {'ids': 'x'}, {}, {'ids': [self.products[0].pk, 999]}):
+            self.assertEqual(self.post(payload).status_code, 400, payload)
+
+
+class ImportTests(TestCase):
+    HEADER = 'slug,name,category,category_name,short_description,is_featured,order,main_image\n'
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+
+        from django.test import override_settings
+        from PIL import Image
+
+        from prime_impex import storage
+
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.root = Path(media_root.name)
+        self.images = self.root / 'imports'
+        self.images.mkdir()
+        Image.new('RGB', (1000, 600), (222, 203, 164)).save(self.images / 'sella.jpg')
+        settings_override = override_settings(MEDIA_ROOT=self.root / 'media', PRODUCT_IMPORT_IMAGE_DIR=self.images)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        ProductCategory.objects.create(name='Basmati Rice', slug='basmati')
+        self.addCleanup(storage._stored_variants.clear)
+
+    def run_import(self, csv_text):
+        from io import StringIO
+
+        from products.importer import ProductImporter
+
+        return ProductImporter(self.images, chunk_size=2).run(StringIO(csv_text))
+
+    def test_creates_then_updates_by_slug(self):
+        from prime_impex.versions import get_version
+
+        version = get_version('catalog')
+        result = self.run_import(self.HEADER + (
+            ',1121 Sella,basmati,,Parboiled,yes,1,sella.jpg\n'
+            ',1121 Golden Sella,basmati,,Golden,no,2,sella.jpg\n'
+            ',Pusa Steam,steam,Steam Rice,Steamed,,3,sella.jpg\n'
+        ))
+        self.assertEqual((result.created, result.updated, result.errors), (3, 0, []))
+        self.assertEqual(get_version('catalog'), version + 1)
+
+        sella = Product.objects.get(slug='1121-sella')
+        self.assertTrue(sella.is_featured)
+        self.assertEqual(sella.meta_title, '1121 Sella - Patel Universal Traders PVT.LTD.')
+        self.assertEqual(Product.objects.get(slug='pusa-steam').category.name, 'Steam Rice')
+        # One stored image shared by all three, with its WebP variants
+        self.assertEqual(Product.objects.values('main_image').distinct().count(), 1)
+        stem = sella.main_image.name.rsplit('.', 1)[0]
+        for width in (480, 800):
+            self.assertTrue((self.root / 'media' / f'{stem}-{width}.webp').exists())
+        # ...which the product cards offer to browsers
+        response = self.client.get(reverse('products:product_list'), secure=True)
+        self.assertContains(response, f'srcset="/media/{stem}-480.webp 480w, /media/{stem}-800.webp 800w"', count=3)
+
+        # Columns left out and blank image cells keep their current values
+        result = self.run_import('slug,name,category,short_description,main_image\n'
+                                 '1121-sella,1121 Sella,basmati,Parboiled sella rice,\n')
+        self.assertEqual((result.created, result.updated), (0, 1))
+        sella.refresh_from_db()
+        self.assertEqual(sella.short_description, 'Parboiled sella rice')
+        self.assertTrue(sella.is_featured)
+        self.assertEqual(sella.main_image.name, Product.objects.get(slug='pusa-steam').main_image.name)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        result = self.run_import(self.HEADER + (
+            ',No Category,,,x,,,sella.jpg\n'
+            ',Unknown Category,organic,,x,,,sella.jpg\n'
+            ',Bad Flag,basmati,,x,maybe,,sella.jpg\n'
+            ',Bad Order,basmati,,x,,first,sella.jpg\n'
+            ',Missing Image,basmati,,x,,,nope.jpg\n'
+            ',No Image,basmati,,x,,,\n'
+            ',Good,basmati,,x,,,sella.jpg\n'
+        ))
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, message in result.errors], [2, 3, 4, 5, 6, 7])
+        self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['Good'])
+
+    def test_rows_are_validated_and_slugified(self):
+        result = self.run_import(self.HEADER + (
+            'bad slug!,Odd Slug,basmati,,x,,,sella.jpg\n'
+            f',{"x" * 300},basmati,,x,,,sella.jpg\n'
+            ',Same Category,other-slug,Basmati Rice,x,,,sella.jpg\n'
+            ',New Category,Bad Cat!,Organic Rice,x,,,sella.jpg\n'
+            f',Long Category,long,{"y" * 150},x,,,sella.jpg\n'
+            '!!!,No Slug,basmati,,x,,,sella.jpg\n'
+        ))
+        self.assertEqual(result.created, 3)
+        self.assertEqual([line for line, message in result.errors], [3, 6, 7])
+        self.assertIn('name', result.errors[0][1])
+        self.assertTrue(Product.objects.filter(slug='bad-slug').exists())
+        self.assertEqual(Product.objects.get(name='Same Category').category.slug, 'basmati')
+        self.assertEqual(ProductCategory.objects.get(name='Organic Rice').slug, 'bad-cat')
+        # Every product page can be linked to
+        self.assertEqual(self.client.get(reverse('products:product_list'), secure=True).status_code, 200)
+
+    def test_command_and_admin_upload(self):
+        from io import StringIO
+
+        from django.contrib.auth.models import User
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import call_command
+
+        csv_path = self.root / 'products.csv'
+        csv_path.write_text(self.HEADER + ',1121 Sella,basmati,,Parboiled,,,sella.jpg\n', encoding='utf-8')
+        out = StringIO()
+        call_command('import_products', str(csv_path), images=str(self.images), stdout=out, stderr=StringIO())
+        self.assertIn('1 products created', out.getvalue())
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        upload = SimpleUploadedFile('products.csv', (self.HEADER + ',Pusa Steam,basmati,,Steamed,,,sella.jpg\n').encode())
+        response = self.client.post(reverse('admin:products_product_import'), {'csv_file': upload}, secure=True)
+        self.assertRedirects(response, reverse('admin:products_product_changelist'), fetch_redirect_response=False)
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_unreadable_files_are_reported(self):
+        from django.contrib.auth.models import User
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import CommandError, call_command
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        upload = SimpleUploadedFile('products.csv', (self.HEADER + ',Caf\xe9,basmati,,x,,,sella.jpg\n').encode('latin-1'))
+        response = self.client.post(reverse('admin:products_product_import'), {'csv_file': upload}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('csv_file'))
+
+        csv_path = self.root / 'latin1.csv'
+        csv_path.write_bytes(upload.open().read())
+        with self.assertRaises(CommandError):
+            call_command('import_products', str(csv_path), images=str(self.images), stdout=StringIO())
+
+    def test_storage_errors_are_not_swallowed(self):
+        from unittest import mock
 
-# Create your tests here.
+        with mock.patch('products.importer.save_variants', side_effect=PermissionError('read-only')):
+            with self.assertRaises(PermissionError):
+                self.run_import(self.HEADER + ',1121 Sella,basmati,,x,,,sella.jpg\n')
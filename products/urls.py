@@ -1,9 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'products'
 
+# The ASGI entry point serves the async variants (see prime_impex/asgi.py)
+if settings.ASYNC_VIEWS:
+    product_list, product_detail = views.product_list_async, views.product_detail_async
+    suggest, compare = views.suggest_async, views.compare_async
+else:
+    product_list, product_detail = views.product_list, views.product_detail
+    suggest, compare = views.suggest, views.compare
+
 urlpatterns = [
-    path('', views.product_list, name='product_list'),
-    path('<slug:slug>/', views.product_detail, name='product_detail'),
+    path('', product_list, name='product_list'),
+    # Before the slug route, which would otherwise take 'suggest' and 'compare'
+    path('suggest/', suggest, name='suggest'),
+    path('compare/', compare, name='compare'),
+    path('<slug:slug>/', product_detail, name='product_detail'),
 ]
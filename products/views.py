@@ -1,27 +1,49 @@
-from django.shortcuts import render, get_object_or_404
+from django.http import JsonResponse
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from django.db.models import Q
 from .models import Product, ProductCategory
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from prime_impex.context_processors import aprepare_chrome
+from prime_impex.pagination import aget_page
+from prime_impex.ratelimit import ratelimit
+from .compare import aget_comparison, get_comparison, parse_ids
+from .suggest import aget_index, get_index
 
+PRODUCT_LIST_CONTEXT = {
+    'page_title': 'Our Products - Premium Rice Exporters',
+    'meta_description': 'Explore our premium range of Basmati, Non-Basmati, and Organic rice. Quality guaranteed from India to the world.',
+}
+
+
+def search_products(products, search_query):
+    """Filter a product queryset by a free-text search query"""
+    return products.filter(
+        Q(name__icontains=search_query) |
+        Q(description__icontains=search_query)
+    )
+
+
+def has_search_query(request):
+    return bool(request.GET.get('q'))
+
+
+@ratelimit('search', when=has_search_query)
 def product_list(request):
     """Display all products with category filtering"""
     category_slug = request.GET.get('category', None)
     search_query = request.GET.get('q', None)
-    
-    products = Product.objects.filter(is_active=True)
+
+    products = Product.objects.filter(is_active=True).cards()
     categories = ProductCategory.objects.filter(is_active=True)
     selected_category = None
-    
+
     if category_slug:
         selected_category = get_object_or_404(ProductCategory, slug=category_slug)
         products = products.filter(category=selected_category)
-    
+
     if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query)
-        )
-    
+        products = search_products(products, search_query)
+
     # paginate products: 9 per page
     paginator = Paginator(products, 9)
     page = request.GET.get('page', 1)
@@ -39,25 +61,128 @@ def product_list(request):
         'categories': categories,
         'selected_category': selected_category,
         'search_query': search_query,
-        'page_title': 'Our Products - Premium Rice Exporters',
-        'meta_description': 'Explore our premium range of Basmati, Non-Basmati, and Organic rice. Quality guaranteed from India to the world.',
+        **PRODUCT_LIST_CONTEXT,
     }
     return render(request, 'products/product_list.html', context)
 
 
-def product_detail(request, slug):
-    """Display detailed product information"""
-    product = get_object_or_404(Product, slug=slug, is_active=True)
-    related_products = Product.objects.filter(
-        category=product.category, 
-        is_active=True
-    ).exclude(id=product.id)[:3]
-    
+@ratelimit('search', when=has_search_query)
+async def product_list_async(request):
+    """Async product_list: every query is awaited before the template renders"""
+    category_slug = request.GET.get('category', None)
+    search_query = request.GET.get('q', None)
+
+    # Anything the template touches outside the card fields would lazy-load, which fails in async code
+    products = Product.objects.filter(is_active=True).cards()
+    categories = [category async for category in ProductCategory.objects.filter(is_active=True)]
+    selected_category = None
+
+    if category_slug:
+        selected_category = await aget_object_or_404(ProductCategory, slug=category_slug)
+        products = products.filter(category=selected_category)
+
+    if search_query:
+        products = search_products(products, search_query)
+
+    products_page = await aget_page(products, request.GET.get('page', 1), 9)
+
     context = {
+        'products': products_page.object_list,
+        'page_obj': products_page,
+        'paginator': products_page.paginator,
+        'categories': categories,
+        'selected_category': selected_category,
+        'search_query': search_query,
+        **PRODUCT_LIST_CONTEXT,
+    }
+    await aprepare_chrome(request)
+    return render(request, 'products/product_list.html', context)
+
+
+def product_detail_context(product, related_products):
+    return {
         'product': product,
         'related_products': related_products,
         'page_title': product.meta_title,
         'meta_description': product.meta_description,
         'meta_keywords': product.meta_keywords,
     }
+
+
+def product_detail(request, slug):
+    """Display detailed product information"""
+    product = get_object_or_404(Product.objects.select_related('category'), slug=slug, is_active=True)
+    related_products = Product.objects.filter(
+        category=product.category,
+        is_active=True
+    ).cards().exclude(id=product.id)[:3]
+
+    context = product_detail_context(product, related_products)
+    return render(request, 'products/product_detail.html', context)
+
+
+async def product_detail_async(request, slug):
+    """Async product_detail"""
+    product = await aget_object_or_404(
+        Product.objects.select_related('category'), slug=slug, is_active=True
+    )
+    related_products = [
+        related async for related in Product.objects.filter(
+            category=product.category,
+            is_active=True
+        ).cards().exclude(id=product.id)[:3]
+    ]
+
+    context = product_detail_context(product, related_products)
+    await aprepare_chrome(request)
     return render(request, 'products/product_detail.html', context)
+
+
+def suggest_response(index, request):
+    query = request.GET.get('q', '')[:100]
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    response = JsonResponse({'q': query, 'suggestions': index.search(query, limit)})
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
+def suggest(request):
+    """Autocomplete for the search box: categories, common terms and products matching ?q="""
+    return suggest_response(get_index(), request)
+
+
+async def suggest_async(request):
+    """Async suggest"""
+    return suggest_response(await aget_index(), request)
+
+
+def compare_response(request, ids, comparison):
+    if request.GET.get('format') == 'json':
+        response = JsonResponse({'ids': ids, **comparison})
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
+    context = {
+        'comparison': comparison,
+        'page_title': 'Compare Products - Premium Rice Exporters',
+        'meta_description': 'Compare specifications of our rice grades side by side.',
+    }
+    return render(request, 'products/product_compare.html', context)
+
+
+def compare(request):
+    """Specifications of the products in ?ids=1,2,3 side by side (?format=json for JSON)"""
+    ids = parse_ids(request)
+    comparison = get_comparison(ids) if ids else {'products': [], 'rows': []}
+    return compare_response(request, ids, comparison)
+
+
+async def compare_async(request):
+    """Async compare"""
+    ids = parse_ids(request)
+    comparison = await aget_comparison(ids) if ids else {'products': [], 'rows': []}
+    if request.GET.get('format') != 'json':
+        await aprepare_chrome(request)
+    return compare_response(request, ids, comparison)
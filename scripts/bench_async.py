@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Compare concurrent-request throughput and memory of the sync (WSGI) and async
+(ASGI) deployments.
+
+Usage (from repo root):
+  python scripts/bench_async.py --concurrency 50 --requests 2000 --path / --path /products/
+
+For each profile the script:
+- Starts gunicorn on a free local port, either with sync workers
+  (`prime_impex.wsgi`, like Procfile) or uvicorn workers (`prime_impex.asgi`,
+  like Procfile.asgi), using the same number of workers.
+- Fires `--requests` GETs per path with `--concurrency` connections open at once.
+- Samples the RSS of the gunicorn master and workers while idle and under load.
+- Prints a JSON report with requests/s, p50/p95/p99 latency and
+  "memory per connection" ((loaded RSS - idle RSS) / concurrency).
+
+Requires: gunicorn, uvicorn, uvicorn-worker (see requirements.txt).
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    'sync': ['prime_impex.wsgi:application'],
+    'async': ['prime_impex.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def process_tree_rss_kb(pid):
+    """Sum VmRSS of a process and its children (Linux /proc only)"""
+    total = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'
+    writer.write(request.encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+async def load(port, path, total, concurrency, rss_samples, server_pid):
+    latencies = []
+    statuses = {}
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, path)
+            except OSError:
+                status = 'error'
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def sampler():
+        while True:
+            rss_samples.append(process_tree_rss_kb(server_pid))
+            await asyncio.sleep(0.05)
+
+    sampling = asyncio.create_task(sampler())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    sampling.cancel()
+    return latencies, statuses, elapsed
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_profile(name, args):
+    port = free_port()
+    cmd = [
+        sys.executable, '-m', 'gunicorn', *PROFILES[name],
+        '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+        '--log-level', 'warning',
+    ]
+    env = {
+        **os.environ,
+        'DEBUG': 'False',
+        'SECURE_SSL_REDIRECT': 'False',
+        'ALLOWED_HOSTS': 'localhost,127.0.0.1',
+    }
+    server = subprocess.Popen(cmd, cwd=BASE_DIR, env=env)
+    try:
+        if not wait_for_port(port):
+            raise RuntimeError(f'{name} server did not start: {" ".join(cmd)}')
+        # Warm up every worker before measuring idle memory
+        for path in args.path:
+            asyncio.run(load(port, path, args.workers * 4, args.workers, [], server.pid))
+        idle_rss = process_tree_rss_kb(server.pid)
+
+        results = {}
+        for path in args.path:
+            rss_samples = []
+            latencies, statuses, elapsed = asyncio.run(
+                load(port, path, args.requests, args.concurrency, rss_samples, server.pid)
+            )
+            peak_rss = max(rss_samples, default=idle_rss)
+            results[path] = {
+                'requests_per_second': round(len(latencies) / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+                'statuses': {str(k): v for k, v in statuses.items()},
+                'idle_rss_kb': idle_rss,
+                'peak_rss_kb': peak_rss,
+                'rss_per_connection_kb': round(max(peak_rss - idle_rss, 0) / args.concurrency, 1),
+            }
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', action='append', help='URL path to request (repeatable, default: /)')
+    parser.add_argument('--requests', type=int, default=1000, help='requests per path')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                        help='profiles to run (default: both)')
+    args = parser.parse_args()
+    args.path = args.path or ['/']
+
+    report = {
+        'concurrency': args.concurrency,
+        'workers': args.workers,
+        'requests_per_path': args.requests,
+        'profiles': {name: run_profile(name, args) for name in (args.profile or sorted(PROFILES))},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
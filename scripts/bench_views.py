@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark every public URL pattern in prime_impex/urls.py.
+
+Usage (from repo root, ideally after `python manage.py seed_catalog`):
+  python scripts/bench_views.py --iterations 50 --output bench/$(git rev-parse --short HEAD).json
+  python scripts/bench_views.py --compare bench/abc1234.json
+
+For each URL pattern (admin and static/media serving excluded) the script
+builds a concrete URL, plus the query-string variants from extra_variants(), and
+reports per view:
+- p50/p95/p99 latency over --iterations requests (after --warmup requests)
+- number of SQL queries for one request
+- peak Python memory allocated during one request (tracemalloc)
+
+Requests go through django.test.Client, so they exercise the full middleware
+stack without a server. Output is JSON tagged with the git commit so runs
+can be compared; --compare prints the change against an earlier report.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prime_impex.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from blog.models import BlogPost
+from contact.models import ContactInquiry
+from products.models import Product, ProductCategory
+
+SKIP_NAMESPACES = {'admin'}
+
+
+def sample_kwargs():
+    """URL kwargs for parameterised patterns, taken from the current database"""
+    product = Product.objects.filter(is_active=True).only('slug').first()
+    post = BlogPost.objects.filter(is_live=True).only('slug').first()
+    return {
+        'products:product_detail': {'slug': product.slug} if product else None,
+        'blog:blog_detail': {'slug': post.slug} if post else None,
+    }
+
+
+def extra_variants():
+    """Query-string variants worth timing separately (search scans, deep pages, filters)"""
+    category = ProductCategory.objects.filter(is_active=True).only('slug').first()
+    variants = {
+        'products:product_list': ['?q=basmati', '?page=50'],
+        'blog:blog_list': ['?page=50'],
+    }
+    if category:
+        variants['products:product_list'].append(f'?category={category.slug}')
+    return variants
+
+
+def url_names(patterns=None, namespace=''):
+    """Yield 'namespace:name' for every named pattern, skipping admin and unnamed routes"""
+    for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIP_NAMESPACES:
+                continue
+            child = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            yield from url_names(pattern.url_patterns, child)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}{pattern.name}'
+
+
+def build_targets():
+    kwargs = sample_kwargs()
+    variants = extra_variants()
+    targets = []
+    for name in url_names():
+        if name in kwargs and kwargs[name] is None:
+            print(f'skipping {name}: no rows to build a URL from', file=sys.stderr)
+            continue
+        path = reverse(name, kwargs=kwargs.get(name))
+        targets.append((name, path))
+        targets.extend((f'{name}{query}', path + query) for query in variants.get(name, []))
+    return targets
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class QueryCounter:
+    """
+    Counts queries through connection.execute_wrapper. CaptureQueriesContext
+    can't be used around test-client requests: request_started resets the
+    query log it reads from.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, path, iterations, warmup):
+    for _ in range(warmup):
+        client.get(path, secure=True)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get(path, secure=True)
+        timings.append(time.perf_counter() - start)
+
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        client.get(path, secure=True)
+
+    tracemalloc.start()
+    client.get(path, secure=True)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'path': path,
+        'status': response.status_code,
+        'bytes': len(response.content),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'queries': queries.count,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, previous_path):
+    previous = json.loads(Path(previous_path).read_text())['views']
+    print(f"\n{'view':45} {'p95 ms':>18} {'queries':>12} {'peak kb':>20}")
+    for name, current in report['views'].items():
+        before = previous.get(name)
+        if not before:
+            print(f'{name:45} (new)')
+            continue
+        print(
+            f"{name:45} {before['p95_ms']:>8} -> {current['p95_ms']:<8}"
+            f"{before['queries']:>5} -> {current['queries']:<5}"
+            f"{before['peak_memory_kb']:>9} -> {current['peak_memory_kb']:<9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', action='append', help='benchmark only these URL names (repeatable)')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='earlier JSON report to diff against')
+    args = parser.parse_args()
+
+    host = next((h for h in settings.ALLOWED_HOSTS if h and h[0] not in '.*'), 'localhost')
+    client = Client(SERVER_NAME=host)
+
+    views = {}
+    for name, path in build_targets():
+        if args.only and name.split('?')[0] not in args.only:
+            continue
+        views[name] = measure(client, path, args.iterations, args.warmup)
+        print(f"{name:45} p95 {views[name]['p95_ms']:>9} ms  {views[name]['queries']:>3} queries", file=sys.stderr)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'debug': settings.DEBUG,
+        'database': settings.DATABASES['default']['ENGINE'],
+        'counts': {
+            'products': Product.objects.count(),
+            'blog_posts': BlogPost.objects.count(),
+            'inquiries': ContactInquiry.objects.count(),
+        },
+        'iterations': args.iterations,
+        'views': views,
+    }
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
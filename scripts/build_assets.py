@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Build the site's CSS/JS bundles and critical CSS.
+
+Usage (from repo root, before collectstatic):
+  python scripts/build_assets.py
+  python scripts/build_assets.py --output /tmp/dist
+
+For every bundle in settings.ASSET_BUNDLES the script concatenates the
+source files (found like {% static %} finds them), minifies the result and
+writes it as <output>/<name>.<hash>.<ext>. The output directory defaults to
+static/dist/, so collectstatic picks the files up; their names change with
+their content, so they can be cached forever.
+
+For every page in settings.CRITICAL_CSS it also extracts the critical CSS:
+the rules of the page's bundle that match an element in the page's first
+screen (the header in base.html plus the start of the page's content block,
+with {% include %}s expanded). :hover/:focus rules and unused @keyframes
+are left out. The {% stylesheet %} tag (prime_impex/asset_tags.py) inlines
+it and loads the full bundle without blocking rendering.
+
+Everything lands in <output>/manifest.json, which the tags read and
+prime_impex.assets.asset_version() hashes, so the cached page chrome
+changes with a new build.
+
+The minifiers are deliberately conservative: CSS loses comments and
+whitespace that can't matter, JS loses comments and indentation but keeps
+its line breaks, so automatic semicolon insertion works as before.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Characters of the page's content block treated as its first screen
+FOLD_CHARS = 6000
+ALWAYS_USED = {'tag': {'html', 'body', '*'}, 'class': set(), 'id': set()}
+# State a page isn't rendered in; rules for it can wait for the full bundle
+INTERACTIVE_PSEUDOS = {':hover', ':focus', ':focus-visible', ':focus-within', ':active', ':visited'}
+
+
+# --- CSS ---------------------------------------------------------------------
+
+CSS_PARTS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|([^"'/]+|/)''', re.S)
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(css):
+    out, code = [], []
+
+    def flush():
+        text = CSS_PUNCTUATION.sub(r'\1', re.sub(r'\s+', ' ', ''.join(code))).replace(': ', ':')
+        out.append(text.replace(';}', '}'))
+        code.clear()
+
+    for string, comment, other in CSS_PARTS.findall(css):
+        if string:
+            flush()
+            out.append(string)
+        elif other:
+            code.append(other)
+    flush()
+    return ''.join(out).strip()
+
+
+def parse_rules(css):
+    """Top-level (prelude, body) pairs of minified CSS; @import and the like have body None"""
+    rules, start, depth, prelude = [], 0, 0, None
+    quote = None
+    for i, char in enumerate(css):
+        if quote:
+            if char == quote and css[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            if depth == 0:
+                prelude, start = css[start:i].strip(), i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:i]))
+                start = i + 1
+        elif char == ';' and depth == 0:
+            rules.append((css[start:i].strip(), None))
+            start = i + 1
+    return rules
+
+
+COMPOUND_PART = re.compile(r'(::?[\w-]+)|([.#]?)(-?[_a-zA-Z][\w-]*)|\[[^\]]*\]|\*')
+
+
+def selector_used(selector, used):
+    # :not(...), :is(...) etc. are judged by the element they apply to
+    while re.search(r'\([^()]*\)', selector):
+        selector = re.sub(r'\([^()]*\)', '', selector)
+    for compound in re.split(r'\s*[\s>+~]\s*', selector.strip()):
+        for match in COMPOUND_PART.finditer(compound):
+            pseudo, prefix, name = match.groups()
+            if pseudo:
+                if pseudo in INTERACTIVE_PSEUDOS:
+                    return False
+            elif name:
+                kind = {'.': 'class', '#': 'id', '': 'tag'}[prefix]
+                if name.lower() not in used[kind] and name not in used[kind]:
+                    return False
+    return True
+
+
+def critical_rules(css, used):
+    kept = []
+    for prelude, body in parse_rules(css):
+        if body is None or prelude.startswith(('@font-face', '@keyframes', '@-webkit-keyframes', '@page')):
+            continue
+        if prelude.startswith('@'):
+            inner = critical_rules(body, used)
+            if inner:
+                kept.append(f'{prelude}{{{inner}}}')
+        else:
+            selectors = [selector for selector in prelude.split(',') if selector_used(selector, used)]
+            if selectors:
+                kept.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(kept)
+
+
+def used_keyframes(css, critical):
+    """@keyframes rules of `css` that the critical rules animate with"""
+    kept = []
+    for prelude, body in parse_rules(css):
+        if body is not None and re.match(r'@(-webkit-)?keyframes ', prelude):
+            name = prelude.split(None, 1)[1]
+            if re.search(rf'animation(-name)?:[^;}}]*\b{re.escape(name)}\b', critical):
+                kept.append(f'{prelude}{{{body}}}')
+    return ''.join(kept)
+
+
+def critical_css(css, html):
+    used = {kind: set(names) for kind, names in ALWAYS_USED.items()}
+    # Template tags and variables aren't elements; drop them before looking for names
+    html = re.sub(r'{%.*?%}|{{.*?}}|{#.*?#}', ' ', html, flags=re.S)
+    used['tag'].update(tag.lower() for tag in re.findall(r'<([a-zA-Z][\w-]*)', html))
+    for value in re.findall(r'\bclass\s*=\s*["\']([^"\']*)["\']', html):
+        used['class'].update(value.split())
+    used['id'].update(re.findall(r'\bid\s*=\s*["\']([^"\'\s]+)["\']', html))
+    rules = critical_rules(css, used)
+    return used_keyframes(css, rules) + rules
+
+
+def template_source(name):
+    from django.template.loader import get_template
+
+    return Path(get_template(name).origin.name).read_text(encoding='utf-8')
+
+
+def expand_includes(source, depth=0):
+    if depth > 3:
+        return source
+    return re.sub(
+        r'{%\s*include\s+["\']([^"\']+)["\'][^%]*%}',
+        lambda match: expand_includes(template_source(match.group(1)), depth + 1),
+        source,
+    )
+
+
+def first_screen(template_name):
+    """base.html up to the content block, plus the start of the page's content block"""
+    base = template_source('base.html')
+    header = base[:base.index('{% block content %}')]
+    page = template_source(template_name)
+    content = page.split('{% block content %}', 1)[-1]
+    return header + expand_includes(content)[:FOLD_CHARS]
+
+
+# --- JS ----------------------------------------------------------------------
+
+# A "/" after one of these (or a keyword below) starts a regex literal, not a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void'}
+
+
+def strip_js_comments(js):
+    out = []
+    i, n = 0, len(js)
+    while i < n:
+        char = js[i]
+        if char in '"\'`':
+            end = i + 1
+            while end < n and js[end] != char:
+                end += 2 if js[end] == '\\' else 1
+            out.append(js[i:end + 1])
+            i = end + 1
+        elif js.startswith('//', i):
+            i = js.find('\n', i)
+            i = n if i == -1 else i
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            out.append(' ')
+        elif char == '/' and is_regex_start(''.join(out[-40:])):
+            end, in_class = i + 1, False
+            while end < n and (js[end] != '/' or in_class) and js[end] != '\n':
+                if js[end] == '\\':
+                    end += 1
+                elif js[end] == '[':
+                    in_class = True
+                elif js[end] == ']':
+                    in_class = False
+                end += 1
+            out.append(js[i:end + 1])
+            i = end + 1
+        else:
+            out.append(char)
+            i += 1
+    return ''.join(out)
+
+
+def is_regex_start(before):
+    before = before.rstrip()
+    if not before:
+        return True
+    word = re.search(r'[\w$]+$', before)
+    if word:
+        return word.group() in REGEX_KEYWORDS
+    return before[-1] in REGEX_PRECEDERS
+
+
+def minify_js(js):
+    lines = (line.strip() for line in strip_js_comments(js).splitlines())
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+# --- Build -------------------------------------------------------------------
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+HASHED_NAME = re.compile(r'[\w-]+\.[0-9a-f]{10}\.(css|js)')
+
+
+def read_sources(paths):
+    from django.contrib.staticfiles import finders
+
+    parts = []
+    for path in paths:
+        found = finders.find(path)
+        if found is None:
+            sys.exit(f'{path}: not found in the static files directories')
+        parts.append(Path(found).read_text(encoding='utf-8'))
+    return '\n'.join(parts)
+
+
+def write_hashed(output, name, content):
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha256(content.encode()).hexdigest()[:10]
+    filename = f'{stem}.{digest}{ext}'
+    (output / filename).write_text(content, encoding='utf-8')
+    return filename
+
+
+def build(output):
+    from django.conf import settings
+
+    output.mkdir(parents=True, exist_ok=True)
+    # Manifest paths are what {% static %} takes
+    static_dir = Path(settings.STATICFILES_DIRS[0]).resolve()
+    prefix = f'{output.relative_to(static_dir).as_posix()}/' if output.is_relative_to(static_dir) else ''
+    manifest = {'bundles': {}, 'critical': {}}
+    minified = {}
+
+    for name, paths in settings.ASSET_BUNDLES.items():
+        content = MINIFIERS[os.path.splitext(name)[1]](read_sources(paths))
+        minified[name] = content
+        filename = write_hashed(output, name, content)
+        manifest['bundles'][name] = prefix + filename
+        print(f'{prefix}{filename}: {len(content) / 1024:.1f} KB')
+
+    for page, template_name in settings.CRITICAL_CSS.items():
+        css = critical_css(minified['base.css'], first_screen(template_name))
+        manifest['critical'][page] = {'bundle': 'base.css', 'css': css}
+        print(f'critical CSS for {page}: {len(css) / 1024:.1f} KB')
+
+    # Bundles from earlier builds
+    current = {path.rsplit('/', 1)[-1] for path in manifest['bundles'].values()}
+    for path in output.iterdir():
+        if HASHED_NAME.fullmatch(path.name) and path.name not in current:
+            path.unlink()
+    (output / 'manifest.json').write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    return manifest
+
+
+def main():
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prime_impex.settings')
+    import django
+
+    django.setup()
+    from django.conf import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', type=Path, default=Path(settings.ASSET_MANIFEST).parent)
+    args = parser.parse_args()
+    build(args.output.resolve())
+
+
+if __name__ == '__main__':
+    main()
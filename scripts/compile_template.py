@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Precompile the project's templates into an optimized copy.
+
+Usage (from repo root, as part of the build, after build_assets.py):
+  python scripts/compile_template.py
+  python scripts/compile_template.py --output /tmp/templates
+
+Every .html template of the project (templates/ and the apps' templates/
+directories) is written to the output directory (settings.
+COMPILED_TEMPLATES_DIR by default) under the name Django loads it by. The
+sources are never modified. In production settings.py puts the output
+directory first in the template loaders, so the compiled copies are served
+and anything missing from them falls back to the sources.
+
+The compiled copies differ from the sources in that:
+- runs of whitespace collapse to one space or newline, except inside
+  <pre>, <textarea>, <script> and <style> and inside template tags;
+- <img> tags whose src is a {% static %} image get the image's intrinsic
+  width/height (so the browser reserves the space before it loads), switch
+  to a .webp sibling of a .jpg/.png when one exists, and get
+  loading="lazy"/decoding="async" unless they set their own or are marked
+  data-no-lazy.
+
+Image sizes come from the image manifest, <output>/images.json, built from
+the static files directories on every run (Pillow reads the headers only).
+asset_version() hashes the manifest, so the cached page chrome changes with
+the images.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+RASTER = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif'}
+WEBP_SOURCES = {'.jpg', '.jpeg', '.png'}
+
+# Left as they are: whitespace-sensitive elements and the template language itself
+PROTECTED = re.compile(
+    r'<(pre|textarea|script|style)\b.*?</\1\s*>'
+    r'|{%\s*verbatim\s*%}.*?{%\s*endverbatim\s*%}'
+    r'|{%.*?%}|{{.*?}}|{#.*?#}',
+    re.S | re.I,
+)
+WHITESPACE = re.compile(r'\s+')
+# An <img> tag, template tags inside it included
+IMG_TAG = re.compile(r'<img\b(?:{%.*?%}|{{.*?}}|[^>])*>', re.S | re.I)
+STATIC_SRC = re.compile(r'''(\bsrc\s*=\s*["']\s*{%\s*static\s+["'])([^"']+)(["']\s*%})''', re.I)
+
+
+def image_manifest(static_dirs):
+    """{static path: {'width', 'height'}} for the raster images in the static files directories"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return {}
+    manifest = {}
+    for static_dir in static_dirs:
+        static_dir = Path(static_dir)
+        for path in sorted(static_dir.rglob('*')):
+            if path.suffix.lower() not in RASTER or not path.is_file():
+                continue
+            name = path.relative_to(static_dir).as_posix()
+            try:
+                with Image.open(path) as image:
+                    manifest.setdefault(name, {'width': image.width, 'height': image.height})
+            except Exception:
+                continue
+    return manifest
+
+
+def has_attr(tag, name):
+    return re.search(rf'\s{name}\s*=', tag, re.I) is not None
+
+
+def optimize_img(tag, images):
+    attrs = []
+    match = STATIC_SRC.search(tag)
+    if match:
+        path = match.group(2)
+        stem, ext = os.path.splitext(path)
+        if ext.lower() in WEBP_SOURCES and f'{stem}.webp' in images:
+            path = f'{stem}.webp'
+            tag = tag[:match.start(2)] + path + tag[match.end(2):]
+        size = images.get(path)
+        if size and not has_attr(tag, 'width') and not has_attr(tag, 'height'):
+            attrs += [f'width="{size["width"]}"', f'height="{size["height"]}"']
+    if not has_attr(tag, 'data-no-lazy'):
+        if not has_attr(tag, 'loading'):
+            attrs.append('loading="lazy"')
+        if not has_attr(tag, 'decoding'):
+            attrs.append('decoding="async"')
+    if not attrs:
+        return tag
+    end = len(tag) - (2 if tag.endswith('/>') else 1)
+    return f'{tag[:end].rstrip()} {" ".join(attrs)}{tag[end:]}'
+
+
+def collapse_whitespace(source):
+    out, position = [], 0
+
+    def collapse(text):
+        return WHITESPACE.sub(lambda match: '\n' if '\n' in match.group() else ' ', text)
+
+    for match in PROTECTED.finditer(source):
+        out.append(collapse(source[position:match.start()]))
+        out.append(match.group())
+        position = match.end()
+    out.append(collapse(source[position:]))
+    return ''.join(out).strip() + '\n'
+
+
+def compile_source(source, images):
+    return collapse_whitespace(IMG_TAG.sub(lambda match: optimize_img(match.group(), images), source))
+
+
+def template_dirs():
+    """The project's template directories, in the order Django's loaders search them"""
+    from django.conf import settings
+    from django.template.utils import get_app_template_dirs
+
+    dirs = [Path(path) for path in settings.TEMPLATES[0]['DIRS']]
+    dirs += [Path(path) for path in get_app_template_dirs('templates')]
+    return [path for path in dirs if path.resolve().is_relative_to(BASE_DIR)]
+
+
+def compile_all(output):
+    from django.conf import settings
+
+    output.mkdir(parents=True, exist_ok=True)
+    images = image_manifest(settings.STATICFILES_DIRS)
+    (output / 'images.json').write_text(json.dumps(images, indent=2, sort_keys=True), encoding='utf-8')
+
+    compiled = {}
+    for directory in template_dirs():
+        for path in sorted(directory.rglob('*.html')):
+            name = path.relative_to(directory).as_posix()
+            if name in compiled:
+                continue  # shadowed by a directory searched earlier, as in the loaders
+            source = path.read_text(encoding='utf-8')
+            compiled[name] = compile_source(source, images)
+            target = output / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(compiled[name], encoding='utf-8')
+            print(f'{name}: {len(source) / 1024:.1f} KB -> {len(compiled[name]) / 1024:.1f} KB')
+
+    # Templates deleted from the sources since the last run
+    for path in output.rglob('*.html'):
+        if path.relative_to(output).as_posix() not in compiled:
+            path.unlink()
+    return compiled
+
+
+def main():
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prime_impex.settings')
+    import django
+
+    django.setup()
+    from django.conf import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', type=Path, default=Path(settings.COMPILED_TEMPLATES_DIR))
+    args = parser.parse_args()
+    compiled = compile_all(args.output.resolve())
+    print(f'Compiled {len(compiled)} templates into {args.output}')
+
+
+if __name__ == '__main__':
+    main()
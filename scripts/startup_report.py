@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Report where a cold start spends its time.
+
+Usage (from repo root):
+  python scripts/startup_report.py
+  python scripts/startup_report.py --path /products/ --top 30 --json
+
+Boots Django in a fresh interpreter under `python -X importtime`, serves one
+GET through the WSGI app (prime_impex.startup.first_response) and prints:
+- wall-clock time from process start to the first response
+- total import time, grouped by top-level package
+- the slowest individual modules (self time) and their parent chain
+
+Run it before and after touching settings.py, urls.py or an app's imports.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+BOOT = (
+    'import sys; sys.path.insert(0, {base!r}); '
+    'from prime_impex.startup import first_response; '
+    'print(first_response({path!r}))'
+)
+
+
+def parse_importtime(stderr):
+    """Yield (module, self_us, cumulative_us, depth) from -X importtime output"""
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        yield name.strip(), int(self_us), int(cumulative_us), depth
+
+
+def run(path):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'prime_impex.settings'}
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT.format(base=str(BASE_DIR), path=path)],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+    return elapsed, int(proc.stdout.strip().splitlines()[-1]), list(parse_importtime(proc.stderr))
+
+
+def build_report(path, top):
+    elapsed, status, modules = run(path)
+    by_package = defaultdict(int)
+    parents = {}
+    stack = []
+    for name, self_us, _cumulative, depth in reversed(modules):
+        # importtime prints children before their parent; walk it backwards
+        del stack[depth:]
+        parents[name] = stack[-1] if stack else None
+        stack.append(name)
+        by_package[name.split('.')[0]] += self_us
+
+    slowest = sorted(modules, key=lambda m: m[1], reverse=True)[:top]
+    return {
+        'path': path,
+        'status': status,
+        'time_to_first_response_ms': round(elapsed * 1000, 1),
+        'import_time_ms': round(sum(m[1] for m in modules) / 1000, 1),
+        'module_count': len(modules),
+        'packages_ms': {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        },
+        'slowest_modules': [
+            {
+                'module': name,
+                'self_ms': round(self_us / 1000, 2),
+                'cumulative_ms': round(cumulative_us / 1000, 2),
+                'imported_by': parents.get(name),
+            }
+            for name, self_us, cumulative_us, _depth in slowest
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', default='/about/', help='URL path for the first request')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print machine-readable JSON')
+    args = parser.parse_args()
+
+    report = build_report(args.path, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"GET {report['path']} -> {report['status']}")
+    print(f"time to first response: {report['time_to_first_response_ms']} ms")
+    print(f"import time: {report['import_time_ms']} ms across {report['module_count']} modules\n")
+    print('by package (self time):')
+    for package, ms in report['packages_ms'].items():
+        print(f'  {ms:8.1f} ms  {package}')
+    print('\nslowest modules (self time):')
+    for m in report['slowest_modules']:
+        print(f"  {m['self_ms']:8.2f} ms  {m['module']}  <- {m['imported_by'] or '-'}")
+
+
+if __name__ == '__main__':
+    main()